@@ -188,19 +188,35 @@ HTTP_STATUS = {
 
 # Spotify API related constants
 SPOTIFY = {
+    "API_URL": "https://api.spotify.com/v1/",
     "MAX_SEED_ITEMS": 5,
     "DEFAULT_MARKET": "US",
+    "MAX_IDS_PER_REQUEST": 50,  # tracks/artists batch endpoints
     "TRACK_URI_PREFIX": "spotify:track:",
     "ARTIST_URI_PREFIX": "spotify:artist:",
     "PLAYLIST_URI_PREFIX": "spotify:playlist:"
 }
 
+# Response cache TTLs per SpotifyService read, in seconds (others use CACHE_DEFAULT_TIMEOUT)
+CACHE_TTLS = {
+    "recent_tracks": 60,
+    "top_tracks": 3600,
+    "top_artists": 3600,
+    "playlists": 300,
+    "saved_tracks": 300,
+    "playlist_tracks": 300,
+    "artist": 86400,
+    "artist_top_tracks": 86400,
+    "search": 3600
+}
+
 # Template display limits
 DISPLAY_LIMITS = {
     "DASHBOARD_RECENT_TRACKS": 5,
     "DASHBOARD_TOP_ARTISTS": 5,
     "ANALYZE_TOP_TRACKS": 10,
     "ANALYZE_TOP_ARTISTS": 10,
+    "ANALYZE_RECENT_TRACKS": 10,
     "DISCOVER_RECOMMENDATIONS": 20,
     "SEARCH_RESULTS": 10,
     "GENRE_DISTRIBUTION": 10
@@ -5,36 +5,114 @@ Custom AI Model for Music Recommendations
 import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.decomposition import NMF
 from sklearn.preprocessing import StandardScaler
+from scipy import sparse
 import joblib
 import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 import logging
 
+from .similarity import top_k_indices, top_k_indices_batch, sparse_dot_scores, sparse_batch_scores
+from .ann_index import create_ann_index
+from .interactions import InteractionMatrixBuilder
+from .metrics import LatencyTracker
+from .featurizers import HashingTfidfVectorizer
+from .id_index import IdIndex
+from .model_store import ModelStore
+from .feature_store import TrackFeatureStore, FEATURE_COLUMNS, FEATURE_INDEX
+from .fusion import DEFAULT_FUSION_WEIGHTS, FUSION_METHODS, fuse_rankings
+from .documents import TermAnalyzer, TrackDocumentCache, accepts_terms
+from .records import AUDIO_FEATURE_INDEX, packed_audio
+from .genres import GenreCounts
+
+# Audio features as (name, default, offset, scale): value = (raw + offset) / scale
+AUDIO_FEATURES = [
+    ('danceability', 0.5, 0, 1.0),
+    ('energy', 0.5, 0, 1.0),
+    ('key', 0, 0, 11.0),  # Normalize to 0-1
+    ('loudness', -60, 60, 60.0),  # Normalize to 0-1
+    ('mode', 1, 0, 1.0),
+    ('speechiness', 0.0, 0, 1.0),
+    ('acousticness', 0.0, 0, 1.0),
+    ('instrumentalness', 0.0, 0, 1.0),
+    ('liveness', 0.0, 0, 1.0),
+    ('valence', 0.5, 0, 1.0),
+    ('tempo', 120, 0, 200.0)  # Normalize to 0-1
+]
+
+# Per-source latency budgets for hybrid candidate generation, in milliseconds
+DEFAULT_SOURCE_BUDGETS_MS = {
+    'content': 200,
+    'mood': 100,
+    'collaborative': 200
+}
+
+# Candidate sources run inline when there is a single CPU to share
+_CPU_COUNT = os.cpu_count() or 1
+
+def _no_candidates() -> Tuple[np.ndarray, np.ndarray]:
+    """Empty (positions, scores) pair for a source with nothing to propose"""
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
 class MusicAI:
     """Custom AI model for music recommendations"""
     
-    def __init__(self, model_dir='app/models/saved'):
+    def __init__(self, model_dir='app/models/saved', ann_index: Optional[str] = None,
+                 ann_params: Optional[Dict] = None, text_featurizer: str = 'tfidf',
+                 fusion_method: str = 'weighted', fusion_weights: Optional[Dict[str, float]] = None,
+                 source_budgets_ms: Optional[Dict[str, Optional[float]]] = None, max_workers: int = 3):
+        if text_featurizer not in ('tfidf', 'hashing'):
+            raise ValueError(f"Unknown text featurizer: {text_featurizer}")
+        if fusion_method not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {fusion_method}")
         self.model_dir = model_dir
+        self.text_featurizer = text_featurizer
         self.tfidf_vectorizer = None
+        self.ann_index_type = ann_index
+        self.ann_params = ann_params or {}
+        self.ann_index = None
         self.nmf_model = None
+        self.user_factors = None
+        self.item_factors = None
+        self.user_item_matrix = None
+        self.cf_user_index = IdIndex()
+        self.cf_track_index = IdIndex()
+        self.cf_fitted_users = 0
+        self.pending_interactions = []
+        self.compact_ratio = 0.2
+        self.fusion_method = fusion_method
+        self.fusion_weights = {**DEFAULT_FUSION_WEIGHTS, **(fusion_weights or {})}
+        self.rrf_k = 60
+        self.source_budgets_ms = {**DEFAULT_SOURCE_BUDGETS_MS, **(source_budgets_ms or {})}
+        self.max_workers = max_workers
+        self.deadline_misses = Counter()
+        self._stats_lock = threading.Lock()
+        self._cf_rows_cache = None
+        self.latency = LatencyTracker()
         self.scaler = StandardScaler()
-        self.track_features = {}
+        self.feature_store = TrackFeatureStore()
+        # Stop words and n-grams of the text featurizers (English, unigrams + bigrams)
+        self.documents = TrackDocumentCache(TermAnalyzer(stop_words='english', ngram_range=(1, 2)))
         self.user_profiles = {}
         self.mood_weights = self._initialize_mood_weights()
         self.genre_weights = self._initialize_genre_weights()
+        self.mood_vectors = self._compile_weight_vectors(self.mood_weights)
+        self.genre_vectors = self._compile_weight_vectors(self.genre_weights)
+        
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
         
         # Ensure model directory exists
         os.makedirs(model_dir, exist_ok=True)
         
         # Load pre-trained models if they exist
         self._load_models()
-        
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
     
     def _initialize_mood_weights(self) -> Dict[str, Dict[str, float]]:
         """Initialize mood-based feature weights"""
@@ -88,28 +166,97 @@ class MusicAI:
             'alternative': {'energy': 0.6, 'valence': 0.4, 'danceability': 0.5}
         }
     
+    def _compile_weight_vectors(self, weights: Dict[str, Dict[str, float]]) -> Dict[str, np.ndarray]:
+        """Turn per-feature weight tables into dense vectors aligned to FEATURE_COLUMNS"""
+        vectors = {}
+        for name, feature_weights in weights.items():
+            vector = np.zeros(len(FEATURE_COLUMNS), dtype=np.float32)
+            for feature, weight in feature_weights.items():
+                vector[FEATURE_INDEX[feature]] = weight
+            vectors[name] = vector
+        return vectors
+    
     def _load_models(self):
         """Load pre-trained models from disk"""
         try:
             if os.path.exists(f"{self.model_dir}/tfidf_vectorizer.pkl"):
                 self.tfidf_vectorizer = joblib.load(f"{self.model_dir}/tfidf_vectorizer.pkl")
+                if accepts_terms(self.tfidf_vectorizer):
+                    # Cached terms must follow the saved vectorizer's analysis settings
+                    self.documents = TrackDocumentCache(self.tfidf_vectorizer.analyzer)
                 self.logger.info("Loaded TF-IDF vectorizer")
             
             if os.path.exists(f"{self.model_dir}/nmf_model.pkl"):
                 self.nmf_model = joblib.load(f"{self.model_dir}/nmf_model.pkl")
                 self.logger.info("Loaded NMF model")
+            
+            # Array state is memory-mapped so worker processes share its pages
+            store = ModelStore(f"{self.model_dir}/store")
+            if store.exists():
+                artifacts = store.load(mmap_mode='r')
+                arrays, matrices, indexes = artifacts['arrays'], artifacts['matrices'], artifacts['indexes']
+                metadata = artifacts['metadata']
+                
+                if 'tfidf_matrix' in matrices:
+                    self.feature_store = TrackFeatureStore(
+                        indexes['tracks'], arrays['track_numeric'], matrices['tfidf_matrix']
+                    )
+                    self.logger.info("Loaded track feature store")
+                
+                if 'item_factors' in arrays:
+                    self._set_collaborative_state(
+                        indexes['cf_users'], indexes['cf_tracks'], matrices['user_item_matrix'],
+                        arrays['user_factors'], arrays['item_factors']
+                    )
+                    self.cf_fitted_users = metadata.get('cf_fitted_users', len(self.cf_user_index))
+                    self.pending_interactions = metadata.get('pending_interactions', [])
+                    self.logger.info("Loaded collaborative factors")
+            
+            if os.path.exists(f"{self.model_dir}/ann_index.pkl") and self.feature_store.text is not None:
+                self.ann_index = joblib.load(f"{self.model_dir}/ann_index.pkl")
+                self.ann_index.attach(self.feature_store.text)
+                self.logger.info(f"Loaded {self.ann_index.name} ANN index")
                 
         except Exception as e:
             self.logger.warning(f"Could not load pre-trained models: {e}")
     
+    def save_models(self):
+        """Save trained models to disk, e.g. after training with ``save=False``"""
+        self._save_models()
+
     def _save_models(self):
         """Save trained models to disk"""
         try:
             if self.tfidf_vectorizer:
                 joblib.dump(self.tfidf_vectorizer, f"{self.model_dir}/tfidf_vectorizer.pkl")
             
+            if self.ann_index is not None:
+                joblib.dump(self.ann_index, f"{self.model_dir}/ann_index.pkl")
+            
             if self.nmf_model:
                 joblib.dump(self.nmf_model, f"{self.model_dir}/nmf_model.pkl")
+            
+            arrays, matrices, indexes = {}, {}, {}
+            if self.feature_store.text is not None:
+                arrays['track_numeric'] = self.feature_store.numeric
+                matrices['tfidf_matrix'] = self.feature_store.text
+                indexes['tracks'] = self.feature_store.index
+            
+            if self.item_factors is not None:
+                arrays['user_factors'] = self.user_factors
+                arrays['item_factors'] = self.item_factors
+                matrices['user_item_matrix'] = self.user_item_matrix
+                indexes['cf_users'] = self.cf_user_index
+                indexes['cf_tracks'] = self.cf_track_index
+            
+            if arrays or matrices:
+                ModelStore(f"{self.model_dir}/store").save(
+                    arrays=arrays, matrices=matrices, indexes=indexes,
+                    metadata={
+                        'cf_fitted_users': self.cf_fitted_users,
+                        'pending_interactions': self.pending_interactions
+                    }
+                )
                 
             self.logger.info("Models saved successfully")
         except Exception as e:
@@ -127,300 +274,714 @@ class MusicAI:
         if 'audio_features' in track_data:
             audio = track_data['audio_features']
             features.update({
-                'danceability': audio.get('danceability', 0.5),
-                'energy': audio.get('energy', 0.5),
-                'key': audio.get('key', 0) / 11.0,  # Normalize to 0-1
-                'loudness': (audio.get('loudness', -60) + 60) / 60.0,  # Normalize to 0-1
-                'mode': audio.get('mode', 1),
-                'speechiness': audio.get('speechiness', 0.0),
-                'acousticness': audio.get('acousticness', 0.0),
-                'instrumentalness': audio.get('instrumentalness', 0.0),
-                'liveness': audio.get('liveness', 0.0),
-                'valence': audio.get('valence', 0.5),
-                'tempo': audio.get('tempo', 120) / 200.0  # Normalize to 0-1
+                name: (audio.get(name, default) + offset) / scale
+                for name, default, offset, scale in AUDIO_FEATURES
             })
         
         return features
     
-    def build_user_profile(self, user_tracks: List[Dict], user_artists: List[Dict]) -> Dict[str, float]:
-        """Build user profile from listening history"""
-        if not user_tracks and not user_artists:
-            return {}
+    def extract_feature_matrix(self, tracks: List[Dict], dtype=np.float32) -> np.ndarray:
+        """Extract features for many tracks as a matrix (see FEATURE_COLUMNS)
         
-        # Extract features from user's tracks
-        track_features = []
-        for track in user_tracks:
-            features = self.extract_track_features(track)
-            track_features.append(features)
+        Builds whole columns at once instead of a feature dict per track; the
+        values match extract_track_features, with NaN for tracks without audio
+        features. float32 suits the stored catalog; pass float64 for exact
+        statistics.
+        """
+        matrix = np.full((len(tracks), len(FEATURE_COLUMNS)), np.nan, dtype=dtype)
+        if not tracks:
+            return matrix
         
-        # Extract genre information from artists
-        genres = []
-        for artist in user_artists:
-            genres.extend(artist.get('genres', []))
+        matrix[:, FEATURE_INDEX['popularity']] = np.array([t.get('popularity', 0) for t in tracks], dtype=np.float64) / 100.0
+        matrix[:, FEATURE_INDEX['duration_ms']] = np.array([t.get('duration_ms', 0) for t in tracks], dtype=np.float64) / 300000.0
+        matrix[:, FEATURE_INDEX['explicit']] = [1.0 if t.get('explicit', False) else 0.0 for t in tracks]
         
-        # Create user profile
+        # Track records carry audio features pre-packed; dicts are packed here
+        packed = [packed_audio(t) for t in tracks]
+        audio_rows = np.array([i for i, audio in enumerate(packed) if audio is not None], dtype=np.int64)
+        if len(audio_rows):
+            audio = np.vstack([packed[i] for i in audio_rows]).astype(np.float64)
+            for name, default, offset, scale in AUDIO_FEATURES:
+                values = audio[:, AUDIO_FEATURE_INDEX[name]]
+                values = np.where(np.isnan(values), default, values)
+                matrix[audio_rows, FEATURE_INDEX[name]] = (values + offset) / scale
+        
+        return matrix
+    
+    def _feature_stats(self, tracks: List[Dict]) -> Dict[str, np.ndarray]:
+        """Per-feature count, mean, std, min and max over tracks (see FEATURE_COLUMNS).
+        
+        Features are extracted once into a float64 matrix, so the statistics
+        match per-track extraction; tracks without a feature (NaN) are left
+        out of that feature's statistics.
+        """
+        matrix = self.extract_feature_matrix(tracks, dtype=np.float64)
+        present = ~np.isnan(matrix)
+        count = present.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(present, matrix, 0.0).sum(axis=0) / count
+            std = np.sqrt(np.where(present, (matrix - mean) ** 2, 0.0).sum(axis=0) / count)
+        return {
+            'first': present[0] if len(tracks) else np.zeros(len(FEATURE_COLUMNS), dtype=bool),
+            'count': count,
+            'mean': mean,
+            'std': std,
+            'min': np.where(present, matrix, np.inf).min(axis=0, initial=np.inf),
+            'max': np.where(present, matrix, -np.inf).max(axis=0, initial=-np.inf)
+        }
+    
+    def _profile_from(self, stats: Dict[str, np.ndarray], genres: GenreCounts) -> Dict[str, float]:
+        """User profile from precomputed feature statistics and genre counts"""
         profile = {}
         
-        if track_features:
-            # Average track features
-            feature_names = track_features[0].keys()
-            for feature in feature_names:
-                values = [tf[feature] for tf in track_features if feature in tf]
-                if values:
-                    profile[f'avg_{feature}'] = np.mean(values)
-                    profile[f'std_{feature}'] = np.std(values)
+        # Average track features (the features the first track has)
+        for col, feature in enumerate(FEATURE_COLUMNS):
+            if stats['first'][col] and stats['count'][col]:
+                profile[f'avg_{feature}'] = stats['mean'][col]
+                profile[f'std_{feature}'] = stats['std'][col]
         
         # Genre preferences
-        if genres:
-            genre_counts = {}
-            for genre in genres:
-                genre_counts[genre] = genre_counts.get(genre, 0) + 1
-            
+        if genres.total:
             # Top genres
-            top_genres = sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-            for i, (genre, count) in enumerate(top_genres):
-                profile[f'top_genre_{i+1}'] = count / len(genres)
+            for i, (genre, count) in enumerate(genres.top(5)):
+                profile[f'top_genre_{i+1}'] = count / genres.total
         
         return profile
     
-    def train_content_based_model(self, tracks_data: List[Dict]):
+    def build_user_profile(self, user_tracks: List[Dict], user_artists: List[Dict]) -> Dict[str, float]:
+        """Build user profile from listening history"""
+        if not user_tracks and not user_artists:
+            return {}
+        
+        return self._profile_from(self._feature_stats(user_tracks), GenreCounts.of(user_artists))
+    
+    def _encode_tracks(self, tracks: List[Dict]) -> sparse.csr_matrix:
+        """Encode track documents with the fitted vectorizer"""
+        if accepts_terms(self.tfidf_vectorizer):
+            return self.tfidf_vectorizer.transform(self.documents.documents(tracks))
+        # Vectorizers saved before document caching analyze the raw text themselves
+        return self.tfidf_vectorizer.transform([self.documents.text(track) for track in tracks])
+    
+    def _encode_queries(self, seed_track_groups: List[List[Dict]]) -> sparse.csr_matrix:
+        """Encode one seed query per group of seed tracks"""
+        if accepts_terms(self.tfidf_vectorizer):
+            return self.tfidf_vectorizer.transform([self.documents.query_terms(seeds) for seeds in seed_track_groups])
+        return self.tfidf_vectorizer.transform([' '.join(self.documents.query_tokens(seeds))
+                                                for seeds in seed_track_groups])
+    
+    def train_content_based_model(self, tracks_data: List[Dict], save: bool = True, n_jobs: int = 1):
         """Train content-based recommendation model"""
         self.logger.info("Training content-based model...")
         
         # Prepare text data for TF-IDF
-        text_data = []
-        for track in tracks_data:
-            # Combine track name, artist names, and genres
-            track_text = f"{track.get('name', '')} "
-            
-            artists = track.get('artists', [])
-            for artist in artists:
-                track_text += f"{artist.get('name', '')} "
-            
-            # Add album name
-            album = track.get('album', {})
-            track_text += f"{album.get('name', '')} "
-            
-            # Add genres from artists
-            for artist in artists:
-                if 'genres' in artist:
-                    track_text += f"{' '.join(artist['genres'])} "
-            
-            text_data.append(track_text.strip())
+        # Track name, artist names, album name and genres as cached, analyzed terms
+        documents = self.documents.documents(tracks_data, n_jobs=n_jobs)
         
-        # Train TF-IDF vectorizer
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words='english',
-            ngram_range=(1, 2)
-        )
+        # Train TF-IDF vectorizer (vocabulary-bound, or stateless hashing + IDF table)
+        if self.text_featurizer == 'hashing':
+            self.tfidf_vectorizer = HashingTfidfVectorizer(analyzer=self.documents.analyzer, n_jobs=n_jobs)
+        else:
+            self.tfidf_vectorizer = TfidfVectorizer(
+                max_features=1000,
+                analyzer=self.documents.analyzer
+            )
         
-        tfidf_matrix = self.tfidf_vectorizer.fit_transform(text_data)
+        tfidf_matrix = self.tfidf_vectorizer.fit_transform(documents)
         
-        # Store track features
+        # Store track features column-wise; the latest entry wins for repeated ids
+        latest_rows = {}
         for i, track in enumerate(tracks_data):
-            self.track_features[track['id']] = {
-                'tfidf_vector': tfidf_matrix[i],
-                'features': self.extract_track_features(track)
-            }
+            latest_rows[track['id']] = i
+        rows = list(latest_rows.values())
+        
+        self.feature_store = TrackFeatureStore(
+            IdIndex(latest_rows.keys()),
+            self.extract_feature_matrix([tracks_data[i] for i in rows]),
+            sparse.csr_matrix(tfidf_matrix[rows])
+        )
+        
+        # Build the approximate nearest-neighbour index if one is configured
+        if self.ann_index_type:
+            self.ann_index = create_ann_index(self.ann_index_type, **self.ann_params)
+            self.ann_index.build(self.feature_store.text)
+            self.logger.info(f"Built {self.ann_index_type} ANN index over {len(self.feature_store)} tracks")
         
         self.logger.info(f"Content-based model trained on {len(tracks_data)} tracks")
-        self._save_models()
+        if save:
+            self._save_models()
     
-    def train_collaborative_model(self, user_tracks_data: List[Tuple[str, List[Dict]]]):
+    def train_collaborative_model(self, user_tracks_data: List[Tuple[str, List[Dict]]], save: bool = True):
         """Train collaborative filtering model using NMF"""
         self.logger.info("Training collaborative filtering model...")
         
-        # Create user-item matrix
-        user_ids = []
-        track_ids = set()
+        # Stream interactions into a sparse binary user-item matrix
+        self.train_collaborative_from_interactions(InteractionMatrixBuilder().add_users(user_tracks_data), save=save)
+    
+    def train_collaborative_from_interactions(self, builder: InteractionMatrixBuilder, save: bool = True):
+        """Fit NMF factors on interactions collected by an InteractionMatrixBuilder"""
+        user_item_matrix = builder.build()
+        user_ids, track_ids = builder.user_ids, builder.track_ids
+        
+        # Train NMF model directly on the sparse matrix and keep W/H for serving
+        self.nmf_model = NMF(n_components=min(20, min(user_item_matrix.shape)), random_state=42)
+        user_factors = self.nmf_model.fit_transform(user_item_matrix)
+        self._set_collaborative_state(IdIndex(user_ids), IdIndex(track_ids), user_item_matrix,
+                                      user_factors, self.nmf_model.components_)
+        self.cf_fitted_users = len(user_ids)
+        self.pending_interactions = []
+        
+        self.logger.info(f"Collaborative model trained on {len(user_ids)} users and {len(track_ids)} tracks")
+        if save:
+            self._save_models()
+    
+    def _set_collaborative_state(self, user_index: IdIndex, track_index: IdIndex, user_item_matrix,
+                                 user_factors, item_factors):
+        """Install factor matrices and the id maps they are indexed by"""
+        self.cf_user_index = user_index
+        self.cf_track_index = track_index
+        self.user_item_matrix = user_item_matrix
+        self.user_factors = np.asarray(user_factors, dtype=np.float32)
+        self.item_factors = np.asarray(item_factors, dtype=np.float32)
+    
+    def fold_in_user(self, track_cols: np.ndarray) -> np.ndarray:
+        """Project an unseen user's interactions onto the learned item factors"""
+        return self.fold_in_users([track_cols])[0]
+    
+    def fold_in_users(self, track_col_lists: List[np.ndarray]) -> np.ndarray:
+        """Project several unseen users onto the item factors in one transform"""
+        lengths = [len(cols) for cols in track_col_lists]
+        interactions = sparse.csr_matrix(
+            (np.ones(sum(lengths), dtype=self.nmf_model.components_.dtype),
+             np.concatenate(track_col_lists).astype(np.int64) if lengths else np.empty(0, dtype=np.int64),
+             np.concatenate(([0], np.cumsum(lengths)))),
+            shape=(len(track_col_lists), len(self.cf_track_index))
+        )
+        return self.nmf_model.transform(interactions)
+    
+    def add_tracks(self, tracks_data: List[Dict]) -> int:
+        """Append new tracks to the content index using the frozen vectorizer"""
+        store = self.feature_store
+        if not self.tfidf_vectorizer or store.text is None:
+            self.train_content_based_model(tracks_data)
+            return len(self.feature_store)
+        
+        known, new_tracks = {}, {}
+        for track in tracks_data:
+            if track['id'] in store:
+                known[track['id']] = track
+            else:
+                new_tracks[track['id']] = track
         
-        # Collect all unique track IDs
+        # Refresh numeric features of tracks already in the store
+        if known:
+            store.update_numeric(store.rows(known.keys()), self.extract_feature_matrix(list(known.values())))
+        
+        if not new_tracks:
+            return 0
+        
+        vectors = self._encode_tracks(list(new_tracks.values()))
+        store.append(list(new_tracks.keys()), self.extract_feature_matrix(list(new_tracks.values())), vectors)
+        
+        # New rows are scanned exactly by the ANN index until the next compaction
+        if self.ann_index is not None:
+            self.ann_index.attach(store.text)
+        
+        return len(new_tracks)
+    
+    def add_users(self, user_tracks_data: List[Tuple[str, List[Dict]]]) -> int:
+        """Fold new (or updated) users into the NMF factors without refitting"""
+        if self.item_factors is None or not self.nmf_model:
+            self.train_collaborative_model(user_tracks_data)
+            return len(self.cf_user_index)
+        
+        rows, cols, user_ids = [], [], []
         for user_id, tracks in user_tracks_data:
-            user_ids.append(user_id)
+            # Keep what an existing user already played alongside the new tracks
+            known = set()
+            if user_id in self.cf_user_index:
+                row = self.cf_user_index[user_id]
+                indptr = self.user_item_matrix.indptr
+                known.update(self.user_item_matrix.indices[indptr[row]:indptr[row + 1]].tolist())
+            
+            unknown = []
             for track in tracks:
-                track_ids.add(track['id'])
+                col = self.cf_track_index.get(track['id'])
+                if col is None:
+                    unknown.append(track['id'])
+                else:
+                    known.add(col)
+            
+            # Tracks the factors have never seen wait for the next compaction
+            if unknown:
+                self.pending_interactions.append((user_id, unknown))
+            
+            rows.extend([len(user_ids)] * len(known))
+            cols.extend(known)
+            user_ids.append(user_id)
         
-        track_ids = list(track_ids)
-        user_item_matrix = np.zeros((len(user_ids), len(track_ids)))
+        if not user_ids:
+            return 0
         
-        # Fill the matrix
-        for i, (user_id, tracks) in enumerate(user_tracks_data):
-            for track in tracks:
-                if track['id'] in track_ids:
-                    j = track_ids.index(track['id'])
-                    user_item_matrix[i, j] = 1  # Binary interaction
+        new_matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=self.user_item_matrix.dtype), (rows, cols)),
+            shape=(len(user_ids), len(self.cf_track_index))
+        )
+        new_factors = self.nmf_model.transform(new_matrix)
         
-        # Train NMF model
-        self.nmf_model = NMF(n_components=min(20, min(user_item_matrix.shape)), random_state=42)
-        self.nmf_model.fit(user_item_matrix)
+        # Updated users point at their newest row; stale rows drop out at compaction
+        for user_id in user_ids:
+            self.cf_user_index.append(user_id)
+        self._set_collaborative_state(
+            self.cf_user_index, self.cf_track_index,
+            sparse.vstack([self.user_item_matrix, new_matrix], format='csr'),
+            np.vstack([self.user_factors, new_factors]), self.item_factors
+        )
+        return len(user_ids)
+    
+    def needs_compaction(self) -> bool:
+        """Whether pending incremental updates exceed compact_ratio of the model"""
+        if self.ann_index is not None and self.ann_index.n_pending > self.compact_ratio * max(self.ann_index.n_indexed, 1):
+            return True
+        pending_users = len(self.cf_user_index) - self.cf_fitted_users + len(self.pending_interactions)
+        return pending_users > self.compact_ratio * max(self.cf_fitted_users, 1)
+    
+    def compact(self):
+        """Fold pending incremental updates back into fully trained structures"""
+        self.logger.info("Compacting incremental model updates...")
         
-        self.logger.info(f"Collaborative model trained on {len(user_ids)} users and {len(track_ids)} tracks")
-        self._save_models()
+        if self.ann_index is not None and self.ann_index.n_pending:
+            self.ann_index.build(self.feature_store.text)
+        
+        if self.item_factors is not None and (len(self.cf_user_index) > self.cf_fitted_users or self.pending_interactions):
+            interactions = {}
+            indptr = self.user_item_matrix.indptr
+            for user_id, row in self.cf_user_index.items():
+                cols = self.user_item_matrix.indices[indptr[row]:indptr[row + 1]]
+                interactions[user_id] = [{'id': self.cf_track_index.id_at(col)} for col in cols]
+            for user_id, track_ids in self.pending_interactions:
+                interactions.setdefault(user_id, []).extend({'id': track_id} for track_id in track_ids)
+            self.train_collaborative_model(list(interactions.items()))
+        else:
+            self._save_models()
+    
+    def update(self, tracks_data: List[Dict], user_tracks_data: List[Tuple[str, List[Dict]]],
+               save: bool = True) -> Dict:
+        """Apply an incremental update, compacting when enough changes pile up"""
+        added_tracks = self.add_tracks(tracks_data) if tracks_data else 0
+        added_users = self.add_users(user_tracks_data) if user_tracks_data else 0
+        
+        compacted = self.needs_compaction()
+        if compacted:
+            self.compact()
+        elif save:
+            self._save_models()
+        
+        return {'tracks_added': added_tracks, 'users_updated': added_users, 'compacted': compacted}
     
     def get_content_based_recommendations(self, seed_tracks: List[Dict], n_recommendations: int = 20) -> List[Dict]:
         """Get content-based recommendations"""
-        if not self.tfidf_vectorizer or not seed_tracks:
-            return []
+        rows, scores = self._content_candidates(seed_tracks, n_recommendations)
+        return self._store_recommendations(rows, scores)
+    
+    def _content_candidates(self, seed_tracks: List[Dict], n_recommendations: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top feature store rows and cosine scores for a set of seed tracks"""
+        if not self.tfidf_vectorizer or not seed_tracks or n_recommendations <= 0:
+            return _no_candidates()
         
         # Create seed track vector
-        seed_text = ""
-        for track in seed_tracks:
-            seed_text += f"{track.get('name', '')} "
-            for artist in track.get('artists', []):
-                seed_text += f"{artist.get('name', '')} "
+        seed_vector = self._encode_queries([seed_tracks])
         
-        seed_vector = self.tfidf_vectorizer.transform([seed_text])
+        store = self.feature_store
+        seed_rows = store.rows(track.get('id') for track in seed_tracks)
         
-        # Calculate similarities
-        similarities = []
-        for track_id, track_data in self.track_features.items():
-            similarity = cosine_similarity(seed_vector, track_data['tfidf_vector'])[0][0]
-            similarities.append((track_id, similarity))
+        if self.ann_index is not None:
+            # Over-fetch so seed tracks can be dropped from the candidates
+            rows, scores = self.ann_index.search(seed_vector, n_recommendations + len(seed_rows))
+            keep = ~np.isin(rows, seed_rows)
+            return rows[keep][:n_recommendations], scores[keep][:n_recommendations]
         
-        # Sort by similarity and return top recommendations
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        
-        # Filter out seed tracks
-        seed_ids = {track['id'] for track in seed_tracks}
-        recommendations = []
-        for track_id, similarity in similarities:
-            if track_id not in seed_ids and len(recommendations) < n_recommendations:
-                recommendations.append({
-                    'track_id': track_id,
-                    'similarity_score': similarity,
-                    'features': self.track_features[track_id]['features']
-                })
-        
-        return recommendations
+        # Score the whole catalog with one sparse mat-vec and mask out seeds
+        similarities = sparse_dot_scores(store.text, seed_vector)
+        top_rows = top_k_indices(similarities, n_recommendations, exclude=seed_rows)
+        return top_rows, similarities[top_rows]
     
-    def get_mood_based_recommendations(self, mood: str, genre: str, available_tracks: List[Dict]) -> List[Dict]:
-        """Get mood and genre-based recommendations"""
-        if not available_tracks:
-            return []
-        
-        # Get mood and genre weights
-        mood_weights = self.mood_weights.get(mood, {})
-        genre_weights = self.genre_weights.get(genre, {})
+    def _store_recommendations(self, rows: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        """Format feature store rows and their scores as recommendation dicts"""
+        store = self.feature_store
+        return [{
+            'track_id': store.track_id(row),
+            'similarity_score': float(score),
+            'features': store.features_at(row)
+        } for row, score in zip(rows, scores)]
+    
+    def _mood_weight_vector(self, mood: str, genre: str) -> np.ndarray:
+        """Combined mood + genre weight vector (zeros for unknown names)"""
+        zeros = np.zeros(len(FEATURE_COLUMNS), dtype=np.float32)
+        return self.mood_vectors.get(mood, zeros) + self.genre_vectors.get(genre, zeros)
+    
+    def _mood_scores(self, mood: str, genre: str, feature_matrix: np.ndarray) -> np.ndarray:
+        """Score a candidate feature matrix with one matrix-vector product
         
-        # Calculate scores for each track
-        track_scores = []
-        for track in available_tracks:
-            features = self.extract_track_features(track)
-            score = 0.0
-            
-            # Apply mood weights
-            for feature, weight in mood_weights.items():
-                if feature in features:
-                    score += weight * features[feature]
-            
-            # Apply genre weights
-            for feature, weight in genre_weights.items():
-                if feature in features:
-                    score += weight * features[feature]
-            
-            track_scores.append((track, score))
+        Missing features must already be 0 in ``feature_matrix``, so they
+        contribute nothing, as in the per-feature weighting.
+        """
+        return feature_matrix @ self._mood_weight_vector(mood, genre)
+    
+    def get_mood_based_recommendations(self, mood: str, genre: str, available_tracks: Optional[List[Dict]] = None,
+                                       n_recommendations: int = 20) -> List[Dict]:
+        """Get mood and genre-based recommendations
         
-        # Sort by score and return top recommendations
-        track_scores.sort(key=lambda x: x[1], reverse=True)
+        Scores ``available_tracks`` when given, otherwise every track in the
+        feature store.
+        """
+        if available_tracks is not None:
+            if not available_tracks:
+                return []
+            features = np.nan_to_num(self.extract_feature_matrix(available_tracks), copy=False)
+            scores = self._mood_scores(mood, genre, features)
+            return [available_tracks[i] for i in top_k_indices(scores, n_recommendations)]
         
-        return [track for track, score in track_scores[:20]]
+        rows, _ = self._mood_candidates(mood, genre, n_recommendations)
+        store = self.feature_store
+        return [{'id': store.track_id(row), **store.features_at(row)} for row in rows]
+    
+    def _mood_candidates(self, mood: str, genre: str, n_recommendations: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top feature store rows and mood/genre scores"""
+        if not len(self.feature_store):
+            return _no_candidates()
+        scores = self._mood_scores(mood, genre, self.feature_store.numeric_filled())
+        top_rows = top_k_indices(scores, n_recommendations)
+        return top_rows, scores[top_rows]
     
     def get_hybrid_recommendations(self, user_id: str, seed_tracks: List[Dict], 
                                  mood: str = None, genre: str = None, 
                                  n_recommendations: int = 20) -> List[Dict]:
-        """Get hybrid recommendations combining multiple approaches"""
-        recommendations = []
+        """Get hybrid recommendations combining multiple approaches
+        
+        Each source proposes up to ``n_recommendations`` candidates, which are
+        fused into a single ranking (see ``fusion_method``/``fusion_weights``).
+        """
+        tasks = {}
         
         # 1. Content-based recommendations
         if seed_tracks:
-            content_recs = self.get_content_based_recommendations(seed_tracks, n_recommendations//2)
-            recommendations.extend(content_recs)
+            tasks['content'] = (self._content_candidates, (seed_tracks, n_recommendations))
         
         # 2. Mood/genre-based recommendations
         if mood and genre:
-            # Get available tracks (you would need to implement this based on your data)
-            available_tracks = self._get_available_tracks()
-            mood_recs = self.get_mood_based_recommendations(mood, genre, available_tracks)
-            recommendations.extend(mood_recs)
-        
-        # 3. Collaborative filtering (if user has history)
-        if user_id in self.user_profiles:
-            collab_recs = self._get_collaborative_recommendations(user_id, n_recommendations//4)
-            recommendations.extend(collab_recs)
-        
-        # Remove duplicates and sort by score
-        unique_recs = {}
-        for rec in recommendations:
-            track_id = rec.get('track_id', rec.get('id'))
-            if track_id not in unique_recs:
-                unique_recs[track_id] = rec
-        
-        # Sort by similarity score or other metric
-        sorted_recs = sorted(unique_recs.values(), 
-                           key=lambda x: x.get('similarity_score', 0), 
-                           reverse=True)
-        
-        return sorted_recs[:n_recommendations]
-    
-    def _get_available_tracks(self) -> List[Dict]:
-        """Get available tracks for recommendations (placeholder)"""
-        # This would be implemented based on your data source
-        # For now, return tracks from track_features
-        return [{'id': track_id, **track_data['features']} 
-                for track_id, track_data in self.track_features.items()]
-    
-    def _get_collaborative_recommendations(self, user_id: str, n_recommendations: int) -> List[Dict]:
-        """Get collaborative filtering recommendations"""
-        # This would use the NMF model to predict user preferences
-        # Placeholder implementation
-        return []
+            tasks['mood'] = (self._mood_candidates, (mood, genre, n_recommendations))
+        
+        # 3. Collaborative filtering (known users, or cold users folded in from seeds)
+        if self.item_factors is not None:
+            tasks['collaborative'] = (self._collaborative_candidates, (user_id, n_recommendations, seed_tracks))
+        
+        return self._fuse_recommendations(self._gather_candidates(tasks), n_recommendations)
+    
+    def _timed_source(self, source: str, fn: Callable, args: Tuple):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.latency.record(source, time.perf_counter() - start)
+    
+    def _missed_deadline(self, source: str, budget: float):
+        with self._stats_lock:
+            self.deadline_misses[source] += 1
+        self.logger.warning(f"{source} candidates missed their {budget}ms budget, serving partial results")
+    
+    def _gather_candidates(self, tasks: Dict[str, Tuple[Callable, Tuple]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Run candidate sources concurrently and keep those that finish in budget
+        
+        Each request gets its own pool with a thread per source (up to
+        ``max_workers``), so a source starts right away and its deadline runs
+        from then; a source that misses it keeps only this request's thread
+        busy. A source that misses its deadline (or fails) is left out, so
+        the caller fuses whatever arrived in time. With one worker, one
+        source or one CPU the sources run inline, one after another, and a
+        source that ran past its budget is still left out.
+        """
+        workers = min(self.max_workers, len(tasks))
+        if workers <= 1 or _CPU_COUNT <= 1:
+            return self._run_candidates_inline(tasks)
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='candidate-source')
+        try:
+            start = time.perf_counter()
+            futures = {source: executor.submit(self._timed_source, source, fn, args)
+                       for source, (fn, args) in tasks.items()}
+            
+            candidates = {}
+            for source, future in futures.items():
+                budget = self.source_budgets_ms.get(source)
+                timeout = None if budget is None else max(0.0, start + budget / 1000 - time.perf_counter())
+                try:
+                    candidates[source] = future.result(timeout=timeout)
+                except FuturesTimeout:
+                    self._missed_deadline(source, budget)
+                except Exception as e:
+                    self.logger.error(f"{source} candidate generation failed: {e}")
+            return candidates
+        finally:
+            # Late sources finish on their own threads, which then exit
+            executor.shutdown(wait=False)
+    
+    def _run_candidates_inline(self, tasks: Dict[str, Tuple[Callable, Tuple]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        candidates = {}
+        for source, (fn, args) in tasks.items():
+            budget = self.source_budgets_ms.get(source)
+            start = time.perf_counter()
+            try:
+                result = self._timed_source(source, fn, args)
+            except Exception as e:
+                self.logger.error(f"{source} candidate generation failed: {e}")
+                continue
+            if budget is not None and (time.perf_counter() - start) * 1000 > budget:
+                self._missed_deadline(source, budget)
+                continue
+            candidates[source] = result
+        return candidates
+    
+    def get_latency_stats(self) -> Dict:
+        """p50/p99 latency per recommendation source plus deadline misses"""
+        with self._stats_lock:
+            deadline_misses = dict(self.deadline_misses)
+        return {
+            'latency': self.latency.summary(),
+            'deadline_misses': deadline_misses
+        }
+    
+    def _cf_store_rows(self) -> np.ndarray:
+        """Feature store row of every interaction matrix column (-1 if the store lacks it)
+        
+        Rebuilt when either index changes; both only grow, so their lengths
+        identify a version.
+        """
+        cf_index, store_index = self.cf_track_index, self.feature_store.index
+        key = (id(cf_index), len(cf_index), id(store_index), len(store_index))
+        cached = self._cf_rows_cache
+        if cached is None or cached[0] != key:
+            cached = (key, store_index.rows_of(cf_index.ids_at(np.arange(len(cf_index)))))
+            self._cf_rows_cache = cached
+        return cached[1]
+    
+    def _fuse_recommendations(self, candidates: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                              n_recommendations: int) -> List[Dict]:
+        """Fuse per-source (positions, scores) candidates and format the top results
+        
+        Sources are fused on feature store rows; collaborative columns the
+        store does not have get negative keys (-1 - column). Only the kept
+        results are mapped back to track ids.
+        """
+        start = time.perf_counter()
+        ranked = dict(candidates)
+        if 'collaborative' in candidates:
+            cols, scores = candidates['collaborative']
+            rows = self._cf_store_rows()[cols]
+            ranked['collaborative'] = (np.where(rows >= 0, rows, -1 - cols), scores)
+        
+        keys, fused = fuse_rankings(ranked, self.fusion_weights, self.fusion_method, self.rrf_k,
+                                    limit=n_recommendations)
+        
+        store = self.feature_store
+        recommendations = []
+        for key, score in zip(keys.tolist(), fused.tolist()):
+            if key >= 0:
+                track_id, features = store.track_id(key), store.features_at(key)
+            else:
+                track_id, features = self.cf_track_index.id_at(-1 - key), {}
+            recommendations.append({'track_id': str(track_id), 'similarity_score': score, 'features': features})
+        
+        self.latency.record('fusion', time.perf_counter() - start)
+        return recommendations
+    
+    def get_batch_recommendations(self, user_requests: List[Dict], n_recommendations: int = 20,
+                                  batch_size: int = 32) -> Dict[str, List[Dict]]:
+        """Hybrid recommendations for many users at once
+        
+        Each request is a dict with ``user_id`` and optional ``seed_tracks``,
+        ``mood`` and ``genre``, as for get_hybrid_recommendations. Users are
+        processed in blocks of ``batch_size``: every source scores the whole
+        block against the catalog with one matrix product, and top-k is taken
+        row-wise. Returns {user_id: recommendations}.
+        """
+        results = {}
+        for start in range(0, len(user_requests), batch_size):
+            block = user_requests[start:start + batch_size]
+            sources = {
+                'content': self._batch_content_candidates(block, n_recommendations),
+                'mood': self._batch_mood_candidates(block, n_recommendations),
+                'collaborative': self._batch_collaborative_candidates(block, n_recommendations)
+            }
+            for i, request in enumerate(block):
+                candidates = {source: per_user[i] for source, per_user in sources.items()
+                              if per_user[i] is not None}
+                results[request['user_id']] = self._fuse_recommendations(candidates, n_recommendations)
+        return results
+    
+    def _batch_content_candidates(self, block: List[Dict], n_recommendations: int) -> List[Optional[Tuple]]:
+        """Content-based candidates for a block of users (None where not requested)"""
+        results = [None] * len(block)
+        store = self.feature_store
+        positions = [i for i, request in enumerate(block) if request.get('seed_tracks')]
+        if not positions:
+            return results
+        if not self.tfidf_vectorizer or n_recommendations <= 0:
+            for i in positions:
+                results[i] = _no_candidates()
+            return results
+        
+        if self.ann_index is not None:
+            # ANN indexes answer one query at a time
+            for i in positions:
+                results[i] = self._content_candidates(block[i]['seed_tracks'], n_recommendations)
+            return results
+        
+        queries = self._encode_queries([block[i]['seed_tracks'] for i in positions])
+        scores = sparse_batch_scores(store.text, queries)
+        for row, i in enumerate(positions):
+            scores[row, store.rows(track.get('id') for track in block[i]['seed_tracks'])] = -np.inf
+        
+        for row, (i, top_rows) in enumerate(zip(positions, top_k_indices_batch(scores, n_recommendations))):
+            results[i] = (top_rows, scores[row, top_rows])
+        return results
+    
+    def _batch_mood_candidates(self, block: List[Dict], n_recommendations: int) -> List[Optional[Tuple]]:
+        """Mood/genre candidates for a block of users (None where not requested)"""
+        results = [None] * len(block)
+        store = self.feature_store
+        positions = [i for i, request in enumerate(block) if request.get('mood') and request.get('genre')]
+        if not positions:
+            return results
+        if not len(store):
+            for i in positions:
+                results[i] = _no_candidates()
+            return results
+        
+        weights = np.stack([self._mood_weight_vector(block[i]['mood'], block[i]['genre']) for i in positions])
+        scores = weights @ store.numeric_filled().T  # one (users x features) @ (features x tracks) product
+        for row, (i, top_rows) in enumerate(zip(positions, top_k_indices_batch(scores, n_recommendations))):
+            results[i] = (top_rows, scores[row, top_rows])
+        return results
+    
+    def _batch_collaborative_candidates(self, block: List[Dict], n_recommendations: int) -> List[Optional[Tuple]]:
+        """Collaborative candidates for a block of users (None when no model is trained)"""
+        if self.item_factors is None:
+            return [None] * len(block)
+        results = [_no_candidates() for _ in block]
+        if n_recommendations <= 0:
+            return results
+        
+        start = time.perf_counter()
+        positions, vectors, seen_lists, cold = [], [], [], []
+        for i, request in enumerate(block):
+            row = self.cf_user_index.get(request['user_id'])
+            seeds = self._seed_columns(request.get('seed_tracks'))
+            if row is not None:
+                indptr = self.user_item_matrix.indptr
+                positions.append(i)
+                vectors.append(self.user_factors[row])
+                seen_lists.append(np.union1d(self.user_item_matrix.indices[indptr[row]:indptr[row + 1]], seeds))
+                continue
+            seen = seeds
+            if self.nmf_model and len(seen):
+                cold.append((i, seen))
+        
+        if cold:
+            # Fold all cold users into the latent space in one transform
+            cold_vectors = self.fold_in_users([seen for _, seen in cold])
+            for (i, seen), vector in zip(cold, cold_vectors):
+                positions.append(i)
+                vectors.append(vector)
+                seen_lists.append(seen)
+        
+        if not positions:
+            return results
+        
+        scores = np.stack(vectors) @ self.item_factors
+        for row, seen in enumerate(seen_lists):
+            scores[row, seen] = -np.inf
+        
+        for row, (i, top_cols) in enumerate(zip(positions, top_k_indices_batch(scores, n_recommendations))):
+            results[i] = (top_cols, scores[row, top_cols])
+        
+        self.latency.record('collaborative_batch', time.perf_counter() - start)
+        return results
+    
+    def _get_collaborative_recommendations(self, user_id: str, n_recommendations: int,
+                                           seed_tracks: Optional[List[Dict]] = None) -> List[Dict]:
+        """Get collaborative filtering recommendations from the NMF factors"""
+        cols, scores = self._timed_source('collaborative', self._collaborative_candidates,
+                                          (user_id, n_recommendations, seed_tracks))
+        store = self.feature_store
+        return [{
+            'track_id': str(track_id),
+            'similarity_score': float(score),
+            'features': store.features(track_id)
+        } for track_id, score in zip(self.cf_track_index.ids_at(cols), scores)]
+    
+    def _seed_columns(self, seed_tracks: Optional[List[Dict]]) -> np.ndarray:
+        """Interaction matrix columns of the seed tracks the model knows"""
+        return np.array([self.cf_track_index[track['id']] for track in seed_tracks or []
+                         if track.get('id') in self.cf_track_index], dtype=np.int64)
+    
+    def _collaborative_candidates(self, user_id: str, n_recommendations: int,
+                                  seed_tracks: Optional[List[Dict]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top interaction matrix columns and NMF scores for one user"""
+        if self.item_factors is None or n_recommendations <= 0:
+            return _no_candidates()
+        
+        row = self.cf_user_index.get(user_id)
+        seeds = self._seed_columns(seed_tracks)
+        if row is not None:
+            # Known user: use the trained factors and mask what they already played, and the seeds
+            user_vector = self.user_factors[row]
+            indptr = self.user_item_matrix.indptr
+            seen = np.union1d(self.user_item_matrix.indices[indptr[row]:indptr[row + 1]], seeds)
+        else:
+            # Cold user: fold the seed tracks into the latent space
+            seen = seeds
+            if not self.nmf_model or not len(seen):
+                return _no_candidates()
+            user_vector = self.fold_in_user(seen)
+        
+        scores = user_vector @ self.item_factors
+        top_cols = top_k_indices(scores, n_recommendations, exclude=seen)
+        return top_cols, scores[top_cols]
     
     def analyze_user_taste(self, user_tracks: List[Dict], user_artists: List[Dict]) -> Dict:
         """Analyze user's music taste using the AI model"""
         if not user_tracks and not user_artists:
             return {'error': 'No user data available'}
         
-        # Build user profile
-        profile = self.build_user_profile(user_tracks, user_artists)
+        # Features are extracted and genres counted once, for both the profile and the analysis
+        stats = self._feature_stats(user_tracks)
+        genres = GenreCounts.of(user_artists)
         
         # Analyze patterns
         analysis = {
             'total_tracks': len(user_tracks),
             'total_artists': len(user_artists),
-            'profile': profile
+            'profile': self._profile_from(stats, genres)
         }
         
         # Genre analysis
-        genres = []
-        for artist in user_artists:
-            genres.extend(artist.get('genres', []))
-        
-        if genres:
-            genre_counts = {}
-            for genre in genres:
-                genre_counts[genre] = genre_counts.get(genre, 0) + 1
-            
-            top_genres = sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-            analysis['top_genres'] = top_genres
-            analysis['genre_diversity'] = len(set(genres))
+        if genres.total:
+            analysis['top_genres'] = genres.top(5)
+            analysis['genre_diversity'] = genres.distinct
         
         # Feature analysis
         if user_tracks:
-            track_features = [self.extract_track_features(track) for track in user_tracks]
-            
-            # Calculate average features
             feature_analysis = {}
             feature_names = ['energy', 'danceability', 'valence', 'acousticness', 'instrumentalness']
             
             for feature in feature_names:
-                values = [tf[feature] for tf in track_features if feature in tf]
-                if values:
+                col = FEATURE_INDEX[feature]
+                if stats['count'][col]:
                     feature_analysis[feature] = {
-                        'mean': np.mean(values),
-                        'std': np.std(values),
-                        'min': np.min(values),
-                        'max': np.max(values)
+                        'mean': stats['mean'][col],
+                        'std': stats['std'][col],
+                        'min': stats['min'][col],
+                        'max': stats['max'][col]
                     }
             
             analysis['feature_analysis'] = feature_analysis
@@ -0,0 +1,253 @@
+"""
+Approximate nearest-neighbour indexes for content-based recommendations
+"""
+
+import time
+import numpy as np
+from scipy import sparse
+from typing import Dict, Tuple, Optional
+
+from .similarity import top_k_indices
+
+_ASSIGN_CHUNK = 65536
+
+
+def _row_scores(matrix, query) -> np.ndarray:
+    """Dot product of each matrix row with a single query row"""
+    if sparse.issparse(query):
+        query = query.toarray()
+    query = np.asarray(query, dtype=np.float64).ravel()
+    return np.asarray(matrix @ query).ravel()
+
+
+def _as_dense(query) -> np.ndarray:
+    if sparse.issparse(query):
+        return query.toarray().ravel()
+    return np.asarray(query, dtype=np.float64).ravel()
+
+
+class ANNIndex:
+    """Base class for approximate nearest-neighbour indexes over row vectors.
+
+    Indexes only keep their own search structure when pickled; the vectors
+    themselves are attached with ``attach`` so they are not stored twice.
+    Rows appended after ``build`` are scanned exactly until the next rebuild.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.matrix = None
+        self.n_indexed = 0
+
+    def build(self, matrix):
+        """Build the index over the rows of ``matrix``"""
+        raise NotImplementedError
+
+    def candidates(self, query) -> np.ndarray:
+        """Return candidate row ids for a query"""
+        raise NotImplementedError
+
+    def attach(self, matrix):
+        """Attach the indexed vectors after loading from disk or appending rows"""
+        self.matrix = matrix
+
+    @property
+    def n_pending(self) -> int:
+        """Rows attached since the last build that are not in the index yet"""
+        return len(self) - self.n_indexed
+
+    def search(self, query, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return up to k (rows, scores) re-ranked exactly, best first"""
+        rows = self.candidates(query)
+        if self.n_pending > 0:
+            rows = np.concatenate((rows, np.arange(self.n_indexed, len(self), dtype=rows.dtype)))
+        if len(rows) == 0:
+            return rows, np.empty(0, dtype=np.float64)
+        scores = _row_scores(self.matrix[rows], query)
+        top = top_k_indices(scores, k)
+        return rows[top], scores[top]
+
+    def __len__(self):
+        return 0 if self.matrix is None else self.matrix.shape[0]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['matrix'] = None
+        return state
+
+
+class LSHIndex(ANNIndex):
+    """Random-projection (signed hyperplane) LSH.
+
+    More tables raise recall; more bits per table shrink the buckets and
+    lower latency.
+    """
+
+    name = 'lsh'
+
+    def __init__(self, n_tables: int = 8, n_bits: int = 12, random_state: int = 42):
+        super().__init__()
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.random_state = random_state
+        self.planes = None
+        self.tables = []
+
+    def _codes(self, matrix) -> np.ndarray:
+        """Hash rows to one integer code per table"""
+        projections = matrix @ self.planes
+        if sparse.issparse(projections):
+            projections = projections.toarray()
+        bits = (np.asarray(projections) > 0).reshape(-1, self.n_tables, self.n_bits)
+        weights = 1 << np.arange(self.n_bits, dtype=np.int64)
+        return bits.astype(np.int64) @ weights
+
+    def build(self, matrix):
+        # Very sparse random +/-1 projections keep the planes small even for
+        # hashed feature spaces with hundreds of thousands of columns
+        rng = np.random.default_rng(self.random_state)
+        n_dims, n_planes = matrix.shape[1], self.n_tables * self.n_bits
+        density = min(1.0, 3.0 / np.sqrt(n_dims))
+        self.planes = sparse.random(n_dims, n_planes, density=density, format='csr', dtype=np.float32,
+                                    random_state=rng, data_rvs=lambda n: rng.choice([-1.0, 1.0], n))
+        self.matrix = matrix
+        self.n_indexed = matrix.shape[0]
+
+        codes = np.vstack([self._codes(matrix[start:start + _ASSIGN_CHUNK])
+                           for start in range(0, matrix.shape[0], _ASSIGN_CHUNK)])
+        self.tables = []
+        for t in range(self.n_tables):
+            order = np.argsort(codes[:, t], kind='stable')
+            keys, starts = np.unique(codes[order, t], return_index=True)
+            ends = np.append(starts[1:], len(order))
+            self.tables.append((keys, starts, ends, order))
+        return self
+
+    def candidates(self, query) -> np.ndarray:
+        codes = self._codes(_as_dense(query)[np.newaxis, :])[0]
+        buckets = []
+        for t, (keys, starts, ends, order) in enumerate(self.tables):
+            pos = np.searchsorted(keys, codes[t])
+            if pos < len(keys) and keys[pos] == codes[t]:
+                buckets.append(order[starts[pos]:ends[pos]])
+        if not buckets:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(buckets))
+
+
+class IVFIndex(ANNIndex):
+    """Inverted-file index over a spherical k-means coarse quantizer.
+
+    ``n_lists`` controls partition granularity and ``n_probe`` how many
+    partitions are scanned per query (higher means better recall, slower).
+    """
+
+    name = 'ivf'
+
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 8, n_iter: int = 10,
+                 max_train_points: int = 50000, random_state: int = 42):
+        super().__init__()
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.max_train_points = max_train_points
+        self.random_state = random_state
+        self.centroids = None
+        self.order = None
+        self.offsets = None
+
+    def _assign(self, matrix) -> np.ndarray:
+        """Nearest centroid (by inner product) for every row"""
+        labels = np.empty(matrix.shape[0], dtype=np.int64)
+        for start in range(0, matrix.shape[0], _ASSIGN_CHUNK):
+            scores = matrix[start:start + _ASSIGN_CHUNK] @ self.centroids.T
+            labels[start:start + _ASSIGN_CHUNK] = np.asarray(scores).argmax(axis=1)
+        return labels
+
+    def _normalize_centroids(self):
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids /= norms
+
+    def build(self, matrix):
+        rng = np.random.default_rng(self.random_state)
+        n_rows = matrix.shape[0]
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_rows)))
+        n_lists = min(n_lists, n_rows)
+
+        sample = matrix
+        if n_rows > self.max_train_points:
+            sample = matrix[rng.choice(n_rows, self.max_train_points, replace=False)]
+
+        init = rng.choice(sample.shape[0], n_lists, replace=False)
+        self.centroids = np.asarray(
+            sample[init].toarray() if sparse.issparse(sample) else sample[init], dtype=np.float64)
+        self._normalize_centroids()
+
+        for _ in range(self.n_iter):
+            labels = self._assign(sample)
+            membership = sparse.csr_matrix(
+                (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+                shape=(n_lists, sample.shape[0]))
+            sums = membership @ sample
+            sums = sums.toarray() if sparse.issparse(sums) else np.asarray(sums)
+            # Keep the previous centroid for lists that lost all members
+            empty = np.asarray(membership.sum(axis=1)).ravel() == 0
+            sums[empty] = self.centroids[empty]
+            self.centroids = sums
+            self._normalize_centroids()
+
+        self.matrix = matrix
+        self.n_indexed = matrix.shape[0]
+        labels = self._assign(matrix)
+        self.order = np.argsort(labels, kind='stable')
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=n_lists))))
+        return self
+
+    def candidates(self, query) -> np.ndarray:
+        centroid_scores = self.centroids @ _as_dense(query)
+        lists = top_k_indices(centroid_scores, self.n_probe)
+        if len(lists) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+
+ANN_INDEXES = {
+    LSHIndex.name: LSHIndex,
+    IVFIndex.name: IVFIndex,
+}
+
+
+def create_ann_index(kind: str, **params) -> ANNIndex:
+    """Create an ANN index by name ('lsh' or 'ivf')"""
+    if kind not in ANN_INDEXES:
+        raise ValueError(f"Unknown ANN index type: {kind}")
+    return ANN_INDEXES[kind](**params)
+
+
+def evaluate_recall(index: ANNIndex, matrix, queries, k: int = 20) -> Dict[str, float]:
+    """Compare an index against an exact scan: recall@k and mean latencies"""
+    recalls = []
+    exact_time = 0.0
+    ann_time = 0.0
+    for i in range(queries.shape[0]):
+        query = queries[i]
+
+        start = time.perf_counter()
+        exact = top_k_indices(_row_scores(matrix, query), k)
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx, _ = index.search(query, k)
+        ann_time += time.perf_counter() - start
+
+        if len(exact):
+            recalls.append(len(np.intersect1d(exact, approx)) / len(exact))
+
+    n_queries = max(queries.shape[0], 1)
+    return {
+        'recall_at_k': float(np.mean(recalls)) if recalls else 0.0,
+        'exact_ms': exact_time * 1000 / n_queries,
+        'ann_ms': ann_time * 1000 / n_queries,
+    }
@@ -2,12 +2,112 @@
 Data processor for Spotify data
 """
 
+import gzip
+import json
+import os
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from itertools import islice
+from operator import itemgetter
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Union
 from datetime import datetime, timedelta
 import logging
 
+from .genres import GenreCounts
+from .records import AUDIO_FEATURE_DEFAULTS, AUDIO_FEATURE_INDEX, Artist, Track
+
+# Audio features averaged per user, in the order of the training dataset's columns
+USER_AUDIO_FEATURES = [
+    (name, dict(AUDIO_FEATURE_DEFAULTS)[name])
+    for name in ('danceability', 'energy', 'valence', 'acousticness', 'instrumentalness')
+]
+
+TRACK_STAT_FIELDS = [('popularity', 0), ('duration_ms', 0), ('explicit', False)]
+ARTIST_STAT_FIELDS = [('popularity', 0), ('followers', {})]
+
+EXPORT_SUFFIXES = ('.ndjson', '.jsonl', '.json', '.ndjson.gz', '.jsonl.gz', '.json.gz')
+
+
+def _export_files(paths: Union[str, Iterable[str]]) -> List[str]:
+    """Expand files and directories into the export files they hold, in name order"""
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(EXPORT_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def _user_record(record) -> Tuple[str, Dict]:
+    # Either {"user_id": ..., "tracks": [...], "artists": [...]} or [user_id, {...}]
+    if isinstance(record, dict):
+        return record.get('user_id'), record
+    user_id, user_data = record
+    return user_id, user_data
+
+
+def iter_user_exports(paths: Union[str, Iterable[str]]) -> Iterator[Tuple[str, Dict]]:
+    """Stream (user_id, user_data) pairs from user listening exports.
+
+    Newline-delimited files (``.ndjson``/``.jsonl``) are read one line at a
+    time; ``.json`` files hold a list of users and are loaded one file (chunk)
+    at a time. Any of them may be gzip-compressed (``.gz``).
+    """
+    for path in _export_files(paths):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            if path.endswith(('.json', '.json.gz')):
+                for record in json.load(f):
+                    yield _user_record(record)
+            else:
+                for line in f:
+                    if line.strip():
+                        yield _user_record(json.loads(line))
+
+
+def batched(items: Iterable, batch_size: int) -> Iterator[List]:
+    """Split an iterable into lists of at most batch_size items"""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _field_rows(records: Iterable[Dict], fields: List[Tuple[str, object]], rows: List):
+    """Append one tuple of field values per record, defaulting missing fields"""
+    try:
+        rows.extend(list(map(itemgetter(*(name for name, _ in fields)), records)))
+    except KeyError:
+        rows.extend(tuple(record.get(name, default) for name, default in fields) for record in records)
+
+
+def _segment_stats(values: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-segment mean and (population) std of consecutive row blocks.
+
+    ``values`` holds every segment's rows back to back and ``counts`` the
+    number of rows per segment; empty segments get NaN.
+    """
+    n_segments, n_columns = len(counts), values.shape[1]
+    mean = np.full((n_segments, n_columns), np.nan)
+    std = np.full((n_segments, n_columns), np.nan)
+    nonempty = counts > 0
+    if not nonempty.any():
+        return mean, std
+
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+    sizes = counts[nonempty][:, None]
+    mean[nonempty] = np.add.reduceat(values, starts, axis=0) / sizes
+    deviations = values - np.repeat(mean[nonempty], counts[nonempty], axis=0)
+    std[nonempty] = np.sqrt(np.add.reduceat(deviations ** 2, starts, axis=0) / sizes)
+    return mean, std
+
+
 class SpotifyDataProcessor:
     """Process Spotify data for AI model training"""
     
@@ -20,7 +120,7 @@ class SpotifyDataProcessor:
             'tracks': [],
             'artists': [],
             'genres': [],
-            'features': []
+            'features': None
         }
         
         # Process tracks
@@ -35,105 +135,112 @@ class SpotifyDataProcessor:
             if processed_artist:
                 processed_data['artists'].append(processed_artist)
         
-        # Extract genres
-        genres = []
-        for artist in user_artists:
-            genres.extend(artist.get('genres', []))
-        processed_data['genres'] = list(set(genres))
+        # Extract genres (distinct, in order of first appearance)
+        processed_data['genres'] = list(GenreCounts.of(processed_data['artists']).names())
         
-        # Extract audio features
-        for track in user_tracks:
-            if 'audio_features' in track:
-                features = self._extract_audio_features(track['audio_features'])
-                processed_data['features'].append(features)
+        # Audio features as one float32 matrix (AUDIO_FEATURE_NAMES columns)
+        processed_data['features'] = self._extract_audio_features(
+            [track.audio for track in processed_data['tracks'] if track.audio is not None]
+        )
         
         return processed_data
     
-    def _process_track(self, track: Dict) -> Optional[Dict]:
+    def _process_track(self, track: Dict) -> Optional[Track]:
         """Process individual track data"""
         try:
-            processed = {
-                'id': track.get('id'),
-                'name': track.get('name', ''),
-                'popularity': track.get('popularity', 0),
-                'duration_ms': track.get('duration_ms', 0),
-                'explicit': track.get('explicit', False),
-                'artists': [artist.get('name', '') for artist in track.get('artists', [])],
-                'album': track.get('album', {}).get('name', ''),
-                'release_date': track.get('album', {}).get('release_date', ''),
-                'genres': []
-            }
-            
-            # Extract genres from artists
-            for artist in track.get('artists', []):
-                if 'genres' in artist:
-                    processed['genres'].extend(artist['genres'])
-            
-            processed['genres'] = list(set(processed['genres']))
-            
-            # Add audio features if available
-            if 'audio_features' in track:
-                processed['audio_features'] = track['audio_features']
-            
-            return processed
+            return Track.from_api(track)
             
         except Exception as e:
             self.logger.error(f"Error processing track {track.get('id', 'unknown')}: {e}")
             return None
     
-    def _process_artist(self, artist: Dict) -> Optional[Dict]:
+    def _process_artist(self, artist: Dict) -> Optional[Artist]:
         """Process individual artist data"""
         try:
-            processed = {
-                'id': artist.get('id'),
-                'name': artist.get('name', ''),
-                'popularity': artist.get('popularity', 0),
-                'genres': artist.get('genres', []),
-                'followers': artist.get('followers', {}).get('total', 0)
-            }
-            
-            return processed
+            return Artist.from_api(artist)
             
         except Exception as e:
             self.logger.error(f"Error processing artist {artist.get('id', 'unknown')}: {e}")
             return None
     
-    def _extract_audio_features(self, audio_features: Dict) -> Dict:
-        """Extract and normalize audio features"""
-        features = {
-            'danceability': audio_features.get('danceability', 0.5),
-            'energy': audio_features.get('energy', 0.5),
-            'key': audio_features.get('key', 0),
-            'loudness': audio_features.get('loudness', -60),
-            'mode': audio_features.get('mode', 1),
-            'speechiness': audio_features.get('speechiness', 0.0),
-            'acousticness': audio_features.get('acousticness', 0.0),
-            'instrumentalness': audio_features.get('instrumentalness', 0.0),
-            'liveness': audio_features.get('liveness', 0.0),
-            'valence': audio_features.get('valence', 0.5),
-            'tempo': audio_features.get('tempo', 120.0)
-        }
+    def _extract_audio_features(self, packed_audio: List[np.ndarray]) -> np.ndarray:
+        """Stack packed audio features, filling missing values with their defaults"""
+        if not packed_audio:
+            return np.empty((0, len(AUDIO_FEATURE_DEFAULTS)), dtype=np.float32)
         
-        return features
+        features = np.vstack(packed_audio)
+        defaults = np.array([default for _, default in AUDIO_FEATURE_DEFAULTS], dtype=np.float32)
+        return np.where(np.isnan(features), defaults, features)
     
-    def create_training_dataset(self, users_data: List[Tuple[str, Dict]]) -> pd.DataFrame:
-        """Create training dataset from multiple users"""
-        dataset = []
+    def create_training_dataset(self, users_data: Iterable[Tuple[str, Dict]]) -> pd.DataFrame:
+        """Create training dataset from multiple users.
+        
+        All users' tracks, artists and audio features are flattened into
+        long-format arrays with per-user row counts, and every aggregate is
+        computed in one ``np.add.reduceat`` pass. Produces the same columns
+        as ``_create_user_features`` per user; features a user lacks are NaN.
+        """
+        user_ids = []
+        track_counts, artist_counts, audio_counts, genre_diversity = [], [], [], []
+        track_values, artist_values, audio_values = [], [], []
         
         for user_id, user_data in users_data:
-            processed = self.process_user_data(
-                user_data.get('tracks', []),
-                user_data.get('artists', [])
-            )
+            tracks = user_data.get('tracks', [])
+            artists = user_data.get('artists', [])
+            user_ids.append(user_id)
             
-            # Create user features
-            user_features = self._create_user_features(processed)
-            user_features['user_id'] = user_id
+            track_counts.append(len(tracks))
+            _field_rows(tracks, TRACK_STAT_FIELDS, track_values)
             
-            dataset.append(user_features)
+            artist_counts.append(len(artists))
+            _field_rows(artists, ARTIST_STAT_FIELDS, artist_values)
+            genre_diversity.append(len({genre for a in artists for genre in a.get('genres', [])}))
+            
+            audio = [t['audio_features'] for t in tracks if 'audio_features' in t]
+            audio_counts.append(len(audio))
+            _field_rows(audio, USER_AUDIO_FEATURES, audio_values)
+        
+        # Any falsy explicit flag (e.g. None) counts as not explicit; artist followers arrive as {'total': n}
+        track_values = [(popularity, duration, bool(explicit)) for popularity, duration, explicit in track_values]
+        artist_values = [(popularity, followers.get('total', 0)) for popularity, followers in artist_values]
+        
+        track_mean, _ = _segment_stats(np.array(track_values, dtype=np.float64).reshape(-1, 3),
+                                       np.array(track_counts, dtype=np.int64))
+        artist_mean, _ = _segment_stats(np.array(artist_values, dtype=np.float64).reshape(-1, 2),
+                                        np.array(artist_counts, dtype=np.int64))
+        audio_mean, audio_std = _segment_stats(
+            np.array(audio_values, dtype=np.float64).reshape(-1, len(USER_AUDIO_FEATURES)),
+            np.array(audio_counts, dtype=np.int64)
+        )
         
+        columns = {
+            'avg_popularity': track_mean[:, 0],
+            'avg_duration': track_mean[:, 1],
+            'explicit_ratio': track_mean[:, 2],
+            'avg_artist_popularity': artist_mean[:, 0],
+            'avg_followers': artist_mean[:, 1],
+            'genre_diversity': np.array(genre_diversity, dtype=np.int64),
+        }
+        for col, (name, _) in enumerate(USER_AUDIO_FEATURES):
+            columns[f'avg_{name}'] = audio_mean[:, col]
+            columns[f'std_{name}'] = audio_std[:, col]
+        
+        # Like the per-user dicts, leave out features no user has
+        dataset = {name: values for name, values in columns.items() if not np.isnan(values).all()}
+        if user_ids:
+            dataset['user_id'] = user_ids
         return pd.DataFrame(dataset)
     
+    def stream_training_dataset(self, users_data: Iterable[Tuple[str, Dict]],
+                                batch_size: int = 1000) -> Iterator[pd.DataFrame]:
+        """Yield the training dataset in frames of at most batch_size users.
+        
+        Only one batch of raw user data is held at a time, so exports read with
+        ``iter_user_exports`` can be larger than memory.
+        """
+        for batch in batched(users_data, batch_size):
+            yield self.create_training_dataset(batch)
+    
     def _create_user_features(self, processed_data: Dict) -> Dict:
         """Create user-level features"""
         features = {}
@@ -157,21 +264,19 @@ class SpotifyDataProcessor:
         
         # Audio feature averages
         audio_features = processed_data['features']
-        if audio_features:
-            feature_names = ['danceability', 'energy', 'valence', 'acousticness', 'instrumentalness']
-            for feature in feature_names:
-                values = [f[feature] for f in audio_features if feature in f]
-                if values:
-                    features[f'avg_{feature}'] = np.mean(values)
-                    features[f'std_{feature}'] = np.std(values)
+        if len(audio_features):
+            for feature, _ in USER_AUDIO_FEATURES:
+                values = audio_features[:, AUDIO_FEATURE_INDEX[feature]].astype(np.float64)
+                features[f'avg_{feature}'] = np.mean(values)
+                features[f'std_{feature}'] = np.std(values)
         
         return features
     
     def create_recommendation_context(self, user_tracks: List[Dict], 
                                     mood: str = None, genre: str = None) -> Dict:
         """Create context for recommendations"""
+        # Compact records only; the raw API payloads are not kept alive
         context = {
-            'user_tracks': user_tracks,
             'mood': mood,
             'genre': genre,
             'track_features': [],
@@ -180,8 +285,9 @@ class SpotifyDataProcessor:
         
         # Extract features from user tracks
         for track in user_tracks:
-            features = self._extract_track_features_for_context(track)
-            context['track_features'].append(features)
+            features = self._process_track(track)
+            if features:
+                context['track_features'].append(features)
         
         # Add mood and genre context
         if mood:
@@ -192,28 +298,6 @@ class SpotifyDataProcessor:
         
         return context
     
-    def _extract_track_features_for_context(self, track: Dict) -> Dict:
-        """Extract features for recommendation context"""
-        features = {
-            'id': track.get('id'),
-            'name': track.get('name', ''),
-            'artists': [artist.get('name', '') for artist in track.get('artists', [])],
-            'genres': []
-        }
-        
-        # Extract genres
-        for artist in track.get('artists', []):
-            if 'genres' in artist:
-                features['genres'].extend(artist['genres'])
-        
-        features['genres'] = list(set(features['genres']))
-        
-        # Add audio features if available
-        if 'audio_features' in track:
-            features.update(self._extract_audio_features(track['audio_features']))
-        
-        return features
-    
     def _get_mood_context(self, mood: str) -> Dict:
         """Get mood-specific context"""
         mood_contexts = {
@@ -0,0 +1,229 @@
+"""
+Cached, pre-analyzed track documents for the text featurizers
+"""
+
+import re
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+# Same token pattern (and lowercasing) as scikit-learn's text vectorizers
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into interned tokens"""
+    return list(map(sys.intern, TOKEN_PATTERN.findall(text.lower())))
+
+
+class TermAnalyzer:
+    """Vectorizer analyzer that accepts pre-analyzed term lists.
+
+    ``terms`` turns tokens into the stop-word filtered n-grams scikit-learn's
+    word analyzer would produce. Passed as a vectorizer's ``analyzer``, term
+    lists go straight to counting and raw strings are analyzed as usual.
+    """
+
+    def __init__(self, stop_words: str = 'english', ngram_range: Tuple[int, int] = (1, 2)):
+        self.stop_words = ENGLISH_STOP_WORDS if stop_words == 'english' else frozenset(stop_words or ())
+        self.ngram_range = ngram_range
+
+    def terms(self, tokens: List[str]) -> List[str]:
+        stop_words = self.stop_words
+        tokens = [token for token in tokens if token not in stop_words]
+        min_n, max_n = self.ngram_range
+        n_tokens = len(tokens)
+        terms = list(tokens) if min_n == 1 else []
+        terms_append, space_join = terms.append, ' '.join
+        for n in range(max(min_n, 2), min(max_n, n_tokens) + 1):
+            for i in range(n_tokens - n + 1):
+                terms_append(space_join(tokens[i:i + n]))
+        return terms
+
+    def __call__(self, doc) -> List[str]:
+        return self.terms(tokenize(doc)) if isinstance(doc, str) else doc
+
+
+def _analyze_fields(analyzer: TermAnalyzer, fields: List[Tuple]) -> List[Tuple[List[str], List[str]]]:
+    """Query tokens and document terms for a chunk of track fields (worker side)"""
+    results = []
+    for name, artist_names, album_name, genres in fields:
+        query_tokens = tokenize(' '.join((name,) + artist_names))
+        document_tokens = query_tokens + tokenize(' '.join((album_name,) + genres))
+        results.append((query_tokens, analyzer.terms(document_tokens)))
+    return results
+
+
+def accepts_terms(vectorizer) -> bool:
+    """Whether a fitted vectorizer takes pre-analyzed term lists"""
+    analyzer = getattr(vectorizer, 'analyzer', None)
+    return isinstance(analyzer, TermAnalyzer)
+
+
+class TrackDocumentCache:
+    """Analyzed track documents, keyed by track id.
+
+    Each entry keeps the query tokens (name and artist names, used to encode
+    seed queries) and the document terms (stop-word filtered n-grams of name,
+    artists, album and genres), each with a hash of the fields it was built
+    from. A track whose metadata changes is re-analyzed on its next lookup;
+    because the two parts are hashed separately, raw API tracks used as seeds
+    and processed training tracks share the query tokens. The oldest entries
+    are dropped past ``max_entries``. Safe to share between threads; tracks
+    are analyzed outside the lock.
+    """
+
+    def __init__(self, analyzer: Optional[TermAnalyzer] = None, max_entries: int = 1_000_000):
+        self.analyzer = analyzer or TermAnalyzer()
+        self.max_entries = max_entries
+        # track id -> [query hash, query tokens, document hash, document terms]
+        self._entries: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _fields(track: Dict) -> Tuple[str, Tuple[str, ...], str, Tuple[str, ...]]:
+        # Processed tracks carry artist names as plain strings
+        artists = track.get('artists', [])
+        artist_names = tuple(artist.get('name', '') if isinstance(artist, dict) else artist
+                             for artist in artists)
+
+        album = track.get('album', {})
+        album_name = album.get('name', '') if isinstance(album, dict) else album
+
+        # Genres from artists (or the processed track's merged genres)
+        if 'genres' in track:
+            genres = tuple(track['genres'])
+        else:
+            genres = tuple(genre for artist in artists if isinstance(artist, dict)
+                           for genre in artist.get('genres', []))
+        return track.get('name', ''), artist_names, album_name or '', genres
+
+    def text(self, track: Dict) -> str:
+        """Combine track name, artist names, album name and genres into one document"""
+        name, artist_names, album_name, genres = self._fields(track)
+        return ' '.join((name,) + artist_names + (album_name,) + genres).strip()
+
+    def _lookup(self, track: Dict, document: bool) -> list:
+        name, artist_names, album_name, genres = self._fields(track)
+        query_hash = hash((name, artist_names))
+        document_hash = hash((query_hash, album_name, genres)) if document else None
+        track_id = track.get('id')
+
+        with self._lock:
+            entry = self._entries.get(track_id) if track_id is not None else None
+            if entry is not None and entry[0] == query_hash and (not document or entry[2] == document_hash):
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        if entry is not None and entry[0] == query_hash:
+            query_tokens = entry[1]
+        else:
+            query_tokens = tokenize(' '.join((name,) + artist_names))
+            entry = None
+
+        if document:
+            document_tokens = query_tokens + tokenize(' '.join((album_name,) + genres))
+            entry = [query_hash, query_tokens, document_hash, self.analyzer.terms(document_tokens)]
+        elif entry is None:
+            entry = [query_hash, query_tokens, None, None]
+
+        if track_id is not None:
+            with self._lock:
+                self._store(track_id, entry)
+        return entry
+
+    def _store(self, track_id: str, entry: list):
+        # Caller holds the lock
+        self._entries.pop(track_id, None)
+        if len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries[track_id] = entry
+
+    def document_terms(self, track: Dict) -> List[str]:
+        """Analyzed terms of a track's name, artists, album and genres"""
+        return self._lookup(track, document=True)[3]
+
+    def documents(self, tracks: Iterable[Dict], n_jobs: int = 1, chunk_size: int = 5000) -> List[List[str]]:
+        """Document terms for many tracks, analyzing cache misses in parallel chunks"""
+        if n_jobs == 1:
+            return [self._lookup(track, document=True)[3] for track in tracks]
+
+        # Hashes are computed here: str hashes are randomized per process
+        tracks = list(tracks)
+        keys, pending = [], {}
+        hits = 0
+        with self._lock:
+            for track in tracks:
+                fields = self._fields(track)
+                query_hash = hash(fields[:2])
+                document_hash = hash((query_hash,) + fields[2:])
+                track_id = track.get('id')
+                entry = self._entries.get(track_id) if track_id is not None else None
+                if entry is not None and entry[0] == query_hash and entry[2] == document_hash:
+                    hits += 1
+                    keys.append(entry)
+                    continue
+                # Repeated tracks are analyzed once; tracks without an id each get their own key
+                key = (track_id, document_hash) if track_id is not None else len(keys)
+                if key not in pending:
+                    pending[key] = (query_hash, document_hash, fields)
+                keys.append(key)
+            misses = list(pending.values())
+            self.hits += hits
+            self.misses += len(misses)
+        chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+        analyzed = Parallel(n_jobs=n_jobs)(
+            delayed(_analyze_fields)(self.analyzer, [fields for _, _, fields in chunk]) for chunk in chunks
+        )
+        built = {}
+        for key, (query_hash, document_hash, _), (query_tokens, terms) in zip(
+                pending, misses, (result for part in analyzed for result in part)):
+            built[key] = [query_hash, query_tokens, document_hash, terms]
+
+        documents = []
+        with self._lock:
+            for track, key in zip(tracks, keys):
+                entry = key if isinstance(key, list) else built[key]
+                if not isinstance(key, list) and track.get('id') is not None:
+                    self._store(track['id'], entry)
+                documents.append(entry[3])
+        return documents
+
+    def query_tokens(self, seed_tracks: Iterable[Dict]) -> List[str]:
+        """Tokens of the seed tracks' names and artists, as one query document"""
+        tokens = []
+        for track in seed_tracks:
+            tokens.extend(self._lookup(track, document=False)[1])
+        return tokens
+
+    def query_terms(self, seed_tracks: Iterable[Dict]) -> List[str]:
+        """Analyzed terms of a seed query (n-grams may span adjacent seed tracks)"""
+        return self.analyzer.terms(self.query_tokens(seed_tracks))
+
+    def invalidate(self, track_id: Optional[str] = None):
+        """Drop one track's entry, or every entry"""
+        with self._lock:
+            if track_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(track_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, hits, misses = len(self._entries), self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'entries': entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0
+        }
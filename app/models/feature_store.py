@@ -0,0 +1,114 @@
+"""
+Columnar track feature store
+"""
+
+import numpy as np
+from scipy import sparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .id_index import IdIndex
+
+# Numeric feature columns, in the order produced by MusicAI.extract_track_features
+FEATURE_COLUMNS = [
+    'popularity', 'duration_ms', 'explicit',
+    'danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness',
+    'acousticness', 'instrumentalness', 'liveness', 'valence', 'tempo'
+]
+FEATURE_INDEX = {name: col for col, name in enumerate(FEATURE_COLUMNS)}
+
+
+def features_to_matrix(feature_dicts: Iterable[Dict[str, float]]) -> np.ndarray:
+    """Pack feature dicts into a float32 matrix; missing features become NaN"""
+    rows = [[features.get(name, np.nan) for name in FEATURE_COLUMNS] for features in feature_dicts]
+    if not rows:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32)
+    return np.array(rows, dtype=np.float32)
+
+
+class TrackFeatureStore:
+    """Track features held column-wise instead of as per-track dicts.
+
+    - ``index``: track id <-> row mapping
+    - ``numeric``: float32 matrix of FEATURE_COLUMNS (NaN where a track has
+      no audio features)
+    - ``text``: CSR matrix of text vectors, one row per track
+
+    ``numeric_filled()`` is ``numeric`` with missing features as 0, for
+    scoring. It is built once and kept in step by ``append`` and
+    ``update_numeric``, so requests do not copy the catalog.
+    """
+
+    def __init__(self, index: Optional[IdIndex] = None, numeric: Optional[np.ndarray] = None,
+                 text: Optional[sparse.csr_matrix] = None):
+        self.index = index if index is not None else IdIndex()
+        self.numeric = numeric if numeric is not None else np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32)
+        self.text = text
+        # NaN-zeroed copy of numeric, and the array it was built from
+        self._filled = None
+        self._filled_source = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, track_id) -> bool:
+        return track_id in self.index
+
+    def row(self, track_id: str) -> Optional[int]:
+        return self.index.get(track_id)
+
+    def rows(self, track_ids: Iterable[str]) -> np.ndarray:
+        """Rows for the known ids, in order; unknown ids are skipped"""
+        rows = [self.index.get(track_id) for track_id in track_ids if track_id is not None]
+        return np.array([row for row in rows if row is not None], dtype=np.int64)
+
+    def track_id(self, row: int) -> str:
+        return self.index.id_at(row)
+
+    def features_at(self, row: int) -> Dict[str, float]:
+        """Feature dict for a row, omitting features the track does not have"""
+        values = self.numeric[row]
+        return {name: float(values[col]) for col, name in enumerate(FEATURE_COLUMNS)
+                if not np.isnan(values[col])}
+
+    def features(self, track_id: str) -> Dict[str, float]:
+        row = self.index.get(track_id)
+        return {} if row is None else self.features_at(row)
+
+    def numeric_filled(self) -> np.ndarray:
+        """``numeric`` with missing features (NaN) as 0"""
+        if self._filled is None or self._filled_source is not self.numeric:
+            self._filled = np.nan_to_num(self.numeric)
+            self._filled_source = self.numeric
+        return self._filled
+
+    def _filled_current(self) -> bool:
+        return self._filled is not None and self._filled_source is self.numeric
+
+    def batch(self, rows: np.ndarray) -> Tuple[np.ndarray, Optional[sparse.csr_matrix]]:
+        """Numeric and text slices for a batch of rows"""
+        text = self.text[rows] if self.text is not None else None
+        return self.numeric[rows], text
+
+    def append(self, track_ids: List[str], numeric: np.ndarray,
+               text: Optional[sparse.csr_matrix] = None):
+        """Append new tracks; ids must not already be in the store"""
+        for track_id in track_ids:
+            self.index.append(track_id)
+        numeric = np.asarray(numeric, dtype=np.float32)
+        filled = self._filled_current()
+        self.numeric = np.vstack([self.numeric, numeric])
+        if filled:
+            self._filled = np.vstack([self._filled, np.nan_to_num(numeric)])
+            self._filled_source = self.numeric
+        if text is not None:
+            self.text = text if self.text is None else sparse.vstack([self.text, text], format='csr')
+
+    def update_numeric(self, rows: np.ndarray, numeric: np.ndarray):
+        """Overwrite numeric features in place (copying first if memory-mapped)"""
+        filled = self._filled_current()
+        if not self.numeric.flags.writeable:
+            self.numeric = np.array(self.numeric)
+        self.numeric[rows] = numeric
+        if filled:
+            self._filled[rows] = np.nan_to_num(self.numeric[rows])
+            self._filled_source = self.numeric
@@ -0,0 +1,81 @@
+"""
+Text featurizers for track documents
+"""
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from typing import Iterable, List
+
+
+class HashingTfidfVectorizer:
+    """TF-IDF over hashed terms with a separately maintained IDF table.
+
+    Term hashing is stateless, so encoding needs no fitted vocabulary, uses
+    constant memory in the vocabulary size and can be spread across
+    processes. Only the document-frequency table is learned, and it can be
+    updated incrementally with ``partial_fit``. Exposes the same
+    ``fit_transform``/``transform`` interface as ``TfidfVectorizer``.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, stop_words='english', ngram_range=(1, 2),
+                 n_jobs: int = 1, chunk_size: int = 10000, analyzer='word'):
+        self.n_features = n_features
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.analyzer = analyzer
+        # A callable analyzer applies its own stop words and n-grams
+        word_options = {'stop_words': stop_words, 'ngram_range': ngram_range} if analyzer == 'word' else {}
+        self.hasher = HashingVectorizer(
+            n_features=n_features,
+            analyzer=analyzer,
+            alternate_sign=False,
+            norm=None,
+            **word_options
+        )
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+
+    def hash_counts(self, texts: List) -> sparse.csr_matrix:
+        """Hashed term counts, optionally encoded in parallel chunks"""
+        texts = list(texts)
+        if self.n_jobs == 1 or len(texts) <= self.chunk_size:
+            return self.hasher.transform(texts)
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        parts = Parallel(n_jobs=self.n_jobs)(delayed(self.hasher.transform)(chunk) for chunk in chunks)
+        return sparse.vstack(parts, format='csr')
+
+    def _update_idf(self, counts: sparse.csr_matrix):
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_documents += counts.shape[0]
+
+    @property
+    def idf_(self) -> np.ndarray:
+        """Smoothed IDF weights, matching TfidfVectorizer's default formula"""
+        return np.log((1 + self.n_documents) / (1 + self.document_frequency)) + 1
+
+    def _weight(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        weighted = counts.multiply(self.idf_).tocsr()
+        return normalize(weighted)
+
+    def partial_fit(self, texts: Iterable[str]):
+        """Add documents to the IDF table without touching earlier state"""
+        self._update_idf(self.hash_counts(texts))
+        return self
+
+    def fit(self, texts: Iterable[str]):
+        self.document_frequency[:] = 0
+        self.n_documents = 0
+        return self.partial_fit(texts)
+
+    def fit_transform(self, texts: Iterable[str]) -> sparse.csr_matrix:
+        self.document_frequency[:] = 0
+        self.n_documents = 0
+        counts = self.hash_counts(texts)
+        self._update_idf(counts)
+        return self._weight(counts)
+
+    def transform(self, texts: Iterable[str]) -> sparse.csr_matrix:
+        return self._weight(self.hash_counts(texts))
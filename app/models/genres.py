@@ -0,0 +1,109 @@
+"""
+Shared genre vocabulary and integer-coded genre counting
+"""
+
+import sys
+import threading
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+class GenreVocabulary:
+    """Process-wide mapping between genre strings and integer ids.
+
+    Ids are assigned the first time a genre is seen and never change, so id
+    tuples stay valid for the life of the process. They are not stable across
+    processes: records pickle genre names and re-encode them when loaded.
+    """
+
+    def __init__(self, genres: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+        self.encode(genres)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, genre) -> bool:
+        return genre in self._ids
+
+    def id(self, genre: str) -> int:
+        genre_id = self._ids.get(genre)
+        if genre_id is None:
+            with self._lock:
+                genre_id = self._ids.get(genre)
+                if genre_id is None:
+                    # Canonical copy of the string; numpy.str_ and other subclasses become plain str
+                    genre = sys.intern(str.__str__(genre))
+                    genre_id = len(self._names)
+                    self._names.append(genre)
+                    self._ids[genre] = genre_id
+        return genre_id
+
+    def encode(self, genres: Iterable[str]) -> Tuple[int, ...]:
+        """Ids of genre strings, in order (the int objects are shared by every record)"""
+        genres = tuple(genres)
+        lookup = self._ids.get
+        ids = tuple(map(lookup, genres))
+        if None in ids:
+            ids = tuple(self.id(genre) for genre in genres if isinstance(genre, str))
+        return ids
+
+    def name(self, genre_id: int) -> str:
+        return self._names[genre_id]
+
+    def names(self, genre_ids: Iterable[int]) -> Tuple[str, ...]:
+        names = self._names
+        return tuple(names[genre_id] for genre_id in genre_ids)
+
+
+GENRE_VOCABULARY = GenreVocabulary()
+
+
+def unique_genre_ids(genre_ids: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Distinct ids in order of first appearance"""
+    # Order-preserving, so documents are identical whichever process built them
+    return genre_ids if len(genre_ids) < 2 else tuple(dict.fromkeys(genre_ids))
+
+
+class GenreCounts:
+    """Genre occurrence counts over a group of records.
+
+    Distinct genres are kept in order of first appearance, so ties in
+    ``top`` come out in the same order as counting with a dict would give.
+    """
+
+    def __init__(self, genre_ids: Sequence[int], vocabulary: GenreVocabulary = GENRE_VOCABULARY):
+        self.vocabulary = vocabulary
+        self.total = len(genre_ids)
+        self.ids = np.fromiter(dict.fromkeys(genre_ids), dtype=np.intp, count=-1)
+        self.counts = np.bincount(np.asarray(genre_ids, dtype=np.intp))[self.ids]
+
+    @classmethod
+    def of(cls, records: Iterable, vocabulary: GenreVocabulary = GENRE_VOCABULARY) -> 'GenreCounts':
+        """Count the genres of artist (or track) records or API dicts"""
+        records = list(records)
+        try:
+            genre_ids = list(chain.from_iterable([record.genre_ids for record in records]))
+        except AttributeError:
+            # API dicts: encode the genre names
+            genre_ids = vocabulary.encode(chain.from_iterable([record.get('genres', []) for record in records]))
+        return cls(genre_ids, vocabulary)
+
+    @property
+    def distinct(self) -> int:
+        return len(self.ids)
+
+    def top(self, k: int = None) -> List[Tuple[str, int]]:
+        """(genre, count) pairs, most frequent first"""
+        # Stable sort on descending counts keeps first-appearance order among ties
+        order = np.argsort(-self.counts, kind='stable')[:k]
+        names = self.vocabulary.names(self.ids[order].tolist())
+        return list(zip(names, self.counts[order].tolist()))
+
+    def names(self) -> Tuple[str, ...]:
+        """Distinct genres in order of first appearance"""
+        return self.vocabulary.names(self.ids.tolist())
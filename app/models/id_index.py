@@ -0,0 +1,109 @@
+"""
+Array-backed id <-> row mapping for model artifacts
+"""
+
+import numpy as np
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+class IdIndex:
+    """Bidirectional mapping between string ids and matrix rows.
+
+    The bulk of the ids live in NumPy arrays (row order plus a sorted copy
+    for binary search), so an index loaded with ``mmap_mode='r'`` is shared
+    between processes instead of being rebuilt as a dict in every worker.
+    Ids appended afterwards go to a small overflow dict. When an id appears
+    more than once, lookups return its most recent row.
+    """
+
+    def __init__(self, ids: Iterable[str] = ()):
+        ids = np.asarray(list(ids), dtype=str)
+        order = np.argsort(ids, kind='stable')
+        self._init_arrays(ids, ids[order], order)
+
+    def _init_arrays(self, ids: np.ndarray, sorted_ids: np.ndarray, order: np.ndarray):
+        self._ids = ids
+        self._sorted_ids = sorted_ids
+        self._order = order
+        self._extra_ids = []
+        self._extra_rows: Dict[str, int] = {}
+
+    @classmethod
+    def from_arrays(cls, ids: np.ndarray, sorted_ids: np.ndarray, order: np.ndarray) -> 'IdIndex':
+        """Wrap precomputed (possibly memory-mapped) arrays without copying"""
+        index = cls.__new__(cls)
+        index._init_arrays(ids, sorted_ids, order)
+        return index
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (ids, sorted_ids, order) covering appended ids as well"""
+        if not self._extra_ids:
+            return self._ids, self._sorted_ids, self._order
+        ids = np.concatenate((self._ids, np.asarray(self._extra_ids, dtype=str)))
+        order = np.argsort(ids, kind='stable')
+        return ids, ids[order], order
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._extra_ids)
+
+    def get(self, item_id: str, default: Optional[int] = None) -> Optional[int]:
+        row = self._extra_rows.get(item_id)
+        if row is not None:
+            return row
+        # Stable sort keeps duplicates in row order, so the rightmost match is the latest
+        pos = int(np.searchsorted(self._sorted_ids, item_id, side='right')) - 1
+        if pos >= 0 and self._sorted_ids[pos] == item_id:
+            return int(self._order[pos])
+        return default
+
+    def rows_of(self, item_ids: np.ndarray, default: int = -1) -> np.ndarray:
+        """Vectorized ``get`` for many ids; ids not in the index map to ``default``"""
+        item_ids = np.asarray(item_ids, dtype=str)
+        rows = np.full(len(item_ids), default, dtype=np.int64)
+        if len(self._sorted_ids) and len(item_ids):
+            pos = np.searchsorted(self._sorted_ids, item_ids, side='right') - 1
+            found = (pos >= 0) & (self._sorted_ids[np.maximum(pos, 0)] == item_ids)
+            rows[found] = self._order[pos[found]]
+        for i, item_id in enumerate(item_ids.tolist() if self._extra_rows else ()):
+            row = self._extra_rows.get(item_id)
+            if row is not None:
+                rows[i] = row
+        return rows
+
+    def __getitem__(self, item_id: str) -> int:
+        row = self.get(item_id)
+        if row is None:
+            raise KeyError(item_id)
+        return row
+
+    def __contains__(self, item_id) -> bool:
+        return item_id is not None and self.get(item_id) is not None
+
+    def id_at(self, row: int) -> str:
+        """Return the id stored at a row"""
+        base = len(self._ids)
+        if row < base:
+            return str(self._ids[row])
+        return self._extra_ids[row - base]
+
+    def ids_at(self, rows: np.ndarray) -> np.ndarray:
+        """Return the ids stored at many rows as a string array"""
+        rows = np.asarray(rows, dtype=np.int64)
+        base = len(self._ids)
+        if not self._extra_ids or not len(rows) or rows.max() < base:
+            return np.asarray(self._ids[rows], dtype=str)
+        return np.array([self.id_at(row) for row in rows], dtype=str)
+
+    def append(self, item_id: str) -> int:
+        """Add an id as a new row and return that row"""
+        row = len(self)
+        self._extra_ids.append(item_id)
+        self._extra_rows[item_id] = row
+        return row
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """Yield (id, latest row) for every distinct id"""
+        latest = {}
+        for row in range(len(self)):
+            latest[self.id_at(row)] = row
+        return iter(latest.items())
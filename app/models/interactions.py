@@ -0,0 +1,72 @@
+"""
+Sparse user-item interaction matrix construction
+"""
+
+from array import array
+import numpy as np
+from scipy import sparse
+from typing import Dict, Iterable, List, Tuple
+
+
+class InteractionMatrixBuilder:
+    """Stream (user, track) interactions into a binary CSR matrix.
+
+    Ids are assigned through dicts as they are first seen, and interactions
+    are buffered as compact integer arrays, so memory grows with the number
+    of interactions rather than users x tracks.
+    """
+
+    def __init__(self):
+        self.user_ids: List[str] = []
+        self.user_index: Dict[str, int] = {}
+        self.track_ids: List[str] = []
+        self.track_index: Dict[str, int] = {}
+        self._rows = array('q')
+        self._cols = array('q')
+
+    def _user_row(self, user_id: str) -> int:
+        row = self.user_index.get(user_id)
+        if row is None:
+            row = self.user_index[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        return row
+
+    def _track_col(self, track_id: str) -> int:
+        col = self.track_index.get(track_id)
+        if col is None:
+            col = self.track_index[track_id] = len(self.track_ids)
+            self.track_ids.append(track_id)
+        return col
+
+    def add_user(self, user_id: str, tracks: Iterable[Dict]):
+        """Record all track interactions for one user"""
+        row = self._user_row(user_id)
+        for track in tracks:
+            track_id = track.get('id')
+            if track_id is None:
+                continue
+            self._rows.append(row)
+            self._cols.append(self._track_col(track_id))
+
+    def add_users(self, user_tracks_data: Iterable[Tuple[str, List[Dict]]]):
+        """Record interactions for a stream of (user_id, tracks) pairs"""
+        for user_id, tracks in user_tracks_data:
+            self.add_user(user_id, tracks)
+        return self
+
+    @property
+    def n_interactions(self) -> int:
+        return len(self._rows)
+
+    def build(self) -> sparse.csr_matrix:
+        """Return the binary user x track matrix in CSR format"""
+        rows = np.frombuffer(self._rows, dtype=np.int64) if self._rows else np.empty(0, dtype=np.int64)
+        cols = np.frombuffer(self._cols, dtype=np.int64) if self._cols else np.empty(0, dtype=np.int64)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(self.user_ids), len(self.track_ids))
+        )
+        # Repeated plays collapse to a single binary interaction
+        matrix.sum_duplicates()
+        matrix.data[:] = 1.0
+        return matrix
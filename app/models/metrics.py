@@ -0,0 +1,38 @@
+"""
+Lightweight latency instrumentation for model serving
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Dict
+
+import numpy as np
+
+
+class LatencyTracker:
+    """Keep a bounded window of recent latencies per operation"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        """Record one latency sample in seconds"""
+        with self._lock:
+            self._samples[name].append(seconds)
+
+    def percentiles(self, name: str) -> Dict[str, float]:
+        """Return count, p50 and p99 in milliseconds for one operation"""
+        with self._lock:
+            samples = np.array(self._samples.get(name, ()), dtype=np.float64)
+        if not len(samples):
+            return {'count': 0, 'p50_ms': 0.0, 'p99_ms': 0.0}
+        p50, p99 = np.percentile(samples * 1000, [50, 99])
+        return {'count': len(samples), 'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Percentiles for every recorded operation"""
+        with self._lock:
+            names = list(self._samples)
+        return {name: self.percentiles(name) for name in names}
@@ -0,0 +1,168 @@
+"""
+Memory-mapped model artifact store
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .id_index import IdIndex
+
+FORMAT_VERSION = 2
+# Version 1 stores kept their files next to the manifest; they still load
+READABLE_VERSIONS = (1, FORMAT_VERSION)
+
+
+class ModelStore:
+    """Model arrays saved as raw .npy files described by a JSON manifest.
+
+    Arrays are opened with ``mmap_mode='r'``, so every worker process maps
+    the same pages from the OS page cache instead of unpickling a private
+    copy. Each save writes a fresh version directory and then publishes it
+    by swapping in the manifest (the single pointer) with ``os.replace``:
+    a loader reads one manifest and opens every file from the version it
+    names, so it never mixes two saves. The previous version is kept for
+    loaders that read the old manifest just before the swap; older ones are
+    removed.
+    """
+
+    MANIFEST = 'manifest.json'
+    VERSIONS = 'versions'
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, self.MANIFEST))
+
+    def _read_manifest(self) -> Dict:
+        with open(os.path.join(self.path, self.MANIFEST)) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_array(directory: str, name: str, array: np.ndarray) -> Dict:
+        # The version directory is not published yet, so files are written in place
+        filename = f"{name}.npy"
+        with open(os.path.join(directory, filename), 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        return {'file': filename, 'dtype': str(array.dtype), 'shape': list(array.shape)}
+
+    def _prune(self, keep: str):
+        """Remove versions older than ``keep``; newer ones may be saves in progress"""
+        versions_dir = os.path.join(self.path, self.VERSIONS)
+        for name in os.listdir(versions_dir):
+            if name < keep:
+                shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+    def save(self, arrays: Optional[Dict[str, np.ndarray]] = None,
+             matrices: Optional[Dict[str, sparse.csr_matrix]] = None,
+             indexes: Optional[Dict[str, IdIndex]] = None,
+             metadata: Optional[Dict] = None):
+        """Write arrays, CSR matrices and id indexes to a new version, then publish its manifest"""
+        saved_at = datetime.now()
+        # Names sort by save time; the pid keeps concurrent savers apart
+        version = f"{saved_at:%Y%m%dT%H%M%S%f}-{os.getpid()}"
+        directory = os.path.join(self.path, self.VERSIONS, version)
+        os.makedirs(directory)
+
+        def write(name: str, array: np.ndarray) -> Dict:
+            return self._write_array(directory, name, array)
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'saved_at': saved_at.isoformat(),
+            'directory': os.path.join(self.VERSIONS, version),
+            'arrays': {},
+            'matrices': {},
+            'indexes': {},
+            'metadata': metadata or {}
+        }
+
+        for name, array in (arrays or {}).items():
+            if array is not None:
+                manifest['arrays'][name] = write(name, np.asarray(array))
+
+        for name, matrix in (matrices or {}).items():
+            if matrix is None:
+                continue
+            matrix = sparse.csr_matrix(matrix)
+            manifest['matrices'][name] = {
+                'shape': list(matrix.shape),
+                'data': write(f"{name}.data", matrix.data),
+                'indices': write(f"{name}.indices", matrix.indices),
+                'indptr': write(f"{name}.indptr", matrix.indptr)
+            }
+
+        for name, index in (indexes or {}).items():
+            ids, sorted_ids, order = index.to_arrays()
+            manifest['indexes'][name] = {
+                'ids': write(f"{name}.ids", ids),
+                'sorted_ids': write(f"{name}.sorted_ids", sorted_ids),
+                'order': write(f"{name}.order", order)
+            }
+
+        previous = None
+        if self.exists():
+            try:
+                previous = os.path.basename(self._read_manifest().get('directory', ''))
+            except (OSError, ValueError):
+                pass
+
+        tmp_manifest = os.path.join(self.path, f"{self.MANIFEST}.{version}.tmp")
+        with open(tmp_manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, os.path.join(self.path, self.MANIFEST))
+
+        self._prune(min(previous, version) if previous else version)
+
+    def load(self, mmap_mode: Optional[str] = 'r') -> Dict:
+        """Open every artifact listed in the manifest"""
+        while True:
+            manifest = self._read_manifest()
+            try:
+                return self._open(manifest, mmap_mode)
+            except FileNotFoundError:
+                # Two saves landed while opening; the version was pruned, so follow the new manifest
+                if self._read_manifest().get('directory') == manifest.get('directory'):
+                    raise
+
+    def _open(self, manifest: Dict, mmap_mode: Optional[str]) -> Dict:
+        if manifest.get('format_version') not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported model store version: {manifest.get('format_version')}")
+
+        directory = os.path.join(self.path, manifest.get('directory', ''))
+
+        def open_array(entry: Dict) -> np.ndarray:
+            return np.load(os.path.join(directory, entry['file']), mmap_mode=mmap_mode)
+
+        arrays = {name: open_array(entry)
+                  for name, entry in manifest['arrays'].items()}
+
+        matrices = {}
+        for name, entry in manifest['matrices'].items():
+            matrices[name] = sparse.csr_matrix(
+                (open_array(entry['data']),
+                 open_array(entry['indices']),
+                 open_array(entry['indptr'])),
+                shape=tuple(entry['shape']), copy=False
+            )
+
+        indexes = {}
+        for name, entry in manifest['indexes'].items():
+            indexes[name] = IdIndex.from_arrays(
+                open_array(entry['ids']),
+                open_array(entry['sorted_ids']),
+                open_array(entry['order'])
+            )
+
+        return {
+            'arrays': arrays,
+            'matrices': matrices,
+            'indexes': indexes,
+            'metadata': manifest['metadata']
+        }
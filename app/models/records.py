@@ -0,0 +1,189 @@
+"""
+Compact track and artist records
+"""
+
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .genres import GENRE_VOCABULARY, unique_genre_ids
+
+# Packed audio feature columns, with the defaults SpotifyDataProcessor fills in
+AUDIO_FEATURE_DEFAULTS = [
+    ('danceability', 0.5), ('energy', 0.5), ('key', 0), ('loudness', -60), ('mode', 1),
+    ('speechiness', 0.0), ('acousticness', 0.0), ('instrumentalness', 0.0),
+    ('liveness', 0.0), ('valence', 0.5), ('tempo', 120.0)
+]
+AUDIO_FEATURE_NAMES = [name for name, _ in AUDIO_FEATURE_DEFAULTS]
+AUDIO_FEATURE_INDEX = {name: col for col, name in enumerate(AUDIO_FEATURE_NAMES)}
+
+
+def pack_audio_features(audio: Dict, dtype=np.float32) -> np.ndarray:
+    """Pack an audio features dict into AUDIO_FEATURE_NAMES order; missing values are NaN"""
+    return np.array([audio.get(name, np.nan) for name in AUDIO_FEATURE_NAMES], dtype=dtype)
+
+
+def packed_audio(track) -> Optional[np.ndarray]:
+    """Packed audio features of a Track record or a track dict, if it has any"""
+    if isinstance(track, Track):
+        return track.audio
+    audio = track.get('audio_features')
+    return None if audio is None else pack_audio_features(audio, dtype=np.float64)
+
+
+def _intern(value: str) -> str:
+    # str subclasses (e.g. numpy.str_) cannot be interned directly
+    return sys.intern(value if type(value) is str else str(value or ''))
+
+
+def _intern_all(values) -> Tuple[str, ...]:
+    return tuple(_intern(value) for value in values if isinstance(value, str))
+
+
+class Record:
+    """Slotted record with read-only dict-style access.
+
+    Subclasses list their public keys in ``FIELDS``; ``get``, ``[]``, ``in``
+    and ``keys`` behave like the dicts these records replace, so code written
+    against processed track/artist dicts keeps working.
+    """
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def keys(self) -> Iterator[str]:
+        return (key for key in self.FIELDS if key in self)
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Track(Record):
+    """A processed track.
+
+    Artist names, album and release date are interned strings shared by
+    every record that mentions them, and genres are held as GENRE_VOCABULARY
+    ids (``genres`` maps them back to names). Audio features are one float32
+    array in AUDIO_FEATURE_NAMES order (NaN where the payload had no value),
+    or None; the ``audio_features`` key rebuilds the dict on demand.
+    """
+
+    __slots__ = ('id', 'name', 'popularity', 'duration_ms', 'explicit',
+                 'artists', 'album', 'release_date', 'genre_ids', 'audio')
+    FIELDS = ('id', 'name', 'popularity', 'duration_ms', 'explicit',
+              'artists', 'album', 'release_date', 'genres', 'audio_features')
+
+    def __init__(self, id: Optional[str], name: str = '', popularity: int = 0, duration_ms: int = 0,
+                 explicit: bool = False, artists: Tuple[str, ...] = (), album: str = '',
+                 release_date: str = '', genres: Tuple[str, ...] = (), audio: Optional[np.ndarray] = None):
+        self.id = id
+        self.name = name
+        self.popularity = popularity
+        self.duration_ms = duration_ms
+        self.explicit = explicit
+        self.artists = artists
+        self.album = album
+        self.release_date = release_date
+        self.genre_ids = GENRE_VOCABULARY.encode(genres)
+        self.audio = audio
+
+    def __reduce__(self):
+        # Genre ids are per process, so pickles carry the names
+        return (type(self), (self.id, self.name, self.popularity, self.duration_ms, self.explicit,
+                             self.artists, self.album, self.release_date, self.genres, self.audio))
+
+    @classmethod
+    def from_api(cls, track: Dict) -> 'Track':
+        """Build a record from a Spotify API track payload"""
+        album = track.get('album', {})
+        artists = track.get('artists', [])
+        audio = track.get('audio_features')
+        record = cls(
+            track.get('id'),
+            track.get('name', ''),
+            track.get('popularity', 0),
+            track.get('duration_ms', 0),
+            track.get('explicit', False),
+            _intern_all(artist.get('name', '') for artist in artists),
+            _intern(album.get('name', '')),
+            _intern(album.get('release_date', '')),
+            (),
+            pack_audio_features(audio) if audio is not None else None
+        )
+        record.genre_ids = unique_genre_ids(
+            GENRE_VOCABULARY.encode(genre for artist in artists for genre in artist.get('genres', []))
+        )
+        return record
+
+    @property
+    def genres(self) -> Tuple[str, ...]:
+        return GENRE_VOCABULARY.names(self.genre_ids)
+
+    @property
+    def audio_features(self) -> Optional[Dict[str, float]]:
+        if self.audio is None:
+            return None
+        return {name: float(value) for name, value in zip(AUDIO_FEATURE_NAMES, self.audio)
+                if not np.isnan(value)}
+
+    def __getitem__(self, key: str):
+        if key == 'audio_features':
+            if self.audio is None:
+                raise KeyError(key)
+            return self.audio_features
+        return super().__getitem__(key)
+
+
+class Artist(Record):
+    """A processed artist; the name is interned and genres are GENRE_VOCABULARY ids"""
+
+    __slots__ = ('id', 'name', 'popularity', 'genre_ids', 'followers')
+    FIELDS = ('id', 'name', 'popularity', 'genres', 'followers')
+
+    def __init__(self, id: Optional[str], name: str = '', popularity: int = 0,
+                 genres: Tuple[str, ...] = (), followers: int = 0):
+        self.id = id
+        self.name = name
+        self.popularity = popularity
+        self.genre_ids = GENRE_VOCABULARY.encode(genres)
+        self.followers = followers
+
+    def __reduce__(self):
+        return (type(self), (self.id, self.name, self.popularity, self.genres, self.followers))
+
+    @property
+    def genres(self) -> Tuple[str, ...]:
+        return GENRE_VOCABULARY.names(self.genre_ids)
+
+    @classmethod
+    def from_api(cls, artist: Dict) -> 'Artist':
+        """Build a record from a Spotify API artist payload"""
+        return cls(
+            artist.get('id'),
+            _intern(artist.get('name', '')),
+            artist.get('popularity', 0),
+            artist.get('genres', []),
+            artist.get('followers', {}).get('total', 0)
+        )
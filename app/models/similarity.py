@@ -0,0 +1,77 @@
+"""
+Vectorized similarity helpers for the recommendation models
+"""
+
+import numpy as np
+from typing import List, Optional
+
+
+def top_k_indices(scores: np.ndarray, k: int, exclude: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return the indices of the k highest scores, best first.
+
+    Uses argpartition so only the selected k entries are sorted. Rows listed
+    in ``exclude`` are masked out before selection.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if exclude is not None and len(exclude):
+        scores = scores.copy()
+        scores[exclude] = -np.inf
+
+    n_valid = int(np.count_nonzero(scores != -np.inf))
+    k = min(k, n_valid)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k < len(scores):
+        candidates = np.sort(np.argpartition(-scores, k - 1)[:k])
+    else:
+        candidates = np.arange(len(scores))
+
+    # Stable sort keeps catalog order for equal scores
+    order = np.argsort(-scores[candidates], kind='stable')
+    return candidates[order][:k]
+
+
+def top_k_indices_batch(scores: np.ndarray, k: int) -> List[np.ndarray]:
+    """Row-wise ``top_k_indices`` for a (n_queries, n_items) score matrix.
+
+    Entries set to -inf are treated as excluded, so rows may return fewer
+    than k indices. Tie order matches ``top_k_indices``.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n_rows, n_cols = scores.shape
+    k = min(k, n_cols)
+    if k <= 0 or n_rows == 0:
+        return [np.empty(0, dtype=np.int64) for _ in range(n_rows)]
+
+    if k < n_cols:
+        candidates = np.sort(np.argpartition(-scores, k - 1, axis=1)[:, :k], axis=1)
+    else:
+        candidates = np.tile(np.arange(n_cols), (n_rows, 1))
+
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+    top = np.take_along_axis(candidates, order, axis=1)
+    n_valid = np.minimum(np.count_nonzero(scores != -np.inf, axis=1), k)
+    return [top[i, :n_valid[i]] for i in range(n_rows)]
+
+
+def sparse_dot_scores(matrix, query) -> np.ndarray:
+    """Score every row of a CSR matrix against a single sparse query row.
+
+    TF-IDF rows are L2-normalized, so the dot product equals cosine similarity.
+    """
+    if matrix is None or matrix.shape[0] == 0:
+        return np.empty(0, dtype=np.float64)
+    return np.asarray((matrix @ query.T).todense()).ravel()
+
+
+def sparse_batch_scores(matrix, queries) -> np.ndarray:
+    """Score every row of a CSR matrix against a block of query rows.
+
+    Returns a dense (n_queries, n_rows) matrix. Multiplying by the sparse
+    query block and densifying the transposed product yields C-ordered rows
+    directly, which is faster than a sparse-dense product plus a transpose.
+    """
+    if matrix is None or matrix.shape[0] == 0:
+        return np.empty((queries.shape[0], 0), dtype=np.float64)
+    return (matrix @ queries.T).T.toarray()
@@ -0,0 +1,137 @@
+"""
+Parallel model training pipeline
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from joblib import Parallel, delayed
+
+from .data_processor import SpotifyDataProcessor, batched
+from .interactions import InteractionMatrixBuilder
+
+
+def _process_users(chunk: List[Tuple[str, Dict]]) -> List[Tuple[str, List[Dict]]]:
+    """Processed tracks for a chunk of users (worker side)"""
+    processor = SpotifyDataProcessor()
+    return [
+        (user_id, processor.process_user_data(user_data.get('tracks', []),
+                                              user_data.get('artists', []))['tracks'])
+        for user_id, user_data in chunk
+    ]
+
+
+class TrainingPipeline:
+    """Trains a MusicAI model from raw user exports using several cores.
+
+    - user exports are processed in chunks on a process pool
+    - track documents are analyzed in chunks on the same number of processes
+    - the content-based and collaborative models then train concurrently
+      and the model is saved once both are done
+
+    ``n_workers=1`` runs every stage in this process, one after another.
+    ``run`` takes every user at once; ``run_streaming`` reads users in
+    bounded batches for exports larger than memory. Both fit the
+    content-based model on the latest processed copy of each distinct
+    track rather than on every listen.
+    """
+
+    def __init__(self, ai_model, n_workers: Optional[int] = None, chunk_size: int = 256):
+        self.ai_model = ai_model
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.timings: Dict[str, float] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def process_users(self, users_data: List[Tuple[str, Dict]]) -> List[Tuple[str, List[Dict]]]:
+        """Process raw user exports into (user id, processed tracks) pairs"""
+        users_data = list(users_data)
+        if self.n_workers == 1:
+            return _process_users(users_data)
+        chunks = [users_data[i:i + self.chunk_size] for i in range(0, len(users_data), self.chunk_size)]
+        parts = Parallel(n_jobs=self.n_workers)(delayed(_process_users)(chunk) for chunk in chunks)
+        return [user for part in parts for user in part]
+
+    def _train_content(self, tracks: List[Dict]):
+        start = time.perf_counter()
+        self.ai_model.train_content_based_model(tracks, save=False, n_jobs=self.n_workers)
+        self.timings['content'] = time.perf_counter() - start
+
+    def _train_collaborative(self, interactions: InteractionMatrixBuilder):
+        start = time.perf_counter()
+        self.ai_model.train_collaborative_from_interactions(interactions, save=False)
+        self.timings['collaborative'] = time.perf_counter() - start
+
+    def _train(self, tracks: List[Dict], interactions: InteractionMatrixBuilder):
+        """Train both models (concurrently with several workers) and save once"""
+        stages = []
+        if tracks:
+            stages.append((self._train_content, tracks))
+        if interactions.user_ids:
+            stages.append((self._train_collaborative, interactions))
+
+        start = time.perf_counter()
+        if self.n_workers == 1:
+            for stage, data in stages:
+                stage(data)
+        else:
+            # NMF spends most of its time in BLAS, which releases the GIL
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for future in [executor.submit(stage, data) for stage, data in stages]:
+                    future.result()
+        self.timings['training'] = time.perf_counter() - start
+
+        if stages:
+            self.ai_model.save_models()
+
+    @staticmethod
+    def _add_distinct(catalog: Dict[str, Dict], tracks: List[Dict]):
+        """Keep the latest processed copy of each track id"""
+        for track in tracks:
+            catalog[track.get('id')] = track
+
+    def _log_run(self, n_users: int, n_tracks: int):
+        self.logger.info(f"Trained on {n_users} users and {n_tracks} tracks "
+                         f"with {self.n_workers} workers: "
+                         + ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items()))
+
+    def run(self, users_data: List[Tuple[str, Dict]]) -> Dict:
+        """Process, train and save; returns per-stage timings in seconds"""
+        self.timings = {}
+        start = time.perf_counter()
+        user_tracks_data = self.process_users(users_data)
+        interactions = InteractionMatrixBuilder().add_users(user_tracks_data)
+        self.timings['processing'] = time.perf_counter() - start
+
+        catalog: Dict[str, Dict] = {}
+        for _, tracks in user_tracks_data:
+            self._add_distinct(catalog, tracks)
+        tracks = list(catalog.values())
+        self._train(tracks, interactions)
+        self._log_run(len(user_tracks_data), len(tracks))
+        return dict(self.timings)
+
+    def run_streaming(self, users_data: Iterable[Tuple[str, Dict]], batch_size: int = 1000) -> Dict:
+        """Train from a stream of users (e.g. ``iter_user_exports``) in bounded batches.
+
+        Only one batch of raw user data is held at a time. What is kept between
+        batches is the interaction arrays and the distinct tracks.
+        """
+        self.timings = {}
+        start = time.perf_counter()
+        interactions = InteractionMatrixBuilder()
+        catalog: Dict[str, Dict] = {}
+        for batch in batched(users_data, batch_size):
+            for user_id, tracks in self.process_users(batch):
+                interactions.add_user(user_id, tracks)
+                self._add_distinct(catalog, tracks)
+        self.timings['processing'] = time.perf_counter() - start
+
+        tracks = list(catalog.values())
+        del catalog
+        self._train(tracks, interactions)
+        self._log_run(len(interactions.user_ids), len(tracks))
+        return dict(self.timings)
@@ -4,8 +4,12 @@ API routes for AJAX endpoints
 
 from flask import Blueprint, request, jsonify
 from app.services.spotify_service import SpotifyService, get_spotify_album_image
+from app.services.async_spotify_service import async_spotify_service
 from app.services.ai_client_service import AIClientService
 from app.services.auth_service import AuthService
+from app.services.analysis_cache import analysis_cache
+from app.services.cache import response_cache
+from app.services.track_cache import track_cache
 from app.constants import (
     DEFAULT_MOOD, DEFAULT_GENRE, DEFAULT_LANGUAGE, DEFAULT_LIMIT, SEARCH_LIMIT,
     ARTIST_TOP_TRACKS_LIMIT, SIMILAR_ARTISTS_LIMIT, RECOMMENDATIONS_LIMIT,
@@ -65,6 +69,18 @@ def user_stats():
     
     return jsonify(stats)
 
+@bp.route('/cache-stats')
+def cache_stats():
+    """Hit rates of the server-side caches"""
+    if not auth_service.is_authenticated():
+        return jsonify({'error': MESSAGES["NOT_AUTHENTICATED"]}), HTTP_STATUS["UNAUTHORIZED"]
+    
+    return jsonify({
+        'analysis': analysis_cache.stats(),
+        'spotify': response_cache.stats(),
+        'tracks': track_cache.stats()
+    })
+
 @bp.route('/search-tracks')
 def search_tracks():
     """Search for tracks"""
@@ -120,25 +136,29 @@ def discover():
     seed_artists = []
     seed_tracks = []
     
-    for seed in search_seeds:
-        if seed.startswith('track:'):
-            track_id = seed.split(':', 1)[1]
-            track_info = spotify_service.get_track(track_id)
-            if track_info:
-                for artist in track_info.get('artists', []):
-                    seed_artists.append(artist['name'])
-                seed_tracks.append(track_info.get('name', ''))
+    seed_track_ids = [seed.split(':', 1)[1] for seed in search_seeds if seed.startswith('track:')]
+    for track_info in spotify_service.get_tracks(seed_track_ids):
+        if track_info:
+            for artist in track_info.get('artists', []):
+                seed_artists.append(artist['name'])
+            seed_tracks.append(track_info.get('name', ''))
     # Remove duplicates
     seed_artists = list(set(seed_artists))
     seed_tracks = list(set(seed_tracks))
 
-    # Get user's top artists and tracks for AI discovery (fallback if no seeds)
+    # Get user's top artists and tracks for AI discovery (fallback if no seeds), concurrently
+    pending = {}
     if not seed_artists:
-        top_artists = spotify_service.get_top_artists(limit=ARTIST_TOP_TRACKS_LIMIT)
+        pending['top_artists'] = async_spotify_service.get_top_artists(limit=ARTIST_TOP_TRACKS_LIMIT)
+    if not seed_tracks:
+        pending['top_tracks'] = async_spotify_service.get_top_tracks(limit=RECOMMENDATIONS_LIMIT)
+    fetched = dict(zip(pending, async_spotify_service.gather(*pending.values())))
+    if 'top_artists' in fetched:
+        top_artists = fetched['top_artists']
         artist_names = [artist['name'] for artist in top_artists.get('items', [])]
         seed_artists = artist_names
-    if not seed_tracks:
-        top_tracks = spotify_service.get_top_tracks(limit=RECOMMENDATIONS_LIMIT)
+    if 'top_tracks' in fetched:
+        top_tracks = fetched['top_tracks']
         track_names = [track['name'] for track in top_tracks.get('items', [])]
         seed_tracks = track_names
 
@@ -176,14 +196,15 @@ def discover():
         
         # Mood filtering
         if mood in MOOD_KEYWORDS:
-            mood_tracks = []
+            searches = []
             for keyword in MOOD_KEYWORDS[mood][:2]:
                 language_filter = get_language_filter(language)
                 search_query = keyword
                 if language_filter:
                     search_query = f"{keyword} {language_filter}"
-                search_results = spotify_service.search_tracks(search_query, limit=5)
-                mood_tracks.extend(search_results)
+                searches.append(async_spotify_service.search_tracks(search_query, limit=5))
+            mood_tracks = [track for search_results in async_spotify_service.gather(*searches)
+                           for track in search_results]
             all_tracks = mood_tracks + all_tracks
         
         return jsonify({
@@ -195,10 +216,8 @@ def discover():
     
     recommendations = []
     if ai_discoveries and isinstance(ai_discoveries['discoveries'], list):
-        for track_id in ai_discoveries['discoveries']:
-            track_info = spotify_service.get_track(track_id)
-            if track_info:
-                recommendations.append(track_info)
+        recommendations = [track_info for track_info in spotify_service.get_tracks(ai_discoveries['discoveries'])
+                           if track_info]
     
     return jsonify({
         'success': True,
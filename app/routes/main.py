@@ -2,12 +2,14 @@
 Main routes for the application
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, copy_current_request_context
 from app.services.spotify_service import SpotifyService
+from app.services.async_spotify_service import async_spotify_service
 from app.services.ai_client_service import AIClientService
 from app.services.auth_service import AuthService
+from app.services.analysis_cache import analysis_cache
 from app.constants import (
-    DISPLAY_LIMITS, DEFAULT_TIME_RANGE, MESSAGES, HTTP_STATUS
+    DISPLAY_LIMITS, DEFAULT_TIME_RANGE, MESSAGES, HTTP_STATUS, TimeRange
 )
 
 bp = Blueprint('main', __name__)
@@ -27,12 +29,12 @@ def dashboard():
         return redirect(url_for('auth.login'))
     
     try:
-        # Get user profile
-        user = spotify_service.get_user_profile()
-        
-        # Get recent tracks and top artists
-        recent_tracks = spotify_service.get_recent_tracks(limit=DISPLAY_LIMITS["DASHBOARD_RECENT_TRACKS"])
-        top_artists = spotify_service.get_top_artists(limit=DISPLAY_LIMITS["DASHBOARD_TOP_ARTISTS"], time_range=DEFAULT_TIME_RANGE)
+        # Get user profile, recent tracks and top artists concurrently
+        user, recent_tracks, top_artists = async_spotify_service.gather(
+            async_spotify_service.get_user_profile(),
+            async_spotify_service.get_recent_tracks(limit=DISPLAY_LIMITS["DASHBOARD_RECENT_TRACKS"]),
+            async_spotify_service.get_top_artists(limit=DISPLAY_LIMITS["DASHBOARD_TOP_ARTISTS"], time_range=DEFAULT_TIME_RANGE)
+        )
         
         return render_template('dashboard.html', 
                              user=user, 
@@ -53,36 +55,61 @@ def discover():
     
     return render_template('discover.html')
 
+def _build_analysis(time_range):
+    """Spotify and AI analysis for the current user, fetching each upstream resource once"""
+    top_tracks, top_artists, recent_tracks = async_spotify_service.gather(
+        async_spotify_service.get_top_tracks(limit=DISPLAY_LIMITS["ANALYZE_TOP_TRACKS"], time_range=time_range),
+        async_spotify_service.get_top_artists(limit=DISPLAY_LIMITS["ANALYZE_TOP_ARTISTS"], time_range=time_range),
+        async_spotify_service.get_recent_tracks(limit=DISPLAY_LIMITS["ANALYZE_RECENT_TRACKS"])
+    )
+    
+    # Get comprehensive music analysis
+    analysis = spotify_service.get_music_analysis(time_range, top_tracks=top_tracks, top_artists=top_artists)
+    
+    # Extract names for AI analysis
+    artist_names = [artist['name'] for artist in top_artists.get('items', [])]
+    track_names = [track['name'] for track in top_tracks.get('items', [])]
+    recent_track_names = [track['track']['name'] for track in recent_tracks.get('items', [])]
+    
+    # Get AI analysis from treble-clef microservice
+    ai_analysis = ai_client.analyze_music_taste(
+        top_artists=artist_names,
+        top_tracks=track_names,
+        recent_tracks=recent_track_names
+    )
+    
+    return {'analysis': analysis, 'ai_analysis': ai_analysis}
+
+def _analysis_succeeded(result):
+    # Failed treble-clef calls are retried on the next page load rather than cached
+    return bool(result['analysis']) and result['ai_analysis'].get('success', True) is not False
+
 @bp.route('/analyze')
 def analyze():
     """Music analysis page"""
     if not auth_service.is_authenticated():
         return redirect(url_for('auth.login'))
     
+    time_range = request.args.get('time_range', DEFAULT_TIME_RANGE)
+    if time_range not in {tr.value for tr in TimeRange}:
+        time_range = DEFAULT_TIME_RANGE
+    
     try:
-        # Get comprehensive music analysis
-        analysis = spotify_service.get_music_analysis()
+        # Stale results are refreshed in the background, with a copy of this request's session
+        @copy_current_request_context
+        def compute():
+            return _build_analysis(time_range)
         
-        # Get user's top artists and tracks for AI analysis
-        top_artists = spotify_service.get_top_artists(limit=10)
-        top_tracks = spotify_service.get_top_tracks(limit=10)
-        recent_tracks = spotify_service.get_recent_tracks(limit=10)
-        
-        # Extract names for AI analysis
-        artist_names = [artist['name'] for artist in top_artists.get('items', [])]
-        track_names = [track['name'] for track in top_tracks.get('items', [])]
-        recent_track_names = [track['track']['name'] for track in recent_tracks.get('items', [])]
-        
-        # Get AI analysis from treble-clef microservice
-        ai_analysis = ai_client.analyze_music_taste(
-            top_artists=artist_names,
-            top_tracks=track_names,
-            recent_tracks=recent_track_names
-        )
+        user_id = spotify_service.get_user_id()
+        if user_id is None:
+            # Without an id the key would be shared by every such user
+            result = compute()
+        else:
+            result = analysis_cache.get((user_id, time_range), compute, cacheable=_analysis_succeeded)
         
         return render_template('analyze.html', 
-                             analysis=analysis,
-                             ai_analysis=ai_analysis)
+                             analysis=result['analysis'],
+                             ai_analysis=result['ai_analysis'])
     except Exception as e:
         flash(f'Error loading analysis: {str(e)}', 'error')
         return render_template('analyze.html', 
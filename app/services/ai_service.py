@@ -4,7 +4,8 @@ Custom AI service for music recommendations and analysis
 
 from app.services.spotify_service import SpotifyService
 from app.models.ai_model import MusicAI
-from app.models.data_processor import SpotifyDataProcessor
+from app.models.data_processor import SpotifyDataProcessor, iter_user_exports
+from app.models.training import TrainingPipeline
 from config.settings import Config
 from app.constants import DEFAULT_LIMIT, MESSAGES
 import logging
@@ -250,39 +251,93 @@ class AIService:
                 'ai_generated': False
             }
     
-    def train_model(self, users_data):
+    def get_batch_recommendations(self, user_requests, limit=DEFAULT_LIMIT):
+        """Get hybrid recommendations for many users in one call
+        
+        Each request carries its own ``user_id``, ``seed_tracks`` and optional
+        ``mood``/``genre``, so no Spotify calls are made here.
+        """
+        try:
+            recommendations = self.ai_model.get_batch_recommendations(
+                user_requests,
+                n_recommendations=limit
+            )
+            
+            return {
+                'success': True,
+                'recommendations': recommendations,
+                'ai_generated': True
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Batch recommendations error: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'ai_generated': False
+            }
+    
+    def train_model(self, users_data, n_workers=None):
         """Train the AI model with user data"""
         try:
             self.logger.info("Starting model training...")
             
-            # Process training data
-            training_data = []
+            # Chunked processing and featurization on a process pool, then
+            # content-based and collaborative training side by side
+            pipeline = TrainingPipeline(
+                self.ai_model,
+                n_workers=n_workers or Config.TRAINING_WORKERS,
+                chunk_size=Config.TRAINING_CHUNK_SIZE
+            )
+            timings = pipeline.run(users_data)
+            
+            self.logger.info("Model training completed successfully")
+            return {'success': True, 'message': 'Model trained successfully', 'timings': timings}
+            
+        except Exception as e:
+            self.logger.error(f"Model training error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def train_model_from_exports(self, paths, n_workers=None):
+        """Train the AI model from NDJSON/JSON user export files, streamed in batches"""
+        try:
+            self.logger.info(f"Starting streaming model training from {paths}...")
+            
+            pipeline = TrainingPipeline(
+                self.ai_model,
+                n_workers=n_workers or Config.TRAINING_WORKERS,
+                chunk_size=Config.TRAINING_CHUNK_SIZE
+            )
+            timings = pipeline.run_streaming(iter_user_exports(paths), batch_size=Config.TRAINING_BATCH_SIZE)
+            
+            self.logger.info("Model training completed successfully")
+            return {'success': True, 'message': 'Model trained successfully', 'timings': timings}
+            
+        except Exception as e:
+            self.logger.error(f"Model training error: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def update_model(self, users_data):
+        """Incrementally update the AI model with new or changed users"""
+        try:
+            self.logger.info(f"Starting incremental update for {len(users_data)} users...")
+            
+            # Only the delta is processed; the existing model is extended in place
+            all_tracks = []
+            user_tracks_data = []
             for user_id, user_data in users_data:
                 processed = self.data_processor.process_user_data(
                     user_data.get('tracks', []),
                     user_data.get('artists', [])
                 )
-                training_data.append((user_id, processed))
-            
-            # Train content-based model
-            all_tracks = []
-            for user_id, processed in training_data:
                 all_tracks.extend(processed['tracks'])
-            
-            if all_tracks:
-                self.ai_model.train_content_based_model(all_tracks)
-            
-            # Train collaborative filtering model
-            user_tracks_data = []
-            for user_id, processed in training_data:
                 user_tracks_data.append((user_id, processed['tracks']))
             
-            if user_tracks_data:
-                self.ai_model.train_collaborative_model(user_tracks_data)
+            result = self.ai_model.update(all_tracks, user_tracks_data)
             
-            self.logger.info("Model training completed successfully")
-            return {'success': True, 'message': 'Model trained successfully'}
+            self.logger.info(f"Incremental update completed: {result}")
+            return {'success': True, 'message': 'Model updated successfully', **result}
             
         except Exception as e:
-            self.logger.error(f"Model training error: {e}")
-            return {'success': False, 'error': str(e)} 
\ No newline at end of file
+            self.logger.error(f"Model update error: {e}")
+            return {'success': False, 'error': str(e)}
@@ -0,0 +1,147 @@
+"""
+Per-user analysis result cache with TTL and stale-while-revalidate
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config.settings import Config
+
+
+class AnalysisCache:
+    """Computed analysis results keyed by (user id, time range).
+
+    A result younger than ``ttl`` seconds is served as is. Up to
+    ``stale_ttl`` seconds past that it is still served, and one background
+    refresh replaces it; older results are recomputed in the request.
+    Concurrent misses for the same key share one computation. The least
+    recently used entries are dropped past ``max_entries``.
+    """
+
+    def __init__(self, ttl: float = 300, stale_ttl: float = 3600, max_entries: int = 10000,
+                 refresh_workers: int = 2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.refresh_workers = refresh_workers
+        # key -> (created at, value)
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refresh_errors = 0
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                thread_name_prefix='analysis-refresh')
+        return self._executor
+
+    def get(self, key: Hashable, compute: Callable[[], Any],
+            cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Cached value for key, computing it with ``compute()`` when missing or expired.
+
+        ``cacheable(value)`` can reject results that should not be kept (e.g.
+        failed upstream calls); they are returned but not stored. ``compute``
+        may run on a background thread for stale entries, so anything it
+        needs from the request must be bound beforehand.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._pending:
+                        self._pending[key] = self._get_executor().submit(self._refresh, key, compute, cacheable)
+                    return entry[1]
+
+            # Wait for a computation already running for this key
+            waiting = self._pending.get(key)
+            if waiting is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                pending = self._pending[key] = Future()
+        if waiting is not None:
+            return waiting.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set_exception(e)
+            raise
+        self._finish(key, value, cacheable)
+        pending.set_result(value)
+        return value
+
+    def _refresh(self, key: Hashable, compute: Callable[[], Any], cacheable: Optional[Callable[[Any], bool]]):
+        try:
+            value = compute()
+        except Exception as e:
+            self.logger.warning(f"Background refresh of {key} failed: {e}")
+            with self._lock:
+                self.refresh_errors += 1
+                self._pending.pop(key, None)
+            # Requests waiting on this refresh see the error
+            raise
+        self._finish(key, value, cacheable)
+        return value
+
+    def _finish(self, key: Hashable, value: Any, cacheable: Optional[Callable[[Any], bool]]):
+        with self._lock:
+            self._pending.pop(key, None)
+            if cacheable is not None and not cacheable(value):
+                return
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = (time.monotonic(), value)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'refresh_errors': self.refresh_errors,
+                'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            }
+
+
+analysis_cache = AnalysisCache(
+    ttl=Config.ANALYSIS_CACHE_TTL,
+    stale_ttl=Config.ANALYSIS_CACHE_STALE_TTL,
+    max_entries=Config.ANALYSIS_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,160 @@
+"""
+Asyncio Spotify API service for concurrent fan-out from routes
+"""
+
+import asyncio
+import logging
+import threading
+
+import httpx
+from flask import session
+
+from app.services.auth_service import AuthService
+from app.services.cache import response_cache
+from app.services.spotify_service import SpotifyService
+from app.constants import DEFAULT_LIMIT, MAX_LIMIT, DEFAULT_TIME_RANGE, DISPLAY_LIMITS, SPOTIFY, CACHE_TTLS
+from config.settings import Config
+
+
+class _LoopThread:
+    """An event loop running forever on a daemon thread"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='spotify-async', daemon=True)
+        self.thread.start()
+
+    def run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+
+class AsyncSpotifyService:
+    """Spotify read endpoints as coroutines over one shared httpx connection pool
+
+    Methods return coroutines; ``gather`` runs several on a background event
+    loop and waits for all of them, so a synchronous route pays for the
+    slowest call rather than the sum. The access token and user id are read
+    from the session when a coroutine is created, so create them inside the
+    request. Reads share the response cache and its keys with SpotifyService.
+    """
+
+    def __init__(self, cache=None, base_url=SPOTIFY["API_URL"], max_connections=None, timeout=5.0):
+        self.auth_service = AuthService()
+        self.cache = cache if cache is not None else response_cache
+        self.base_url = base_url
+        self.max_connections = max_connections or Config.SPOTIFY_MAX_CONCURRENCY
+        self.timeout = timeout
+        self._runner = None
+        self._http = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _get_runner(self):
+        with self._lock:
+            if self._runner is None:
+                self._runner = _LoopThread()
+        return self._runner
+
+    def _get_http(self):
+        # Created on the loop thread, the only place it is used
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+        return self._http
+
+    def gather(self, *coros, timeout=None):
+        """Run coroutines concurrently and return their results in order; the first error is raised"""
+        async def gather_all():
+            return await asyncio.gather(*coros)
+        return self._get_runner().run(gather_all(), timeout)
+
+    def close(self):
+        """Close the connection pool and stop the event loop"""
+        if self._runner is not None:
+            if self._http is not None:
+                self._runner.run(self._http.aclose())
+                self._http = None
+            self._runner.loop.call_soon_threadsafe(self._runner.loop.stop)
+            self._runner = None
+
+    async def _get(self, token, path, params):
+        headers = {'Authorization': f'Bearer {token}'}
+        response = await self._get_http().get(path, params=params, headers=headers)
+        if response.status_code == 429:
+            # Rate limited: wait as asked (capped) and try once more
+            delay = min(float(response.headers.get('Retry-After', 1)), 5.0)
+            await asyncio.sleep(delay)
+            response = await self._get_http().get(path, params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    async def _done(value):
+        return value
+
+    async def _fetch(self, endpoint, path, token, key, params, default):
+        if token is None:
+            return default
+        value = await self._get(token, path, params)
+        if key is not None:
+            # Off the loop thread: a shared (Redis) cache write must not stall other requests
+            ttl = CACHE_TTLS.get(endpoint, Config.CACHE_DEFAULT_TIMEOUT)
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.set, key, value, ttl)
+        return value
+
+    def _read(self, endpoint, path, default, user_scoped=True, **params):
+        """Coroutine for a GET, bound to the current session's token and user
+
+        The cache is checked here, in the calling request thread, so cache
+        round trips never run on the shared event loop.
+        """
+        token = self.auth_service.get_access_token()
+        user_id = session.get('user_id') if user_scoped else ''
+        # Same keys as SpotifyService._cached (no caching before the user id is known)
+        key = None if user_id is None else SpotifyService._cache_key(endpoint, user_id, (), params)
+        if token is not None and key is not None:
+            found, value = self.cache.get(key)
+            if found:
+                return self._done(value)
+        return self._fetch(endpoint, path, token, key, params, default)
+
+    def get_user_profile(self):
+        """Get current user profile"""
+        # Not cached: the profile is what the user id comes from
+        return self._fetch('profile', 'me', self.auth_service.get_access_token(), None, {}, None)
+
+    def get_recent_tracks(self, limit=DEFAULT_LIMIT):
+        """Get user's recently played tracks"""
+        return self._read('recent_tracks', 'me/player/recently-played', [], limit=limit)
+
+    def get_top_artists(self, limit=DEFAULT_LIMIT, time_range=DEFAULT_TIME_RANGE):
+        """Get user's top artists"""
+        return self._read('top_artists', 'me/top/artists', [], limit=limit, time_range=time_range)
+
+    def get_top_tracks(self, limit=DEFAULT_LIMIT, time_range=DEFAULT_TIME_RANGE):
+        """Get user's top tracks"""
+        return self._read('top_tracks', 'me/top/tracks', [], limit=limit, time_range=time_range)
+
+    def get_user_playlists(self, limit=MAX_LIMIT):
+        """Get user's playlists"""
+        return self._read('playlists', 'me/playlists', [], limit=limit)
+
+    async def _search_items(self, search, kind):
+        # Like SpotifyService's searches, a failed search yields no results
+        try:
+            results = await search
+        except Exception as e:
+            print(f"{kind.title()} search error: {e}")
+            return []
+        return results.get(f'{kind}s', {}).get('items', []) if results else []
+
+    def search_tracks(self, query, limit=DISPLAY_LIMITS["SEARCH_RESULTS"]):
+        """Search for tracks"""
+        return self._search_items(self._read('search', 'search', {}, q=query, type='track', limit=limit), 'track')
+
+
+async_spotify_service = AsyncSpotifyService()
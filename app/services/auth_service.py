@@ -39,6 +39,8 @@ class AuthService:
             if token_info:
                 session['token_info'] = token_info
                 session['expires_at'] = int(time.time()) + token_info['expires_in']
+                # The token may belong to a different account; look the id up again
+                session.pop('user_id', None)
                 return True
         except Exception as e:
             print(f"OAuth callback error: {e}")
@@ -0,0 +1,231 @@
+"""
+Response cache backends for Spotify API reads
+"""
+
+import copy
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import Config
+
+_MISSING = (False, None)
+
+
+class CacheBackend:
+    """Base class for key/value stores with per-entry TTLs.
+
+    ``get`` returns ``(found, value)`` so that falsy values can be cached.
+    Keys are strings; ``delete_prefix`` drops every key starting with a prefix.
+    """
+
+    name = None
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """Bounded in-process LRU; the least recently used entry is evicted past ``max_entries``
+
+    Values are copied in and out, like a round trip through a shared backend,
+    so a caller that edits a response cannot change the cached entry.
+    """
+
+    name = 'simple'
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        # key -> (expires at, value)
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            value = entry[1]
+        return True, copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        if self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache(CacheBackend):
+    """Redis-backed store shared by every worker (needs the ``redis`` package)"""
+
+    name = 'redis'
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', prefix: str = 'spotify-ai:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        data = self.client.get(self.prefix + key)
+        return _MISSING if data is None else (True, pickle.loads(data))
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self.prefix + key, pickle.dumps(value), px=max(int(ttl * 1000), 1))
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self.client.scan_iter(match=self.prefix + prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix('')
+
+
+CACHE_BACKENDS = {
+    MemoryCache.name: MemoryCache,
+    RedisCache.name: RedisCache,
+}
+
+
+def create_cache_backend(kind: str, **params) -> CacheBackend:
+    """Create a cache backend by name ('simple' or 'redis')"""
+    if kind not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache type: {kind}")
+    return CACHE_BACKENDS[kind](**params)
+
+
+class ResponseCache:
+    """In-process LRU in front of an optional shared backend.
+
+    Reads try the local LRU, then the shared backend; writes go to both.
+    With a shared backend, local copies live at most ``local_ttl`` seconds
+    so that workers do not drift far from the shared entries. A shared
+    backend that fails is logged and skipped, leaving the in-process LRU.
+    """
+
+    def __init__(self, local: Optional[MemoryCache] = None, shared: Optional[CacheBackend] = None,
+                 local_ttl: float = 30):
+        self.local = local if local is not None else MemoryCache()
+        self.shared = shared
+        self.local_ttl = local_ttl
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.shared_errors = 0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _local_ttl(self, ttl: float) -> float:
+        return ttl if self.shared is None else min(ttl, self.local_ttl)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        found, value = self.local.get(key)
+        if found:
+            self._count('hits')
+            return found, value
+        if self.shared is not None:
+            try:
+                found, value = self.shared.get(key)
+            except Exception as e:
+                self._count('shared_errors')
+                self.logger.warning(f"Shared cache read failed: {e}")
+                found = False
+            if found:
+                self._count('shared_hits')
+                self.local.set(key, value, self.local_ttl)
+                return found, value
+        self._count('misses')
+        return _MISSING
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.local.set(key, value, self._local_ttl(ttl))
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, ttl)
+            except Exception as e:
+                self._count('shared_errors')
+                self.logger.warning(f"Shared cache write failed: {e}")
+
+    def delete_prefix(self, prefix: str):
+        self.local.delete_prefix(prefix)
+        if self.shared is not None:
+            try:
+                self.shared.delete_prefix(prefix)
+            except Exception as e:
+                self._count('shared_errors')
+                self.logger.warning(f"Shared cache delete failed: {e}")
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits, shared_hits, misses, shared_errors = self.hits, self.shared_hits, self.misses, self.shared_errors
+        lookups = hits + shared_hits + misses
+        return {
+            'backend': self.shared.name if self.shared is not None else self.local.name,
+            'entries': len(self.local),
+            'hits': hits,
+            'shared_hits': shared_hits,
+            'misses': misses,
+            'evictions': self.local.evictions,
+            'expirations': self.local.expirations,
+            'shared_errors': shared_errors,
+            'hit_rate': (hits + shared_hits) / lookups if lookups else 0.0
+        }
+
+    @classmethod
+    def from_config(cls, config=Config) -> 'ResponseCache':
+        """Local LRU sized by CACHE_MAX_ENTRIES, shared through CACHE_TYPE unless it is 'simple'"""
+        shared = None
+        if config.CACHE_TYPE != MemoryCache.name:
+            try:
+                shared = create_cache_backend(config.CACHE_TYPE, url=config.CACHE_REDIS_URL)
+            except ImportError as e:
+                logging.getLogger(__name__).warning(f"Shared cache unavailable, using in-process only: {e}")
+        return cls(MemoryCache(config.CACHE_MAX_ENTRIES), shared, local_ttl=config.CACHE_LOCAL_TTL)
+
+
+response_cache = ResponseCache.from_config()
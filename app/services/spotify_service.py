@@ -2,28 +2,104 @@
 Spotify API service
 """
 
-from spotipy import Spotify
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, session, has_app_context, has_request_context, copy_current_request_context
+from spotipy import Spotify, SpotifyException
 from app.services.auth_service import AuthService
+from app.services.cache import response_cache
+from app.services.track_cache import track_cache
+from app.models.genres import GenreCounts
 from app.constants import (
     DEFAULT_LIMIT, MAX_LIMIT, ARTIST_TOP_TRACKS_LIMIT, SIMILAR_ARTISTS_LIMIT,
-    DEFAULT_TIME_RANGE, SPOTIFY, DISPLAY_LIMITS
+    DEFAULT_TIME_RANGE, SPOTIFY, DISPLAY_LIMITS, CACHE_TTLS, HTTP_STATUS
 )
+from config.settings import Config
 import requests
 
 class SpotifyService:
-    """Handles Spotify API interactions"""
+    """Handles Spotify API interactions
     
-    def __init__(self):
+    Reads go through a response cache (shared by every instance) keyed by
+    endpoint, user and arguments, with per-endpoint TTLs from CACHE_TTLS.
+    Independent per-artist calls run on a thread pool of
+    SPOTIFY_MAX_CONCURRENCY workers.
+    """
+    
+    def __init__(self, cache=None, max_workers=None):
         self.auth_service = AuthService()
-        self.client = None
+        self.cache = cache if cache is not None else response_cache
+        self.max_workers = max_workers or Config.SPOTIFY_MAX_CONCURRENCY
+        self._executor = None
+        self._executor_lock = threading.Lock()
     
     def _get_client(self):
-        """Get or create Spotify client"""
-        if not self.client:
-            token = self.auth_service.get_access_token()
-            if token:
-                self.client = Spotify(auth=token)
-        return self.client
+        """Get or create a Spotify client for the current user's token
+        
+        The client is kept on ``flask.g`` for the rest of the request, never
+        on this instance: routes share one service across users and threads.
+        """
+        token = self.auth_service.get_access_token()
+        if not token:
+            return None
+        client = g.get('spotify_client') if has_app_context() else None
+        if client is None or g.get('spotify_token') != token:
+            client = Spotify(auth=token)
+            if has_app_context():
+                g.spotify_client = client
+                g.spotify_token = token
+        return client
+    
+    def _cached(self, endpoint, fetch, *args, user_scoped=True, **kwargs):
+        """Call ``fetch(*args, **kwargs)`` through the response cache
+        
+        User-scoped reads are keyed on the user id as well; without one they
+        skip the cache. Exceptions propagate and nothing is cached.
+        """
+        user_id = self.get_user_id() if user_scoped else ''
+        if user_id is None:
+            return fetch(*args, **kwargs)
+        
+        key = self._cache_key(endpoint, user_id, args, kwargs)
+        found, value = self.cache.get(key)
+        if not found:
+            value = fetch(*args, **kwargs)
+            self.cache.set(key, value, CACHE_TTLS.get(endpoint, Config.CACHE_DEFAULT_TIMEOUT))
+        return value
+    
+    @staticmethod
+    def _cache_key(endpoint, user_id, args, kwargs):
+        return f"{endpoint}:{user_id}:{args!r}:{sorted(kwargs.items())!r}"
+    
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='spotify')
+        return self._executor
+    
+    def _fan_out(self, fn, items):
+        """``[fn(item) for item in items]``, run concurrently on the thread pool
+        
+        Each call gets its own copy of the request context, so the session
+        stays readable from worker threads. Exceptions propagate; ``fn``
+        should handle the ones it can skip.
+        """
+        items = list(items)
+        if len(items) < 2 or self.max_workers == 1:
+            return [fn(item) for item in items]
+        executor = self._get_executor()
+        if has_request_context():
+            futures = [executor.submit(copy_current_request_context(fn), item) for item in items]
+        else:
+            futures = [executor.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+    
+    def invalidate(self, endpoint):
+        """Drop the current user's cached responses for an endpoint"""
+        user_id = self.get_user_id()
+        if user_id is not None:
+            self.cache.delete_prefix(f"{endpoint}:{user_id}:")
     
     def get_user_profile(self):
         """Get current user profile"""
@@ -32,77 +108,93 @@ class SpotifyService:
             return client.current_user()
         return None
     
+    def get_user_id(self):
+        """Current user's Spotify id, remembered in the session"""
+        user_id = session.get('user_id')
+        if user_id is None:
+            user = self.get_user_profile()
+            if user:
+                user_id = session['user_id'] = user['id']
+        return user_id
+    
     def get_recent_tracks(self, limit=DEFAULT_LIMIT):
         """Get user's recently played tracks"""
         client = self._get_client()
         if client:
-            return client.current_user_recently_played(limit=limit)
+            return self._cached('recent_tracks', client.current_user_recently_played, limit=limit)
         return []
     
     def get_top_artists(self, limit=DEFAULT_LIMIT, time_range=DEFAULT_TIME_RANGE):
         """Get user's top artists"""
         client = self._get_client()
         if client:
-            return client.current_user_top_artists(limit=limit, time_range=time_range)
+            return self._cached('top_artists', client.current_user_top_artists, limit=limit, time_range=time_range)
         return []
     
     def get_top_tracks(self, limit=DEFAULT_LIMIT, time_range=DEFAULT_TIME_RANGE):
         """Get user's top tracks"""
         client = self._get_client()
         if client:
-            return client.current_user_top_tracks(limit=limit, time_range=time_range)
+            return self._cached('top_tracks', client.current_user_top_tracks, limit=limit, time_range=time_range)
         return []
     
     def get_user_playlists(self, limit=MAX_LIMIT):
         """Get user's playlists"""
         client = self._get_client()
         if client:
-            return client.current_user_playlists(limit=limit)
+            return self._cached('playlists', client.current_user_playlists, limit=limit)
         return []
     
     def get_saved_tracks(self, limit=MAX_LIMIT):
         """Get user's saved tracks"""
         client = self._get_client()
         if client:
-            return client.current_user_saved_tracks(limit=limit)
+            return self._cached('saved_tracks', client.current_user_saved_tracks, limit=limit)
         return []
     
     def get_playlist_tracks(self, playlist_id):
         """Get tracks from a playlist"""
         client = self._get_client()
         if client:
-            return client.playlist_tracks(playlist_id)
+            return self._cached('playlist_tracks', client.playlist_tracks, playlist_id)
         return []
     
     def create_playlist(self, name, description="", public=True):
         """Create a new playlist"""
         client = self._get_client()
         if client:
-            user_id = client.current_user()['id']
-            return client.user_playlist_create(
+            user_id = self.get_user_id()
+            playlist = client.user_playlist_create(
                 user=user_id,
                 name=name,
                 description=description,
                 public=public
             )
+            self.invalidate('playlists')
+            return playlist
         return None
     
     def add_tracks_to_playlist(self, playlist_id, track_uris):
         """Add tracks to a playlist"""
         client = self._get_client()
         if client:
-            return client.playlist_add_items(playlist_id, track_uris)
+            result = client.playlist_add_items(playlist_id, track_uris)
+            self.invalidate('playlist_tracks')
+            self.invalidate('playlists')
+            return result
         return None
     
-    def get_music_analysis(self):
-        """Get comprehensive music analysis"""
+    def get_music_analysis(self, time_range=DEFAULT_TIME_RANGE, top_tracks=None, top_artists=None):
+        """Get comprehensive music analysis (top tracks/artists already fetched can be passed in)"""
         client = self._get_client()
         if not client:
             return {}
         
         # Get top tracks and artists
-        top_tracks = self.get_top_tracks(limit=DISPLAY_LIMITS["ANALYZE_TOP_TRACKS"])
-        top_artists = self.get_top_artists(limit=DISPLAY_LIMITS["ANALYZE_TOP_ARTISTS"])
+        if top_tracks is None:
+            top_tracks = self.get_top_tracks(limit=DISPLAY_LIMITS["ANALYZE_TOP_TRACKS"], time_range=time_range)
+        if top_artists is None:
+            top_artists = self.get_top_artists(limit=DISPLAY_LIMITS["ANALYZE_TOP_ARTISTS"], time_range=time_range)
         
         # Analyze features without audio features (deprecated)
         analysis = {
@@ -122,12 +214,8 @@ class SpotifyService:
         }
         
         # Calculate genre distribution from top artists
-        genres = {}
-        for artist in top_artists.get('items', []):
-            for genre in artist.get('genres', []):
-                genres[genre] = genres.get(genre, 0) + 1
-        
-        stats['genre_distribution'] = dict(sorted(genres.items(), key=lambda x: x[1], reverse=True)[:DISPLAY_LIMITS["GENRE_DISTRIBUTION"]])
+        genres = GenreCounts.of(top_artists.get('items', []))
+        stats['genre_distribution'] = dict(genres.top(DISPLAY_LIMITS["GENRE_DISTRIBUTION"]))
         
         return stats
     
@@ -141,55 +229,96 @@ class SpotifyService:
         top_artists = self.get_top_artists(limit=MAX_LIMIT)
         
         # Calculate genre distribution
-        genres = {}
-        for artist in top_artists.get('items', []):
-            for genre in artist.get('genres', []):
-                genres[genre] = genres.get(genre, 0) + 1
+        genres = GenreCounts.of(top_artists.get('items', []))
         
         return {
             'top_tracks_count': len(top_tracks.get('items', [])),
             'top_artists_count': len(top_artists.get('items', [])),
-            'genre_distribution': dict(sorted(genres.items(), key=lambda x: x[1], reverse=True)[:DISPLAY_LIMITS["GENRE_DISTRIBUTION"]])
+            'genre_distribution': dict(genres.top(DISPLAY_LIMITS["GENRE_DISTRIBUTION"]))
         }
     
-    def get_similar_artists_by_genre(self, artist_ids, limit=SIMILAR_ARTISTS_LIMIT):
-        """Get similar artists by searching for artists with similar genres"""
-        client = self._get_client()
-        similar_artists = []
+    def get_artists(self, artist_ids):
+        """Get full artist info for many artist IDs, in input order (None where an artist can't be fetched)
+        
+        Artists are cached per id, so the genres of artists seen before cost
+        no request; the rest are fetched MAX_IDS_PER_REQUEST ids per call.
+        """
+        found = {}
+        missing = []
+        for artist_id in dict.fromkeys(artist_ids):
+            hit, artist = self.cache.get(self._cache_key('artist', '', (artist_id,), {}))
+            if hit:
+                found[artist_id] = artist
+            else:
+                missing.append(artist_id)
+        
+        client = self._get_client() if missing else None
         if client:
-            for artist_id in artist_ids[:limit]:
+            batch_size = SPOTIFY["MAX_IDS_PER_REQUEST"]
+            for i in range(0, len(missing), batch_size):
+                batch = missing[i:i + batch_size]
                 try:
-                    # Get the artist's genres
-                    artist = client.artist(artist_id)
-                    genres = artist.get('genres', [])
-                    
-                    if genres:
-                        # Search for artists with similar genres
-                        genre_query = ' OR '.join(genres[:2])  # Use top 2 genres
-                        search_results = client.search(q=f'genre:{genre_query}', type='artist', limit=DISPLAY_LIMITS["SEARCH_RESULTS"])
-                        similar_artists.extend(search_results.get('artists', {}).get('items', []))
-                except Exception:
+                    artists = client.artists(batch)['artists']
+                except Exception as e:
+                    print(f"Error fetching artists batch of {len(batch)}: {e}")
                     continue
-        return similar_artists
+                # Unknown ids come back as null entries, in request order
+                for artist_id, artist in zip(batch, artists):
+                    if artist:
+                        self.cache.set(self._cache_key('artist', '', (artist_id,), {}), artist, CACHE_TTLS['artist'])
+                        found[artist_id] = artist
+        
+        return [found.get(artist_id) for artist_id in artist_ids]
+    
+    def get_artist_genres(self, artist_ids):
+        """Genres of each artist that could be fetched, by artist ID"""
+        return {artist['id']: artist.get('genres', []) for artist in self.get_artists(artist_ids) if artist}
+    
+    def get_similar_artists_by_genre(self, artist_ids, limit=SIMILAR_ARTISTS_LIMIT):
+        """Get similar artists by searching for artists with similar genres"""
+        client = self._get_client()
+        if not client:
+            return []
+        
+        # Get the artists' genres in one batch, then search by each artist's top 2 genres
+        artist_ids = artist_ids[:limit]
+        genres = self.get_artist_genres(artist_ids)
+        genre_queries = [' OR '.join(genres[artist_id][:2]) for artist_id in artist_ids if genres.get(artist_id)]
+        
+        def search(genre_query):
+            try:
+                search_results = self._cached('search', client.search, q=f'genre:{genre_query}', type='artist', limit=DISPLAY_LIMITS["SEARCH_RESULTS"])
+                return search_results.get('artists', {}).get('items', [])
+            except Exception:
+                return []
+        
+        # Resolve the user id before fanning out; artists sharing top genres share one search
+        self.get_user_id()
+        unique_queries = list(dict.fromkeys(genre_queries))
+        results = dict(zip(unique_queries, self._fan_out(search, unique_queries)))
+        return [artist for genre_query in genre_queries for artist in results[genre_query]]
     
     def get_artists_top_tracks(self, artist_ids, market=SPOTIFY["DEFAULT_MARKET"], limit=ARTIST_TOP_TRACKS_LIMIT):
+        """Top tracks of several artists, fetched concurrently and concatenated in artist order"""
         client = self._get_client()
-        tracks = []
-        if client:
-            for artist_id in artist_ids:
-                try:
-                    top_tracks = client.artist_top_tracks(artist_id, country=market)['tracks'][:limit]
-                    tracks += top_tracks
-                except Exception:
-                    continue
-        return tracks
+        if not client:
+            return []
+        
+        def top_tracks(artist_id):
+            try:
+                return self._cached('artist_top_tracks', client.artist_top_tracks, artist_id,
+                                    country=market, user_scoped=False)['tracks'][:limit]
+            except Exception:
+                return []
+        
+        return [track for tracks in self._fan_out(top_tracks, artist_ids) for track in tracks]
     
     def search_tracks(self, query, limit=DISPLAY_LIMITS["SEARCH_RESULTS"]):
         """Search for tracks"""
         client = self._get_client()
         if client:
             try:
-                results = client.search(q=query, type='track', limit=limit)
+                results = self._cached('search', client.search, q=query, type='track', limit=limit)
                 return results.get('tracks', {}).get('items', [])
             except Exception as e:
                 print(f"Track search error: {e}")
@@ -201,7 +330,7 @@ class SpotifyService:
         client = self._get_client()
         if client:
             try:
-                results = client.search(q=query, type='artist', limit=limit)
+                results = self._cached('search', client.search, q=query, type='artist', limit=limit)
                 return results.get('artists', {}).get('items', [])
             except Exception as e:
                 print(f"Artist search error: {e}")
@@ -213,32 +342,85 @@ class SpotifyService:
         client = self._get_client()
         if client:
             try:
-                return client.artist_top_tracks(artist_id, country=market)['tracks']
+                return self._cached('artist_top_tracks', client.artist_top_tracks, artist_id,
+                                    country=market, user_scoped=False)['tracks']
             except Exception as e:
                 print(f"Artist top tracks error: {e}")
                 return []
         return []
 
     def get_track(self, track_id):
-        """Get full track info by Spotify track ID using the authenticated client"""
+        """Get full track info by Spotify track ID, from the track metadata cache when possible"""
+        track = track_cache.get(track_id)
+        if track is not None:
+            return track
         client = self._get_client()
         if client:
             try:
-                return client.track(track_id)
+                track = client.track(track_id)
+                if track:
+                    track_cache.set(track_id, track)
+                return track
             except Exception as e:
                 print(f"Error fetching track info for {track_id}: {e}")
         return None
+    
+    def get_tracks(self, track_ids):
+        """Get full track info for many track IDs, in input order (None where a track can't be fetched)
+        
+        Cached tracks are served from the track metadata cache; the rest are
+        fetched through the batch endpoint, MAX_IDS_PER_REQUEST ids per call.
+        A batch rejected as a bad request is retried one id at a time so one
+        malformed id does not lose the others; other failures leave that
+        batch's tracks as None.
+        """
+        found = {}
+        missing = []
+        for track_id in dict.fromkeys(track_ids):
+            track = track_cache.get(track_id)
+            if track is not None:
+                found[track_id] = track
+            else:
+                missing.append(track_id)
+        
+        client = self._get_client() if missing else None
+        if client:
+            batch_size = SPOTIFY["MAX_IDS_PER_REQUEST"]
+            for i in range(0, len(missing), batch_size):
+                batch = missing[i:i + batch_size]
+                try:
+                    tracks = client.tracks(batch)['tracks']
+                except SpotifyException as e:
+                    print(f"Error fetching tracks batch of {len(batch)}: {e}")
+                    if e.http_status == HTTP_STATUS["BAD_REQUEST"]:
+                        for track_id in batch:
+                            found[track_id] = self.get_track(track_id)
+                    continue
+                except Exception as e:
+                    print(f"Error fetching tracks batch of {len(batch)}: {e}")
+                    continue
+                # Unknown ids come back as null entries, in request order
+                fetched = {track_id: track for track_id, track in zip(batch, tracks) if track}
+                track_cache.set_many(fetched)
+                found.update(fetched)
+        
+        return [found.get(track_id) for track_id in track_ids]
 
 def get_spotify_album_image(track_id, access_token):
-    url = f'https://api.spotify.com/v1/tracks/{track_id}'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    try:
-        response = requests.get(url, headers=headers, timeout=3)
-        if response.status_code == 200:
-            data = response.json()
-            images = data.get('album', {}).get('images', [])
-            if images:
-                return images[0]['url']  # Largest image
-    except Exception as e:
-        print(f"Error fetching album image for {track_id}: {e}")
+    """Largest album image of a track, read from the track metadata cache when possible"""
+    data = track_cache.get(track_id)
+    if data is None:
+        url = f'https://api.spotify.com/v1/tracks/{track_id}'
+        headers = {'Authorization': f'Bearer {access_token}'}
+        try:
+            response = requests.get(url, headers=headers, timeout=3)
+            if response.status_code == 200:
+                data = response.json()
+                track_cache.set(track_id, data)
+        except Exception as e:
+            print(f"Error fetching album image for {track_id}: {e}")
+    if data:
+        images = data.get('album', {}).get('images', [])
+        if images:
+            return images[0]['url']  # Largest image
     return '/static/default-album.png' 
\ No newline at end of file
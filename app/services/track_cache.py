@@ -0,0 +1,157 @@
+"""
+Process-wide track metadata cache with optional SQLite persistence
+"""
+
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from config.settings import Config
+
+
+class TrackMetadataCache:
+    """Spotify track payloads keyed by track id, shared by every user.
+
+    Track metadata is effectively immutable, so entries live for a long
+    ``ttl`` (seconds) in a bounded in-process LRU. With a ``path``, entries
+    are also written to a SQLite file and read back on a memory miss, so a
+    restarted worker starts warm; a failing SQLite read or delete is logged
+    and treated as a miss. Payloads are copied in and out, like MemoryCache.
+    ``upstream_calls`` counts fetches the cache could not serve; every hit is
+    one call saved.
+    """
+
+    def __init__(self, max_entries: int = 50000, ttl: float = 7 * 24 * 3600, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        # track id -> (expires at, track); wall-clock time so it survives restarts on disk
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        self.evictions = 0
+        self.logger = logging.getLogger(__name__)
+        if path:
+            self._open(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _open(self, path: str):
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS tracks '
+                             '(id TEXT PRIMARY KEY, expires_at REAL NOT NULL, data TEXT NOT NULL)')
+            self._db.execute('DELETE FROM tracks WHERE expires_at <= ?', (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Track cache file {path} unavailable, keeping tracks in memory only: {e}")
+            self._db = None
+
+    def _remember(self, track_id: str, expires_at: float, track: Dict):
+        # Caller holds the lock
+        self._entries.pop(track_id, None)
+        if self.max_entries <= 0:
+            return
+        while len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._entries[track_id] = (expires_at, track)
+
+    def get(self, track_id: str) -> Optional[Dict]:
+        """Cached track payload, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self.hits += 1
+                    self._entries.move_to_end(track_id)
+                    return copy.deepcopy(entry[1])
+                del self._entries[track_id]
+
+            row = None
+            if self._db is not None:
+                try:
+                    row = self._db.execute('SELECT expires_at, data FROM tracks WHERE id = ? AND expires_at > ?',
+                                           (track_id, now)).fetchone()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Track cache read failed: {e}")
+            if row is not None:
+                self._remember(track_id, row[0], json.loads(row[1]))
+                self.disk_hits += 1
+                return json.loads(row[1])
+
+            self.misses += 1
+            return None
+
+    def set(self, track_id: str, track: Dict):
+        """Store a track payload fetched from the API"""
+        self.set_many({track_id: track})
+
+    def set_many(self, tracks: Dict[str, Dict]):
+        """Store several track payloads (one SQLite transaction)"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self.upstream_calls += 1
+            for track_id, track in tracks.items():
+                self._remember(track_id, expires_at, copy.deepcopy(track))
+            if self._db is not None:
+                try:
+                    self._db.executemany('INSERT OR REPLACE INTO tracks VALUES (?, ?, ?)',
+                                         [(track_id, expires_at, json.dumps(track))
+                                          for track_id, track in tracks.items()])
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self.logger.warning(f"Track cache write failed: {e}")
+
+    def invalidate(self, track_ids: Optional[Iterable[str]] = None):
+        """Drop some tracks, or every track"""
+        with self._lock:
+            if track_ids is None:
+                self._entries.clear()
+                self._delete('DELETE FROM tracks', [()])
+                return
+            track_ids = list(track_ids)
+            for track_id in track_ids:
+                self._entries.pop(track_id, None)
+            self._delete('DELETE FROM tracks WHERE id = ?', [(track_id,) for track_id in track_ids])
+
+    def _delete(self, statement: str, rows):
+        # Caller holds the lock
+        if self._db is None:
+            return
+        try:
+            self._db.executemany(statement, rows)
+            self._db.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Track cache delete failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'upstream_calls': self.upstream_calls,
+            'calls_saved': self.hits + self.disk_hits,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+
+track_cache = TrackMetadataCache(
+    max_entries=Config.TRACK_CACHE_MAX_ENTRIES,
+    ttl=Config.TRACK_CACHE_TTL,
+    path=Config.TRACK_CACHE_PATH
+)
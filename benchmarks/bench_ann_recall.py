@@ -0,0 +1,60 @@
+"""
+Evaluate ANN index recall@k and latency against an exact scan
+
+Usage: python -m benchmarks.bench_ann_recall [--tracks 200000] [--queries 100]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from app.models.ann_index import create_ann_index, evaluate_recall
+
+CONFIGS = [
+    ('lsh', {'n_tables': 4, 'n_bits': 12}),
+    ('lsh', {'n_tables': 8, 'n_bits': 10}),
+    ('lsh', {'n_tables': 16, 'n_bits': 8}),
+    ('ivf', {'n_probe': 4}),
+    ('ivf', {'n_probe': 16}),
+    ('ivf', {'n_probe': 64}),
+]
+
+
+def synthetic_catalog(n_tracks: int, n_features: int = 1000, n_topics: int = 200,
+                      nnz_per_row: int = 12, seed: int = 42):
+    """Clustered sparse TF-IDF-like rows: each track draws terms from one topic"""
+    rng = np.random.default_rng(seed)
+    topic_terms = rng.integers(0, n_features, size=(n_topics, 40))
+    topics = rng.integers(0, n_topics, size=n_tracks)
+    picks = rng.integers(0, 40, size=(n_tracks, nnz_per_row))
+    indices = topic_terms[topics[:, None], picks].ravel()
+    indptr = np.arange(0, n_tracks * nnz_per_row + 1, nnz_per_row)
+    matrix = sparse.csr_matrix((rng.random(len(indices)), indices, indptr),
+                               shape=(n_tracks, n_features))
+    matrix.sum_duplicates()
+    return normalize(matrix)
+
+
+def run(n_tracks: int, n_queries: int, k: int):
+    matrix = synthetic_catalog(n_tracks)
+    queries = matrix[np.random.default_rng(7).choice(n_tracks, n_queries, replace=False)]
+    print(f"{'index':>6} {'params':<28} {'build s':>8} {'recall@k':>9} {'exact ms':>9} {'ann ms':>8}")
+    for kind, params in CONFIGS:
+        start = time.perf_counter()
+        index = create_ann_index(kind, **params).build(matrix)
+        build_time = time.perf_counter() - start
+        result = evaluate_recall(index, matrix, queries, k)
+        print(f"{kind:>6} {str(params):<28} {build_time:>8.2f} {result['recall_at_k']:>9.3f} "
+              f"{result['exact_ms']:>9.2f} {result['ann_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--k', type=int, default=20)
+    args = parser.parse_args()
+    run(args.tracks, args.queries, args.k)
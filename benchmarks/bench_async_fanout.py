@@ -0,0 +1,99 @@
+"""
+Benchmark route fan-out: back-to-back SpotifyService calls vs AsyncSpotifyService.gather
+against a local stub API with injected latency
+
+Replays the Spotify calls of /dashboard (profile, recent tracks, top artists)
+and /analyze (top tracks, top artists, recent tracks), uncached.
+
+Usage: python -m benchmarks.bench_async_fanout [--latency-ms 50] [--requests 20]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from spotipy import Spotify
+
+from app import create_app
+from app.constants import DEFAULT_TIME_RANGE, DISPLAY_LIMITS
+from app.services.async_spotify_service import AsyncSpotifyService
+from app.services.cache import MemoryCache, ResponseCache
+from app.services.spotify_service import SpotifyService
+from benchmarks.stub_spotify import StubSpotifyServer
+
+
+def uncached():
+    """A response cache that keeps nothing, so every page load goes upstream"""
+    return ResponseCache(MemoryCache(max_entries=0))
+
+
+def sync_pages(service):
+    return {
+        'dashboard': lambda: [
+            service.get_user_profile(),
+            service.get_recent_tracks(limit=DISPLAY_LIMITS["DASHBOARD_RECENT_TRACKS"]),
+            service.get_top_artists(limit=DISPLAY_LIMITS["DASHBOARD_TOP_ARTISTS"], time_range=DEFAULT_TIME_RANGE),
+        ],
+        'analyze': lambda: [
+            service.get_top_tracks(limit=DISPLAY_LIMITS["ANALYZE_TOP_TRACKS"]),
+            service.get_top_artists(limit=DISPLAY_LIMITS["ANALYZE_TOP_ARTISTS"]),
+            service.get_recent_tracks(limit=DISPLAY_LIMITS["ANALYZE_RECENT_TRACKS"]),
+        ],
+    }
+
+
+def async_pages(service):
+    return {
+        'dashboard': lambda: service.gather(
+            service.get_user_profile(),
+            service.get_recent_tracks(limit=DISPLAY_LIMITS["DASHBOARD_RECENT_TRACKS"]),
+            service.get_top_artists(limit=DISPLAY_LIMITS["DASHBOARD_TOP_ARTISTS"], time_range=DEFAULT_TIME_RANGE),
+        ),
+        'analyze': lambda: service.gather(
+            service.get_top_tracks(limit=DISPLAY_LIMITS["ANALYZE_TOP_TRACKS"]),
+            service.get_top_artists(limit=DISPLAY_LIMITS["ANALYZE_TOP_ARTISTS"]),
+            service.get_recent_tracks(limit=DISPLAY_LIMITS["ANALYZE_RECENT_TRACKS"]),
+        ),
+    }
+
+
+def latencies(page, n_requests: int):
+    results, samples = None, []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        results = page()
+        samples.append((time.perf_counter() - start) * 1000)
+    return results, np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def run(latency_ms: float, n_requests: int):
+    app = create_app('testing')
+    with StubSpotifyServer(latency=latency_ms / 1000) as server, app.test_request_context('/'):
+        from flask import session
+        session['user_id'] = 'stub-user'
+
+        client = Spotify(auth='stub-token', retries=0)
+        client.prefix = server.prefix
+        sync_service = SpotifyService(cache=uncached())
+        sync_service._get_client = lambda: client
+
+        async_service = AsyncSpotifyService(cache=uncached(), base_url=server.prefix)
+        async_service.auth_service.get_access_token = lambda: 'stub-token'
+
+        print(f"{latency_ms}ms per Spotify call, {n_requests} page loads each")
+        print(f"{'page':<10} {'path':<12} {'p50 ms':>8} {'p99 ms':>8} {'same data':>10}")
+        sync, fanned = sync_pages(sync_service), async_pages(async_service)
+        for page in sync:
+            expected, p50, p99 = latencies(sync[page], n_requests)
+            print(f"{page:<10} {'sequential':<12} {p50:>8.0f} {p99:>8.0f} {'':>10}")
+            results, p50, p99 = latencies(fanned[page], n_requests)
+            print(f"{page:<10} {'gather':<12} {p50:>8.0f} {p99:>8.0f} {str(results == expected):>10}")
+        async_service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+    run(args.latency_ms, args.requests)
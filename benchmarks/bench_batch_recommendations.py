@@ -0,0 +1,69 @@
+"""
+Benchmark batch hybrid recommendations against a per-user loop
+
+Usage: python -m benchmarks.bench_batch_recommendations [--users 1000] [--tracks 50000]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from app.models.ai_model import MusicAI
+from benchmarks.bench_incremental_update import synthetic_catalog, synthetic_users
+
+MOODS = ['happy', 'melancholic', 'energetic', 'chill', 'romantic']  # keys of MusicAI.mood_weights
+GENRES = ['pop', 'rock', 'jazz', 'electronic', 'classical']
+
+
+def user_requests(users, seed: int = 11):
+    """One request per user: a few seed tracks plus mood/genre for most users"""
+    rng = np.random.default_rng(seed)
+    requests = []
+    for user_id, tracks in users:
+        request = {'user_id': user_id, 'seed_tracks': tracks[:5]}
+        if rng.random() < 0.8:
+            request.update(mood=str(rng.choice(MOODS)), genre=str(rng.choice(GENRES)))
+        requests.append(request)
+    return requests
+
+
+def run(n_users: int, n_tracks: int, n_recommendations: int, batch_sizes):
+    logging.getLogger('app.models.ai_model').setLevel(logging.WARNING)
+    catalog = synthetic_catalog(n_tracks)
+    users = synthetic_users(catalog, n_users)
+
+    model = MusicAI(model_dir=tempfile.mkdtemp())
+    model.train_content_based_model(catalog)
+    model.train_collaborative_model(users)
+    # Half known users, half cold users folded in from their seeds
+    requests = user_requests(users[:n_users // 2] + [(f'cold{i}', tracks) for i, (_, tracks)
+                                                      in enumerate(users[n_users // 2:])])
+
+    start = time.perf_counter()
+    loop = {r['user_id']: model.get_hybrid_recommendations(r['user_id'], r['seed_tracks'], r.get('mood'),
+                                                           r.get('genre'), n_recommendations)
+            for r in requests}
+    loop_time = time.perf_counter() - start
+
+    print(f"{'mode':<18} {'seconds':>9} {'users/s':>10} {'same top-k':>11}")
+    print(f"{'per-user loop':<18} {loop_time:>9.2f} {len(requests) / loop_time:>10.0f} {'-':>11}")
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        batch = model.get_batch_recommendations(requests, n_recommendations, batch_size=batch_size)
+        batch_time = time.perf_counter() - start
+        same = np.mean([[rec.get('track_id', rec.get('id')) for rec in loop[user_id]] ==
+                        [rec.get('track_id', rec.get('id')) for rec in batch[user_id]] for user_id in loop])
+        print(f"{f'batch ({batch_size})':<18} {batch_time:>9.2f} {len(requests) / batch_time:>10.0f} {same:>11.1%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tracks', type=int, default=50_000)
+    parser.add_argument('--recommendations', type=int, default=20)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 32, 128])
+    args = parser.parse_args()
+    run(args.users, args.tracks, args.recommendations, args.batch_sizes)
@@ -0,0 +1,60 @@
+"""
+Benchmark per-id get_track loops vs batched SpotifyService.get_tracks against a local stub API
+
+Each row resolves the same ids (as /api/discover does for AI discoveries)
+through a real spotipy client pointed at benchmarks.stub_spotify, and
+counts the HTTP round trips the stub served.
+
+Usage: python -m benchmarks.bench_batch_tracks [--ids 20 120] [--latency-ms 20]
+"""
+
+import argparse
+import time
+
+from spotipy import Spotify
+
+from app.services import spotify_service
+from app.services.spotify_service import SpotifyService
+from app.services.track_cache import TrackMetadataCache
+from benchmarks.stub_spotify import StubSpotifyServer
+
+
+def stub_service(server: StubSpotifyServer) -> SpotifyService:
+    client = Spotify(auth='stub-token', retries=0)
+    client.prefix = server.prefix
+    service = SpotifyService()
+    service._get_client = lambda: client
+    return service
+
+
+def timed(server: StubSpotifyServer, resolve, ids):
+    server.reset()
+    start = time.perf_counter()
+    tracks = resolve(ids)
+    return tracks, server.total_requests, time.perf_counter() - start
+
+
+def run(id_counts, latency_ms: float):
+    with StubSpotifyServer(latency=latency_ms / 1000) as server:
+        service = stub_service(server)
+        print(f"{latency_ms}ms per round trip; one id in 20 is unknown")
+        print(f"{'ids':>5} {'path':<24} {'round trips':>12} {'ms':>8} {'same tracks':>12}")
+        for n_ids in id_counts:
+            ids = [f'missing{i}' if i % 20 == 19 else f'id{i}' for i in range(n_ids)]
+            spotify_service.track_cache = TrackMetadataCache()
+            expected, trips, seconds = timed(server, lambda ids: [service.get_track(i) for i in ids], ids)
+            print(f"{n_ids:>5} {'get_track loop':<24} {trips:>12} {seconds * 1000:>8.0f} {'':>12}")
+
+            for label in ('get_tracks, cold cache', 'get_tracks, warm cache'):
+                if label.endswith('cold cache'):
+                    spotify_service.track_cache = TrackMetadataCache()
+                tracks, trips, seconds = timed(server, service.get_tracks, ids)
+                print(f"{n_ids:>5} {label:<24} {trips:>12} {seconds * 1000:>8.0f} {str(tracks == expected):>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ids', type=int, nargs='+', default=[20, 120])
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    args = parser.parse_args()
+    run(args.ids, args.latency_ms)
@@ -0,0 +1,71 @@
+"""
+Benchmark content-based recommendation latency against catalog size
+
+Usage: python -m benchmarks.bench_content_similarity [--sizes 1000 10000 ...]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from app.models.ai_model import MusicAI
+from app.models.feature_store import FEATURE_COLUMNS, TrackFeatureStore
+from app.models.id_index import IdIndex
+
+VOCABULARY = [f"term{i}" for i in range(1000)]
+
+
+def build_model(n_tracks: int, nnz_per_row: int = 12, seed: int = 42) -> MusicAI:
+    """Create a MusicAI instance with a synthetic stacked TF-IDF catalog"""
+    rng = np.random.default_rng(seed)
+    model = MusicAI(model_dir=tempfile.mkdtemp())
+
+    # Fit a vectorizer on the synthetic vocabulary so seed encoding is realistic
+    model.train_content_based_model([
+        {'id': f'vocab{i}', 'name': ' '.join(VOCABULARY[i:i + 10]), 'artists': []}
+        for i in range(0, len(VOCABULARY), 10)
+    ])
+    n_features = model.feature_store.text.shape[1]
+
+    indices = rng.integers(0, n_features, size=n_tracks * nnz_per_row)
+    data = rng.random(n_tracks * nnz_per_row)
+    indptr = np.arange(0, n_tracks * nnz_per_row + 1, nnz_per_row)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(n_tracks, n_features))
+    matrix.sum_duplicates()
+
+    model.feature_store = TrackFeatureStore(
+        IdIndex(f'track{i}' for i in range(n_tracks)),
+        rng.random((n_tracks, len(FEATURE_COLUMNS)), dtype=np.float32),
+        normalize(matrix)
+    )
+    return model
+
+
+def run(sizes, repeats: int = 20):
+    seed_tracks = [
+        {'id': 'track0', 'name': 'term1 term2 term3', 'artists': [{'name': 'term4'}]},
+        {'id': 'track1', 'name': 'term10 term11', 'artists': [{'name': 'term12 term13'}]},
+    ]
+    print(f"{'tracks':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for n_tracks in sizes:
+        model = build_model(n_tracks)
+        model.get_content_based_recommendations(seed_tracks, 20)  # warm-up
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.get_content_based_recommendations(seed_tracks, 20)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{n_tracks:>10} {np.percentile(timings, 50):>10.2f} {np.percentile(timings, 99):>10.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.repeats)
@@ -0,0 +1,81 @@
+"""
+Benchmark the /api/discover fallback path (similar artists by genre, then their top tracks)
+against a local stub API: serial per-artist calls vs batched artists and concurrent fan-out
+
+Usage: python -m benchmarks.bench_discover_fallback [--seed-artists 5] [--latency-ms 20] [--workers 8]
+"""
+
+import argparse
+import time
+
+from spotipy import Spotify
+
+from app import create_app
+from app.constants import ARTIST_TOP_TRACKS_LIMIT, DISPLAY_LIMITS, SIMILAR_ARTISTS_LIMIT, SPOTIFY
+from app.services.cache import ResponseCache
+from app.services.spotify_service import SpotifyService
+from benchmarks.stub_spotify import StubSpotifyServer
+
+
+def legacy_fallback(client, artist_ids):
+    """The fallback path as it was: one artist call and one search per seed, one top-tracks call per artist"""
+    similar_artists = []
+    for artist_id in artist_ids[:SIMILAR_ARTISTS_LIMIT]:
+        try:
+            genres = client.artist(artist_id).get('genres', [])
+            if genres:
+                genre_query = ' OR '.join(genres[:2])
+                search_results = client.search(q=f'genre:{genre_query}', type='artist', limit=DISPLAY_LIMITS["SEARCH_RESULTS"])
+                similar_artists.extend(search_results.get('artists', {}).get('items', []))
+        except Exception:
+            continue
+    tracks = []
+    for artist in similar_artists:
+        try:
+            tracks += client.artist_top_tracks(artist['id'], country=SPOTIFY["DEFAULT_MARKET"])['tracks'][:ARTIST_TOP_TRACKS_LIMIT]
+        except Exception:
+            continue
+    return tracks
+
+
+def service_fallback(service, artist_ids):
+    similar_artists = service.get_similar_artists_by_genre(artist_ids, limit=SIMILAR_ARTISTS_LIMIT)
+    return service.get_artists_top_tracks([artist['id'] for artist in similar_artists], limit=ARTIST_TOP_TRACKS_LIMIT)
+
+
+def run(n_seed_artists: int, latency_ms: float, workers: int):
+    app = create_app('testing')
+    artist_ids = [f'seed{i}' for i in range(n_seed_artists)]
+    with StubSpotifyServer(latency=latency_ms / 1000) as server, app.test_request_context('/'):
+        from flask import session
+        session['user_id'] = 'stub-user'
+        client = Spotify(auth='stub-token', retries=0)
+        client.prefix = server.prefix
+
+        print(f"{n_seed_artists} seed artists, {latency_ms}ms per round trip")
+        print(f"{'path':<30} {'round trips':>12} {'ms':>8} {'tracks':>7} {'same tracks':>12}")
+        server.reset()
+        start = time.perf_counter()
+        expected = legacy_fallback(client, artist_ids)
+        print(f"{'serial per-artist calls':<30} {server.total_requests:>12} "
+              f"{(time.perf_counter() - start) * 1000:>8.0f} {len(expected):>7} {'':>12}")
+
+        for n_workers in sorted({1, workers}):
+            service = SpotifyService(cache=ResponseCache(), max_workers=n_workers)
+            service._get_client = lambda: client
+            for label in ('cold', 'warm'):
+                server.reset()
+                start = time.perf_counter()
+                tracks = service_fallback(service, artist_ids)
+                name = f"batched, {n_workers} workers, {label}"
+                print(f"{name:<30} {server.total_requests:>12} {(time.perf_counter() - start) * 1000:>8.0f} "
+                      f"{len(tracks):>7} {str(tracks == expected):>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seed-artists', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    run(args.seed_artists, args.latency_ms, args.workers)
@@ -0,0 +1,76 @@
+"""
+Memory per track: dict-of-dicts track_features vs the columnar TrackFeatureStore
+
+The legacy layout (one dict per track holding a 1-row sparse TF-IDF matrix and
+a feature dict) is measured on a sample and extrapolated, since building
+millions of 1-row matrices takes a very long time. The columnar store is
+measured at full size.
+
+Usage: python -m benchmarks.bench_feature_store_memory [--tracks 1000000] [--legacy-sample 50000]
+"""
+
+import argparse
+import tracemalloc
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from app.models.feature_store import FEATURE_COLUMNS, TrackFeatureStore
+from app.models.id_index import IdIndex
+
+NNZ_PER_ROW = 12
+N_TERMS = 1000
+
+
+def synthetic_text(n_tracks: int, rng) -> sparse.csr_matrix:
+    matrix = sparse.csr_matrix(
+        (rng.random(n_tracks * NNZ_PER_ROW), rng.integers(0, N_TERMS, n_tracks * NNZ_PER_ROW),
+         np.arange(0, n_tracks * NNZ_PER_ROW + 1, NNZ_PER_ROW)), shape=(n_tracks, N_TERMS))
+    return normalize(matrix)
+
+
+def build_legacy(n_tracks: int, rng):
+    text = synthetic_text(n_tracks, rng)
+    numeric = rng.random((n_tracks, len(FEATURE_COLUMNS)))
+    return {
+        f'track{i}': {
+            'tfidf_vector': text[i],
+            'features': dict(zip(FEATURE_COLUMNS, numeric[i].tolist()))
+        }
+        for i in range(n_tracks)
+    }
+
+
+def build_columnar(n_tracks: int, rng):
+    return TrackFeatureStore(
+        IdIndex(f'track{i}' for i in range(n_tracks)),
+        rng.random((n_tracks, len(FEATURE_COLUMNS)), dtype=np.float32),
+        synthetic_text(n_tracks, rng)
+    )
+
+
+def retained_bytes(build, n_tracks: int) -> int:
+    rng = np.random.default_rng(42)
+    tracemalloc.start()
+    result = build(n_tracks, rng)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def run(n_tracks: int, legacy_sample: int):
+    legacy = retained_bytes(build_legacy, legacy_sample) / legacy_sample
+    columnar = retained_bytes(build_columnar, n_tracks) / n_tracks
+    print(f"{'layout':<10} {'bytes/track':>12} {f'MiB @ {n_tracks:,}':>16}")
+    print(f"{'dicts':<10} {legacy:>12.0f} {legacy * n_tracks / 1024 ** 2:>16.0f}  (measured on {legacy_sample:,})")
+    print(f"{'columnar':<10} {columnar:>12.0f} {columnar * n_tracks / 1024 ** 2:>16.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=1_000_000)
+    parser.add_argument('--legacy-sample', type=int, default=50_000)
+    args = parser.parse_args()
+    run(args.tracks, args.legacy_sample)
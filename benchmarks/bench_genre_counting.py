@@ -0,0 +1,76 @@
+"""
+Benchmark dict-based genre counting vs the shared genre vocabulary with np.bincount
+
+Usage: python -m benchmarks.bench_genre_counting [--users 2000] [--artists-per-user 50]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.models.genres import GenreCounts
+from app.models.records import Artist
+
+N_GENRES = 1500
+
+
+def synthetic_artists(n_users: int, artists_per_user: int, seed: int = 13):
+    """Per-user artist payloads as parsed from JSON (fresh strings, like an API response)"""
+    rng = np.random.default_rng(seed)
+    genres = [f'genre {i}' for i in range(N_GENRES)]
+    users = []
+    for _ in range(n_users):
+        picks = np.minimum(rng.zipf(1.5, size=(artists_per_user, 3)) - 1, N_GENRES - 1)
+        artists = [{'name': f'artist {i}', 'genres': [genres[g] for g in row[:int(rng.integers(1, 4))]]}
+                   for i, row in enumerate(picks)]
+        users.append(json.loads(json.dumps(artists)))
+    return users
+
+
+def legacy_counts(artists, k: int = 5):
+    """genres.extend plus dict counting, as the call sites used to do"""
+    genres = []
+    for artist in artists:
+        genres.extend(artist.get('genres', []))
+    genre_counts = {}
+    for genre in genres:
+        genre_counts[genre] = genre_counts.get(genre, 0) + 1
+    return sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:k], len(set(genres))
+
+
+def vocabulary_counts(artists, k: int = 5):
+    genres = GenreCounts.of(artists)
+    return genres.top(k), genres.distinct
+
+
+def run(n_users: int, artists_per_user: int, repeats: int):
+    payloads = synthetic_artists(n_users, artists_per_user)
+    records = [[Artist.from_api(artist) for artist in artists] for artists in payloads]
+
+    rows = [
+        ('dict counting, API dicts', legacy_counts, payloads),
+        ('vocabulary, API dicts', vocabulary_counts, payloads),
+        ('vocabulary, Artist records', vocabulary_counts, records),
+    ]
+    expected = [legacy_counts(artists) for artists in payloads]
+    print(f"{n_users} users x {artists_per_user} artists, {N_GENRES} genres")
+    print(f"{'path':<28} {'us/user':>9} {'speedup':>8} {'same result':>12}")
+    baseline = None
+    for name, count, data in rows:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            results = [count(artists) for artists in data]
+        per_user = (time.perf_counter() - start) / (repeats * n_users) * 1e6
+        baseline = baseline or per_user
+        print(f"{name:<28} {per_user:>9.1f} {baseline / per_user:>7.1f}x {str(results == expected):>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--artists-per-user', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    run(args.users, args.artists_per_user, args.repeats)
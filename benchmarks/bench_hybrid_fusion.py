@@ -0,0 +1,149 @@
+"""
+Benchmark hybrid merging: legacy dict merge vs weighted and reciprocal-rank fusion
+
+Builds a fixed, seeded evaluation set in which tracks belong to taste clusters
+that drive their names, artists and audio features. Each user listens within
+one cluster; their last tracks are held out and recall@k on them measures the
+quality of the fused ranking.
+
+Usage: python -m benchmarks.bench_hybrid_fusion [--users 2000] [--tracks 20000]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from app.models.ai_model import MusicAI
+from app.models.fusion import DEFAULT_FUSION_WEIGHTS, fuse_rankings
+from benchmarks.bench_mood_scoring import AUDIO_KEYS
+
+WEIGHT_SETTINGS = {
+    'default': None,
+    'equal': {'content': 1.0, 'collaborative': 1.0, 'mood': 1.0},
+    'content-heavy': {'content': 0.6, 'collaborative': 0.3, 'mood': 0.1},
+    'no mood': {'mood': 0.0},
+}
+
+
+def evaluation_set(n_tracks: int, n_users: int, n_clusters: int = 20, tracks_per_user: int = 40,
+                   held_out: int = 10, seed: int = 2024):
+    """Deterministic catalog and (user, train tracks, held-out ids) triples"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.random((n_clusters, len(AUDIO_KEYS)))
+    clusters = rng.integers(0, n_clusters, size=n_tracks)
+    artists = rng.integers(0, 50, size=n_tracks)
+    catalog = []
+    for i, (cluster, artist) in enumerate(zip(clusters, artists)):
+        audio = np.clip(centroids[cluster] + rng.normal(0, 0.1, len(AUDIO_KEYS)), 0, 1)
+        catalog.append({
+            'id': f'track{i}',
+            'name': ' '.join([f'c{cluster}w{rng.integers(0, 10)}'] + [f'w{w}' for w in rng.integers(0, 5000, 2)]),
+            'artists': [{'name': f'c{cluster}artist{artist}'}],
+            'popularity': int(rng.integers(0, 100)),
+            'duration_ms': int(rng.integers(120000, 300000)),
+            'audio_features': dict(zip(AUDIO_KEYS, audio.tolist()))
+        })
+
+    members = [np.flatnonzero(clusters == c) for c in range(n_clusters)]
+    users = []
+    for u in range(n_users):
+        # Each user mixes a few favourite artists, popular tracks of their cluster and some noise
+        cluster = rng.integers(0, n_clusters)
+        favourites = members[cluster][np.isin(artists[members[cluster]], rng.integers(0, 50, 3))]
+        kind = rng.random(tracks_per_user)
+        picks = members[cluster][np.minimum(rng.zipf(1.2, tracks_per_user) - 1, len(members[cluster]) - 1)]
+        picks[kind < 0.5] = rng.choice(favourites, (kind < 0.5).sum())
+        picks[kind > 0.9] = rng.integers(0, n_tracks, (kind > 0.9).sum())
+        picks = list(dict.fromkeys(picks.tolist()))
+        if len(picks) <= held_out + 5:
+            continue
+        users.append((f'user{u}', cluster, [catalog[t] for t in picks[:-held_out]],
+                      {f'track{t}' for t in picks[-held_out:]}))
+    return catalog, centroids, users
+
+
+def best_mood_and_genre(model: MusicAI, centroid: np.ndarray):
+    """The mood/genre pair (of those the model has weights for) that scores a cluster's centroid highest"""
+    features = model.extract_feature_matrix([{'audio_features': dict(zip(AUDIO_KEYS, centroid.tolist()))}])
+    pairs = [(mood, genre) for mood in model.mood_weights for genre in model.genre_weights]
+    return max(pairs, key=lambda pair: float(model._mood_scores(*pair, features)[0]))
+
+
+def legacy_hybrid(model: MusicAI, user_id, seed_tracks, mood, genre, n):
+    """The original concatenate, de-duplicate and sort-on-similarity_score merge"""
+    recommendations = model.get_content_based_recommendations(seed_tracks, n // 2)
+    recommendations += model.get_mood_based_recommendations(mood, genre, n_recommendations=n)
+    recommendations += model._get_collaborative_recommendations(user_id, n // 4, seed_tracks)
+    unique_recs = {}
+    for rec in recommendations:
+        unique_recs.setdefault(rec.get('track_id', rec.get('id')), rec)
+    return sorted(unique_recs.values(), key=lambda x: x.get('similarity_score', 0), reverse=True)[:n]
+
+
+def recall(recommendations, held_out) -> float:
+    return len({rec.get('track_id', rec.get('id')) for rec in recommendations} & held_out) / len(held_out)
+
+
+def run(n_users: int, n_tracks: int, n_recommendations: int):
+    logging.getLogger('app.models.ai_model').setLevel(logging.WARNING)
+    catalog, centroids, users = evaluation_set(n_tracks, n_users)
+
+    model = MusicAI(model_dir=tempfile.mkdtemp())
+    model.train_content_based_model(catalog)
+    model.train_collaborative_model([(user_id, tracks) for user_id, _, tracks, _ in users])
+    moods = [best_mood_and_genre(model, centroid) for centroid in centroids]
+
+    def evaluate(recommend):
+        recalls, timings = [], []
+        for user_id, cluster, tracks, held_out in users:
+            start = time.perf_counter()
+            recs = recommend(user_id, tracks[:5], *moods[cluster])
+            timings.append((time.perf_counter() - start) * 1000)
+            recalls.append(recall(recs, held_out))
+        return np.mean(recalls), np.percentile(timings, 50), np.percentile(timings, 99)
+
+    print(f"{len(users)} users, {n_tracks} tracks, recall@{n_recommendations} on held-out tracks")
+    print(f"{'merge':<26} {'recall':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    row = evaluate(lambda *args: legacy_hybrid(model, *args, n_recommendations))
+    print(f"{'legacy dict merge':<26} {row[0]:>8.3f} {row[1]:>8.2f} {row[2]:>8.2f}")
+    for method in ('weighted', 'rrf'):
+        for name, weights in WEIGHT_SETTINGS.items():
+            model.fusion_method = method
+            model.fusion_weights = {**DEFAULT_FUSION_WEIGHTS, **(weights or {})}
+            row = evaluate(lambda *args: model.get_hybrid_recommendations(*args, n_recommendations))
+            print(f"{f'{method} ({name})':<26} {row[0]:>8.3f} {row[1]:>8.2f} {row[2]:>8.2f}")
+
+    # Fusion stage alone, on three candidate lists of each size (catalog rows, as the model fuses them)
+    rng = np.random.default_rng(0)
+    for size in (n_recommendations, 1000):
+        candidates = {source: (rng.choice(n_tracks, size, replace=False), np.sort(rng.random(size))[::-1])
+                      for source in ('content', 'mood', 'collaborative')}
+        dict_lists = [[{'track_id': f'track{row}', 'similarity_score': score} for row, score in zip(rows, scores)]
+                      for rows, scores in candidates.values()]
+
+        def dict_merge():
+            unique_recs = {}
+            for recs in dict_lists:
+                for rec in recs:
+                    unique_recs.setdefault(rec['track_id'], rec)
+            return sorted(unique_recs.values(), key=lambda x: x['similarity_score'], reverse=True)[:n_recommendations]
+
+        for name, fn in ((f'dict merge (3x{size})', dict_merge),
+                         (f'fuse_rankings (3x{size})', lambda: fuse_rankings(candidates, limit=n_recommendations))):
+            timings = []
+            for _ in range(100):
+                start = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{name:<26} {'-':>8} {np.percentile(timings, 50):>8.3f} {np.percentile(timings, 99):>8.3f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--tracks', type=int, default=20_000)
+    parser.add_argument('--recommendations', type=int, default=20)
+    args = parser.parse_args()
+    run(args.users, args.tracks, args.recommendations)
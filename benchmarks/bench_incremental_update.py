@@ -0,0 +1,75 @@
+"""
+Benchmark full retrain vs incremental update when onboarding new users
+
+Usage: python -m benchmarks.bench_incremental_update [--users 5000] [--new-users 1 10 100]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from app.models.ai_model import MusicAI
+
+WORDS = [f"word{i}" for i in range(3000)]
+GENRES = ['pop', 'rock', 'indie rock', 'hip hop', 'jazz', 'edm', 'classical', 'folk']
+
+
+def synthetic_catalog(n_tracks: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    return [{
+        'id': f'track{i}',
+        'name': ' '.join(rng.choice(WORDS, 3)),
+        'artists': [{'name': ' '.join(rng.choice(WORDS, 2)), 'genres': list(rng.choice(GENRES, 2))}],
+        'album': {'name': ' '.join(rng.choice(WORDS, 2))},
+        'popularity': int(rng.integers(0, 100)),
+        'duration_ms': int(rng.integers(120000, 300000)),
+    } for i in range(n_tracks)]
+
+
+def synthetic_users(catalog, n_users: int, offset: int = 0, tracks_per_user: int = 30, seed: int = 7):
+    rng = np.random.default_rng(seed + offset)
+    picks = np.minimum(rng.zipf(1.3, size=(n_users, tracks_per_user)) - 1, len(catalog) - 1)
+    return [(f'user{offset + u}', [catalog[t] for t in picks[u]]) for u in range(n_users)]
+
+
+def run(n_users: int, n_tracks: int, new_user_counts):
+    logging.getLogger('app.models.ai_model').setLevel(logging.WARNING)
+    catalog = synthetic_catalog(n_tracks)
+    base_users = synthetic_users(catalog, n_users)
+
+    print(f"{'new users':>10} {'full s':>9} {'incremental s':>14} {'speedup':>8}")
+    for n_new in new_user_counts:
+        new_users = synthetic_users(catalog, n_new, offset=n_users)
+        new_tracks = synthetic_catalog(n_new * 5, seed=n_new)
+        for i, track in enumerate(new_tracks):
+            track['id'] = f'new{n_new}-{i}'
+
+        # Full retrain over the whole corpus plus the delta
+        full_model = MusicAI(model_dir=tempfile.mkdtemp())
+        start = time.perf_counter()
+        full_model.train_content_based_model(catalog + new_tracks)
+        full_model.train_collaborative_model(base_users + new_users)
+        full_time = time.perf_counter() - start
+
+        # Incremental update of a model already trained on the base corpus
+        model = MusicAI(model_dir=tempfile.mkdtemp())
+        model.compact_ratio = float('inf')
+        model.train_content_based_model(catalog)
+        model.train_collaborative_model(base_users)
+        start = time.perf_counter()
+        model.update(new_tracks, new_users, save=False)
+        incremental_time = time.perf_counter() - start
+
+        print(f"{n_new:>10} {full_time:>9.3f} {incremental_time:>14.4f} {full_time / incremental_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--tracks', type=int, default=20000)
+    parser.add_argument('--new-users', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+    run(args.users, args.tracks, args.new_users)
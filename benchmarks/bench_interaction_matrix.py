@@ -0,0 +1,84 @@
+"""
+Benchmark user-item matrix construction: dense list-index fill vs sparse builder
+
+Usage: python -m benchmarks.bench_interaction_matrix [--interactions 10000 100000 1000000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.models.interactions import InteractionMatrixBuilder
+
+# Skip the dense baseline when its matrix alone would exceed this many bytes
+DENSE_LIMIT_BYTES = 2 * 1024 ** 3
+
+
+def synthetic_interactions(n_interactions: int, tracks_per_user: int = 50, seed: int = 42):
+    """(user_id, tracks) pairs with a Zipf-like track popularity"""
+    rng = np.random.default_rng(seed)
+    n_users = max(1, n_interactions // tracks_per_user)
+    n_tracks = max(1, n_interactions // 5)
+    picks = np.minimum(rng.zipf(1.3, size=n_interactions) - 1, n_tracks - 1)
+    return [
+        (f'user{u}', [{'id': f'track{t}'} for t in picks[u * tracks_per_user:(u + 1) * tracks_per_user]])
+        for u in range(n_users)
+    ]
+
+
+def dense_build(user_tracks_data):
+    """The original construction: list.index lookups into a dense matrix"""
+    user_ids = []
+    track_ids = set()
+    for user_id, tracks in user_tracks_data:
+        user_ids.append(user_id)
+        for track in tracks:
+            track_ids.add(track['id'])
+    track_ids = list(track_ids)
+    matrix = np.zeros((len(user_ids), len(track_ids)))
+    for i, (user_id, tracks) in enumerate(user_tracks_data):
+        for track in tracks:
+            matrix[i, track_ids.index(track['id'])] = 1
+    return matrix
+
+
+def sparse_build(user_tracks_data):
+    return InteractionMatrixBuilder().add_users(user_tracks_data).build()
+
+
+def measure(fn, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 ** 2
+
+
+def run(sizes, include_dense: bool):
+    print(f"{'interactions':>12} {'method':>8} {'wall s':>9} {'peak MiB':>10}")
+    for n_interactions in sizes:
+        data = synthetic_interactions(n_interactions)
+        n_users = len(data)
+        n_tracks = len({track['id'] for _, tracks in data for track in tracks})
+
+        elapsed, peak = measure(sparse_build, data)
+        print(f"{n_interactions:>12} {'sparse':>8} {elapsed:>9.3f} {peak:>10.1f}")
+
+        dense_bytes = n_users * n_tracks * 8
+        if include_dense and dense_bytes <= DENSE_LIMIT_BYTES:
+            elapsed, peak = measure(dense_build, data)
+            print(f"{n_interactions:>12} {'dense':>8} {elapsed:>9.3f} {peak:>10.1f}")
+        else:
+            print(f"{n_interactions:>12} {'dense':>8} {'skipped':>9} {dense_bytes / 1024 ** 2:>10.1f} (matrix only)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--interactions', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--no-dense', action='store_true', help='skip the dense baseline')
+    args = parser.parse_args()
+    run(args.interactions, not args.no_dense)
@@ -0,0 +1,138 @@
+"""
+Benchmark worker startup time and per-worker memory: pickled models vs mmap store
+
+Starts several worker processes (like gunicorn workers without preload) that
+each load the model and serve one recommendation, then reports load time,
+RSS and PSS (proportional set size, which splits shared pages between the
+processes mapping them). Linux only, as it reads /proc/self/smaps_rollup.
+
+Usage: python -m benchmarks.bench_model_startup [--tracks 500000] [--workers 4]
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from app.models.ai_model import MusicAI
+from app.models.feature_store import FEATURE_COLUMNS, TrackFeatureStore
+from app.models.id_index import IdIndex
+
+
+def memory_kib():
+    """Return (rss, pss) in KiB for the current process"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1])
+    return values.get('Rss:', 0), values.get('Pss:', 0)
+
+
+def build_model(model_dir: str, n_tracks: int, n_users: int, seed: int = 42):
+    """Train a small vectorizer/NMF and attach large synthetic array state"""
+    rng = np.random.default_rng(seed)
+    model = MusicAI(model_dir=model_dir)
+    model.train_content_based_model([
+        {'id': f'vocab{i}', 'name': ' '.join(f'term{j}' for j in range(i, i + 10)), 'artists': []}
+        for i in range(0, 1000, 10)
+    ])
+    n_features = model.feature_store.text.shape[1]
+
+    nnz = 12
+    matrix = sparse.csr_matrix(
+        (rng.random(n_tracks * nnz), rng.integers(0, n_features, n_tracks * nnz),
+         np.arange(0, n_tracks * nnz + 1, nnz)), shape=(n_tracks, n_features))
+    model.feature_store = TrackFeatureStore(
+        IdIndex(f'track{i}' for i in range(n_tracks)),
+        rng.random((n_tracks, len(FEATURE_COLUMNS)), dtype=np.float32),
+        normalize(matrix)
+    )
+
+    n_items = min(n_tracks, 200_000)
+    model.train_collaborative_model([
+        (f'user{u}', [{'id': f'track{t}'} for t in rng.integers(0, n_items, 30)])
+        for u in range(n_users)
+    ])
+    return model
+
+
+def save_pickle(model: MusicAI, path: str):
+    """The pre-store layout: one pickle that every worker deserializes"""
+    joblib.dump({
+        'track_ids': [model.feature_store.track_id(row) for row in range(len(model.feature_store))],
+        'tfidf_matrix': model.feature_store.text,
+        'track_numeric': model.feature_store.numeric,
+        'user_ids': [model.cf_user_index.id_at(row) for row in range(len(model.cf_user_index))],
+        'cf_track_ids': [model.cf_track_index.id_at(row) for row in range(len(model.cf_track_index))],
+        'user_item_matrix': model.user_item_matrix,
+        'user_factors': model.user_factors,
+        'item_factors': model.item_factors,
+    }, path)
+
+
+def worker(mode: str, path: str, barrier, results):
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    if mode == 'pickle':
+        state = joblib.load(path)
+        track_index = {track_id: row for row, track_id in enumerate(state['track_ids'])}
+        user_index = {user_id: row for row, user_id in enumerate(state['user_ids'])}
+        load_time = time.perf_counter() - start
+        query = state['tfidf_matrix'][track_index['track1']]
+        scores = np.asarray((state['tfidf_matrix'] @ query.T).todense()).ravel()
+        scores = state['user_factors'][user_index['user1']] @ state['item_factors']
+    else:
+        model = MusicAI(model_dir=path)
+        load_time = time.perf_counter() - start
+        store = model.feature_store
+        query = store.text[store.row('track1')]
+        scores = np.asarray((store.text @ query.T).todense()).ravel()
+        model._get_collaborative_recommendations('user1', 20)
+    barrier.wait()
+    rss, pss = memory_kib()
+    results.put((load_time, rss, pss))
+    barrier.wait()
+
+
+def run(n_tracks: int, n_users: int, n_workers: int):
+    logging.getLogger('app.models.ai_model').setLevel(logging.WARNING)
+    model_dir = tempfile.mkdtemp()
+    model = build_model(model_dir, n_tracks, n_users)
+    model.save_models()
+    pickle_path = os.path.join(model_dir, 'legacy_state.pkl')
+    save_pickle(model, pickle_path)
+    del model
+
+    ctx = mp.get_context('spawn')
+    print(f"{'format':>8} {'workers':>8} {'load ms':>9} {'RSS MiB':>9} {'PSS MiB':>9}")
+    for mode, path in (('pickle', pickle_path), ('mmap', model_dir)):
+        barrier = ctx.Barrier(n_workers)
+        results = ctx.Queue()
+        procs = [ctx.Process(target=worker, args=(mode, path, barrier, results)) for _ in range(n_workers)]
+        for proc in procs:
+            proc.start()
+        samples = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        load_ms = np.mean([s[0] for s in samples]) * 1000
+        rss = np.mean([s[1] for s in samples]) / 1024
+        pss = np.mean([s[2] for s in samples]) / 1024
+        print(f"{mode:>8} {n_workers:>8} {load_ms:>9.1f} {rss:>9.1f} {pss:>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=500_000)
+    parser.add_argument('--users', type=int, default=20_000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.tracks, args.users, args.workers)
@@ -0,0 +1,86 @@
+"""
+Benchmark mood/genre scoring: per-track loops vs compiled weight vectors
+
+Usage: python -m benchmarks.bench_mood_scoring [--candidates 100000]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from app.models.ai_model import MusicAI
+from app.models.feature_store import TrackFeatureStore
+from app.models.id_index import IdIndex
+
+AUDIO_KEYS = ['danceability', 'energy', 'speechiness', 'acousticness', 'instrumentalness',
+              'liveness', 'valence']
+
+
+def synthetic_tracks(n_tracks: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    audio = rng.random((n_tracks, len(AUDIO_KEYS)))
+    return [{
+        'id': f'track{i}',
+        'popularity': int(rng.integers(0, 100)),
+        'duration_ms': int(rng.integers(120000, 300000)),
+        'audio_features': {**dict(zip(AUDIO_KEYS, audio[i].tolist())),
+                           'key': int(rng.integers(0, 12)), 'loudness': -float(rng.random() * 30),
+                           'mode': int(rng.integers(0, 2)), 'tempo': float(rng.uniform(60, 180))}
+    } for i in range(n_tracks)]
+
+
+def legacy_mood_recommendations(model: MusicAI, mood: str, genre: str, available_tracks):
+    """The original nested-loop scoring with a full sort"""
+    mood_weights = model.mood_weights.get(mood, {})
+    genre_weights = model.genre_weights.get(genre, {})
+    track_scores = []
+    for track in available_tracks:
+        features = model.extract_track_features(track)
+        score = 0.0
+        for feature, weight in mood_weights.items():
+            if feature in features:
+                score += weight * features[feature]
+        for feature, weight in genre_weights.items():
+            if feature in features:
+                score += weight * features[feature]
+        track_scores.append((track, score))
+    track_scores.sort(key=lambda x: x[1], reverse=True)
+    return [track for track, score in track_scores[:20]]
+
+
+def timed(fn, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, np.median(timings) * 1000
+
+
+def run(n_candidates: int, repeats: int):
+    logging.getLogger('app.models.ai_model').setLevel(logging.WARNING)
+    model = MusicAI(model_dir=tempfile.mkdtemp())
+    tracks = synthetic_tracks(n_candidates)
+    model.feature_store = TrackFeatureStore(
+        IdIndex(track['id'] for track in tracks), model.extract_feature_matrix(tracks))
+
+    legacy, legacy_ms = timed(lambda: legacy_mood_recommendations(model, 'chill', 'jazz', tracks), repeats)
+    dicts, dicts_ms = timed(lambda: model.get_mood_based_recommendations('chill', 'jazz', tracks), repeats)
+    store, store_ms = timed(lambda: model.get_mood_based_recommendations('chill', 'jazz'), repeats)
+
+    assert [t['id'] for t in legacy] == [t['id'] for t in dicts] == [t['id'] for t in store]
+    print(f"{'path':<28} {'median ms':>10}")
+    print(f"{'legacy loops + full sort':<28} {legacy_ms:>10.1f}")
+    print(f"{'vectorized (track dicts)':<28} {dicts_ms:>10.1f}")
+    print(f"{'vectorized (feature store)':<28} {store_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--candidates', type=int, default=100_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    run(args.candidates, args.repeats)
@@ -0,0 +1,79 @@
+"""
+Benchmark sequential vs parallel hybrid candidate generation with latency budgets
+
+Usage: python -m benchmarks.bench_parallel_sources [--tracks 500000] [--requests 200]
+"""
+
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+from scipy import sparse
+
+from app.models.id_index import IdIndex
+from benchmarks.bench_content_similarity import build_model
+
+SEED_TRACKS = [
+    {'id': 'track0', 'name': 'term1 term2 term3', 'artists': [{'name': 'term4'}]},
+    {'id': 'track1', 'name': 'term10 term11', 'artists': [{'name': 'term12 term13'}]},
+]
+MODES = {
+    'sequential': {'max_workers': 1, 'budgets': {'content': None, 'mood': None, 'collaborative': None}},
+    'parallel': {'max_workers': 3, 'budgets': {'content': None, 'mood': None, 'collaborative': None}},
+    'parallel, tight budget': {'max_workers': 3, 'budgets': {'content': 10, 'mood': 10, 'collaborative': 10}},
+}
+
+
+def attach_collaborative(model, n_users: int, n_components: int = 20, seed: int = 3):
+    """Install random NMF factors over the whole catalog"""
+    rng = np.random.default_rng(seed)
+    n_tracks = len(model.feature_store)
+    cols = rng.integers(0, n_tracks, size=(n_users, 30))
+    cols.sort(axis=1)
+    interactions = sparse.csr_matrix((np.ones(cols.size, dtype=np.float32), cols.ravel(),
+                                      np.arange(0, cols.size + 1, 30)), shape=(n_users, n_tracks))
+    model._set_collaborative_state(
+        IdIndex(f'user{u}' for u in range(n_users)),
+        IdIndex(f'track{i}' for i in range(n_tracks)),
+        interactions,
+        rng.random((n_users, n_components), dtype=np.float32),
+        rng.random((n_components, n_tracks), dtype=np.float32)
+    )
+
+
+def run(n_tracks: int, n_requests: int, n_users: int):
+    logging.getLogger('app.models.ai_model').setLevel(logging.ERROR)
+    model = build_model(n_tracks)
+    attach_collaborative(model, n_users)
+
+    print(f"{n_tracks} tracks, {os.cpu_count()} CPUs")
+    print(f"{'mode':<24} {'p50 ms':>8} {'p99 ms':>8} {'partial':>8}   per-source p50/p99 ms")
+    for mode, config in MODES.items():
+        model.max_workers = config['max_workers']
+        model.source_budgets_ms = config['budgets']
+        model.latency = type(model.latency)()
+        model.deadline_misses.clear()
+
+        timings, partial = [], 0
+        for r in range(n_requests):
+            start = time.perf_counter()
+            model.get_hybrid_recommendations(f'user{r % n_users}', SEED_TRACKS, 'chill', 'jazz', 20)
+            timings.append((time.perf_counter() - start) * 1000)
+            partial += sum(model.deadline_misses.values()) > partial
+
+        stats = model.get_latency_stats()['latency']
+        sources = '  '.join(f"{source} {stats[source]['p50_ms']:.1f}/{stats[source]['p99_ms']:.1f}"
+                            for source in ('content', 'mood', 'collaborative'))
+        print(f"{mode:<24} {np.percentile(timings, 50):>8.1f} {np.percentile(timings, 99):>8.1f} "
+              f"{partial:>8}   {sources}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=500_000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--users', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.tracks, args.requests, args.users)
@@ -0,0 +1,55 @@
+"""
+Benchmark training pipeline speedup against the number of worker processes
+
+Usage: python -m benchmarks.bench_parallel_training [--users 20000] [--workers 1 2 4]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+
+from app.models.ai_model import MusicAI
+from app.models.training import TrainingPipeline
+from benchmarks.bench_incremental_update import synthetic_catalog, synthetic_users
+
+STAGES = ('processing', 'training')
+
+
+def user_exports(n_users: int, n_tracks: int):
+    """Raw (user id, export) pairs as the Spotify API returns them"""
+    catalog = synthetic_catalog(n_tracks)
+    return [(user_id, {'tracks': tracks, 'artists': [artist for track in tracks[:5] for artist in track['artists']]})
+            for user_id, tracks in synthetic_users(catalog, n_users)]
+
+
+def run(n_users: int, n_tracks: int, worker_counts, text_featurizer: str):
+    for name in ('app.models.ai_model', 'app.models.training'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    users_data = user_exports(n_users, n_tracks)
+
+    print(f"{n_users} users, {n_tracks} tracks, {text_featurizer} featurizer, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'processing s':>13} {'training s':>11} {'total s':>8} {'speedup':>8} {'same model':>11}")
+    baseline = reference = None
+    for n_workers in worker_counts:
+        model = MusicAI(model_dir=tempfile.mkdtemp(), text_featurizer=text_featurizer)
+        timings = TrainingPipeline(model, n_workers=n_workers).run(users_data)
+        total = sum(timings[stage] for stage in STAGES)
+        baseline = baseline or total
+
+        text = model.feature_store.text
+        if reference is None:
+            reference = text
+        same = text.shape == reference.shape and abs(text - reference).max() < 1e-9 if text.nnz else True
+        print(f"{n_workers:>8} {timings['processing']:>13.2f} {timings['training']:>11.2f} {total:>8.2f} "
+              f"{baseline / total:>7.2f}x {str(bool(same)):>11}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--tracks', type=int, default=50000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--text-featurizer', choices=['tfidf', 'hashing'], default='hashing')
+    args = parser.parse_args()
+    run(args.users, args.tracks, args.workers, args.text_featurizer)
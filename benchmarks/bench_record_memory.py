@@ -0,0 +1,130 @@
+"""
+Memory report for processed tracks and artists: dicts vs compact records
+
+Usage: python -m benchmarks.bench_record_memory [--tracks 1000000]
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from app.models.records import Artist, Track
+
+GENRES = ['pop', 'dance pop', 'rock', 'indie rock', 'hip hop', 'trap', 'jazz', 'edm', 'classical', 'folk']
+AUDIO_KEYS = ['danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness',
+              'instrumentalness', 'liveness', 'valence', 'tempo']
+
+
+def payload_templates(n_templates: int = 5000, n_artists: int = 2000, seed: int = 5):
+    """JSON-encoded API track and artist payloads; parsing them creates fresh strings like a real response"""
+    rng = np.random.default_rng(seed)
+    artists = [{
+        'id': f'{i:022d}',
+        'name': f'Artist Name {i}',
+        'popularity': int(rng.integers(0, 100)),
+        'followers': {'total': int(rng.integers(0, 10 ** 6))},
+        'genres': [str(g) for g in rng.choice(GENRES, int(rng.integers(1, 4)), replace=False)],
+    } for i in range(n_artists)]
+    tracks = []
+    for i in range(n_templates):
+        audio = dict(zip(AUDIO_KEYS, rng.random(len(AUDIO_KEYS)).round(4).tolist()))
+        audio.update({'id': f'{i:022d}', 'type': 'audio_features', 'time_signature': 4})
+        tracks.append(json.dumps({
+            'id': f'{i:022d}',
+            'name': f'Song Title Number {i}',
+            'popularity': int(rng.integers(0, 100)),
+            'duration_ms': int(rng.integers(120000, 300000)),
+            'explicit': bool(rng.random() < 0.2),
+            'artists': [artists[int(a)] for a in rng.integers(0, n_artists, int(rng.integers(1, 3)))],
+            'album': {'name': f'Album Title {i // 12}', 'release_date': f'20{i % 24:02d}-01-01'},
+            'audio_features': audio,
+        }))
+    return tracks, [json.dumps(artist) for artist in artists]
+
+
+def legacy_track(track):
+    """The dict SpotifyDataProcessor._process_track used to return"""
+    processed = {
+        'id': track.get('id'),
+        'name': track.get('name', ''),
+        'popularity': track.get('popularity', 0),
+        'duration_ms': track.get('duration_ms', 0),
+        'explicit': track.get('explicit', False),
+        'artists': [artist.get('name', '') for artist in track.get('artists', [])],
+        'album': track.get('album', {}).get('name', ''),
+        'release_date': track.get('album', {}).get('release_date', ''),
+        'genres': list(dict.fromkeys(genre for artist in track.get('artists', [])
+                                     for genre in artist.get('genres', [])))
+    }
+    if 'audio_features' in track:
+        processed['audio_features'] = track['audio_features']
+    return processed
+
+
+def legacy_artist(artist):
+    """The dict SpotifyDataProcessor._process_artist used to return"""
+    return {
+        'id': artist.get('id'),
+        'name': artist.get('name', ''),
+        'popularity': artist.get('popularity', 0),
+        'genres': artist.get('genres', []),
+        'followers': artist.get('followers', {}).get('total', 0)
+    }
+
+
+def _rss_bytes() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _measure(kind: str, compact: bool, n_records: int, results):
+    track_templates, artist_templates = payload_templates()
+    templates = track_templates if kind == 'tracks' else artist_templates
+    if kind == 'tracks':
+        build = Track.from_api if compact else legacy_track
+    else:
+        build = Artist.from_api if compact else legacy_artist
+
+    gc.collect()
+    before = _rss_bytes()
+    records = [build(json.loads(templates[i % len(templates)])) for i in range(n_records)]
+    gc.collect()
+    results.put(_rss_bytes() - before)
+    del records
+
+
+def measure(kind: str, compact: bool, n_records: int) -> int:
+    """Resident memory still held after building n_records, in a fresh process.
+
+    Raw payloads are parsed one at a time and dropped, so what remains is
+    what the records keep alive.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_measure, args=(kind, compact, n_records, results))
+    process.start()
+    used = results.get()
+    process.join()
+    return used
+
+
+def run(n_tracks: int, n_artists: int):
+    print(f"{'records':<8} {'count':>9} {'dict MiB':>9} {'compact MiB':>12} {'dict B/rec':>11} "
+          f"{'compact B/rec':>14} {'saving':>7}")
+    for kind, count in (('tracks', n_tracks), ('artists', n_artists)):
+        dict_bytes = measure(kind, False, count)
+        compact_bytes = measure(kind, True, count)
+        print(f"{kind:<8} {count:>9} {dict_bytes / 2 ** 20:>9.0f} {compact_bytes / 2 ** 20:>12.0f} "
+              f"{dict_bytes / count:>11.0f} {compact_bytes / count:>14.0f} {dict_bytes / compact_bytes:>6.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=1000000)
+    parser.add_argument('--artists', type=int, default=100000)
+    args = parser.parse_args()
+    run(args.tracks, args.artists)
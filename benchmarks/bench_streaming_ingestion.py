@@ -0,0 +1,100 @@
+"""
+Benchmark peak memory of in-memory vs streaming training on a synthetic NDJSON export
+
+Usage: python -m benchmarks.bench_streaming_ingestion [--size-gb 5] [--batch-size 5000]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from app.models.ai_model import MusicAI
+from app.models.data_processor import SpotifyDataProcessor, iter_user_exports
+from app.models.training import TrainingPipeline
+from benchmarks.bench_incremental_update import synthetic_catalog
+
+AUDIO_KEYS = ['danceability', 'energy', 'valence', 'acousticness', 'instrumentalness']
+
+
+def write_export(path: str, size_bytes: int, n_tracks: int, tracks_per_user: int = 30, seed: int = 7) -> int:
+    """Write users to an NDJSON file until it reaches size_bytes; returns the user count"""
+    rng = np.random.default_rng(seed)
+    catalog = synthetic_catalog(n_tracks)
+    for track in catalog:
+        track['audio_features'] = {key: round(float(rng.random()), 3) for key in AUDIO_KEYS}
+    encoded = [json.dumps(track) for track in catalog]
+    encoded_artists = [json.dumps(track['artists'])[1:-1] for track in catalog]
+
+    n_users = written = 0
+    with open(path, 'w') as f:
+        while written < size_bytes:
+            picks = np.minimum(rng.zipf(1.3, size=(1000, tracks_per_user)) - 1, n_tracks - 1)
+            for row in picks:
+                line = (f'{{"user_id": "user{n_users}", "tracks": [{", ".join(encoded[i] for i in row)}], '
+                        f'"artists": [{", ".join(encoded_artists[i] for i in row[:5])}]}}\n')
+                written += f.write(line)
+                n_users += 1
+    return n_users
+
+
+def _measure(mode: str, path: str, batch_size: int, results):
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    if mode == 'in-memory training':
+        model = MusicAI(model_dir=tempfile.mkdtemp(), text_featurizer='hashing')
+        TrainingPipeline(model, n_workers=1).run(list(iter_user_exports(path)))
+    elif mode == 'streaming training':
+        model = MusicAI(model_dir=tempfile.mkdtemp(), text_featurizer='hashing')
+        TrainingPipeline(model, n_workers=1).run_streaming(iter_user_exports(path), batch_size=batch_size)
+    else:
+        rows = sum(len(frame) for frame in SpotifyDataProcessor().stream_training_dataset(
+            iter_user_exports(path), batch_size=batch_size))
+        assert rows > 0
+    # ru_maxrss is reported in kilobytes on Linux
+    results.put((time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024))
+
+
+def run(size_gb: float, n_tracks: int, batch_size: int, path: str = None):
+    path = path or os.path.join(tempfile.mkdtemp(), 'export.ndjson')
+    size_bytes = int(size_gb * 2 ** 30)
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        n_users = write_export(path, size_bytes, n_tracks)
+        print(f"wrote {n_users} users to {path} in {time.perf_counter() - start:.0f}s")
+    export_bytes = os.path.getsize(path)
+    ram_bytes = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+
+    print(f"export {export_bytes / 2 ** 30:.2f} GiB, RAM {ram_bytes / 2 ** 30:.1f} GiB, batch {batch_size} users")
+    print(f"{'mode':<22} {'seconds':>9} {'MiB/s':>7} {'peak RSS MiB':>13}")
+    context = multiprocessing.get_context('spawn')
+    for mode in ('user features (stream)', 'streaming training', 'in-memory training'):
+        # Parsed JSON takes several times its size on disk
+        if mode == 'in-memory training' and export_bytes * 3 > ram_bytes:
+            print(f"{mode:<22} {'skipped: export does not fit in RAM':>31}")
+            continue
+        results = context.Queue()
+        process = context.Process(target=_measure, args=(mode, path, batch_size, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            print(f"{mode:<22} {'failed (exit code ' + str(process.exitcode) + ')':>31}")
+            continue
+        seconds, peak = results.get()
+        print(f"{mode:<22} {seconds:>9.1f} {export_bytes / 2 ** 20 / seconds:>7.1f} {peak / 2 ** 20:>13.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-gb', type=float, default=5.0)
+    parser.add_argument('--tracks', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--path', help='reuse (or create) the export at this path')
+    args = parser.parse_args()
+    run(args.size_gb, args.tracks, args.batch_size, args.path)
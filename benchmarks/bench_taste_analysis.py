@@ -0,0 +1,127 @@
+"""
+Benchmark MusicAI.analyze_user_taste: per-track feature dicts extracted twice vs one fused pass
+
+Usage: python -m benchmarks.bench_taste_analysis [--tracks 50 1000] [--artists 50] [--repeats 200]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from app.models.ai_model import MusicAI
+from app.models.data_processor import SpotifyDataProcessor
+from app.models.genres import GenreCounts
+from benchmarks.bench_genre_counting import synthetic_artists
+
+ANALYZED_FEATURES = ['energy', 'danceability', 'valence', 'acousticness', 'instrumentalness']
+
+
+def synthetic_tracks(n_tracks: int, seed: int = 7):
+    """API track payloads; one in five has no audio features"""
+    rng = np.random.default_rng(seed)
+    tracks = []
+    for i in range(n_tracks):
+        track = {
+            'id': f'track{i}',
+            'name': f'track {i}',
+            'popularity': int(rng.integers(0, 100)),
+            'duration_ms': int(rng.integers(90_000, 420_000)),
+            'explicit': bool(rng.random() < 0.2),
+            'artists': [{'name': f'artist {i % 40}'}],
+            'album': {'name': f'album {i % 25}'}
+        }
+        if i % 5:
+            track['audio_features'] = {
+                'danceability': rng.random(), 'energy': rng.random(), 'key': int(rng.integers(0, 12)),
+                'loudness': -60 * rng.random(), 'mode': int(rng.integers(0, 2)),
+                'speechiness': rng.random(), 'acousticness': rng.random(),
+                'instrumentalness': rng.random(), 'liveness': rng.random(),
+                'valence': rng.random(), 'tempo': 60 + 120 * rng.random()
+            }
+        tracks.append(track)
+    return tracks
+
+
+def legacy_analysis(model: MusicAI, user_tracks, user_artists):
+    """analyze_user_taste as it was: features extracted per track, once for the profile and once again"""
+    track_features = [model.extract_track_features(track) for track in user_tracks]
+    genres = GenreCounts.of(user_artists)
+    profile = {}
+    if track_features:
+        for feature in track_features[0].keys():
+            values = [tf[feature] for tf in track_features if feature in tf]
+            if values:
+                profile[f'avg_{feature}'] = np.mean(values)
+                profile[f'std_{feature}'] = np.std(values)
+    if genres.total:
+        for i, (genre, count) in enumerate(genres.top(5)):
+            profile[f'top_genre_{i+1}'] = count / genres.total
+
+    analysis = {'total_tracks': len(user_tracks), 'total_artists': len(user_artists), 'profile': profile}
+    genres = GenreCounts.of(user_artists)
+    if genres.total:
+        analysis['top_genres'] = genres.top(5)
+        analysis['genre_diversity'] = genres.distinct
+    if user_tracks:
+        track_features = [model.extract_track_features(track) for track in user_tracks]
+        feature_analysis = {}
+        for feature in ANALYZED_FEATURES:
+            values = [tf[feature] for tf in track_features if feature in tf]
+            if values:
+                feature_analysis[feature] = {'mean': np.mean(values), 'std': np.std(values),
+                                             'min': np.min(values), 'max': np.max(values)}
+        analysis['feature_analysis'] = feature_analysis
+    analysis['insights'] = model._generate_insights(analysis)
+    return analysis
+
+
+def same_analysis(a, b) -> bool:
+    """Same keys and genres; feature statistics equal to float64 precision"""
+    if a['profile'].keys() != b['profile'].keys() or a.get('top_genres') != b.get('top_genres'):
+        return False
+    if not all(np.isclose(a['profile'][key], b['profile'][key], rtol=1e-9, atol=1e-12) for key in a['profile']):
+        return False
+    fa, fb = a.get('feature_analysis', {}), b.get('feature_analysis', {})
+    return fa.keys() == fb.keys() and all(
+        np.isclose(fa[feature][stat], fb[feature][stat], rtol=1e-9, atol=1e-12)
+        for feature in fa for stat in fa[feature]
+    )
+
+
+def time_per_call(analyze, tracks, artists, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        analyze(tracks, artists)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def run(track_counts, n_artists: int, repeats: int):
+    logging.disable(logging.WARNING)
+    model = MusicAI(model_dir=tempfile.mkdtemp())
+    processor = SpotifyDataProcessor()
+    artists = synthetic_artists(1, n_artists)[0]
+
+    print(f"{n_artists} artists, {repeats} repeats")
+    print(f"{'tracks':>7} {'input':<8} {'legacy us':>10} {'fused us':>9} {'speedup':>8} {'same result':>12}")
+    for n_tracks in track_counts:
+        payloads = synthetic_tracks(n_tracks)
+        processed = processor.process_user_data(payloads, artists)
+        for label, tracks, user_artists in (('API', payloads, artists),
+                                            ('records', processed['tracks'], processed['artists'])):
+            legacy = time_per_call(lambda t, a: legacy_analysis(model, t, a), tracks, user_artists, repeats)
+            fused = time_per_call(model.analyze_user_taste, tracks, user_artists, repeats)
+            same = same_analysis(legacy_analysis(model, tracks, user_artists),
+                                 model.analyze_user_taste(tracks, user_artists))
+            print(f"{n_tracks:>7} {label:<8} {legacy:>10.0f} {fused:>9.0f} {legacy / fused:>7.1f}x {str(same):>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, nargs='+', default=[50, 1000])
+    parser.add_argument('--artists', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+    run(args.tracks, args.artists, args.repeats)
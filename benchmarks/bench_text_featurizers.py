@@ -0,0 +1,56 @@
+"""
+Compare track-text encoding throughput: fitted TF-IDF vocabulary vs hashing featurizer
+
+Usage: python -m benchmarks.bench_text_featurizers [--tracks 200000] [--jobs 1 2 4]
+"""
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.models.featurizers import HashingTfidfVectorizer
+
+WORDS = [f"word{i}" for i in range(50000)]
+
+
+def synthetic_texts(n_tracks: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    words = rng.choice(WORDS, size=(n_tracks, 9))
+    return [' '.join(row) for row in words]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(n_tracks: int, jobs):
+    texts = synthetic_texts(n_tracks)
+    print(f"{'featurizer':<22} {'fit s':>8} {'encode s':>9} {'tracks/s':>10} {'state KiB':>10}")
+
+    tfidf = TfidfVectorizer(max_features=1000, stop_words='english', ngram_range=(1, 2))
+    _, fit_time = timed(tfidf.fit, texts)
+    _, encode_time = timed(tfidf.transform, texts)
+    state = len(pickle.dumps(tfidf)) / 1024
+    print(f"{'tfidf (vocabulary)':<22} {fit_time:>8.2f} {encode_time:>9.2f} "
+          f"{n_tracks / encode_time:>10.0f} {state:>10.0f}")
+
+    for n_jobs in jobs:
+        hashing = HashingTfidfVectorizer(n_jobs=n_jobs)
+        _, fit_time = timed(hashing.fit, texts)
+        _, encode_time = timed(hashing.transform, texts)
+        state = len(pickle.dumps(hashing)) / 1024
+        print(f"{f'hashing (n_jobs={n_jobs})':<22} {fit_time:>8.2f} {encode_time:>9.2f} "
+              f"{n_tracks / encode_time:>10.0f} {state:>10.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=200_000)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+    run(args.tracks, args.jobs)
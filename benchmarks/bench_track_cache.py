@@ -0,0 +1,91 @@
+"""
+Benchmark SpotifyService.get_track with and without the track metadata cache
+
+Replays a skewed stream of track lookups (as /api/discover makes for seeds
+and AI discoveries) against a stub client with fixed per-call latency, and
+reports upstream calls, hit rate and wall time. The SQLite rows start a
+second cache on the same file, as a restarted worker would.
+
+Usage: python -m benchmarks.bench_track_cache [--lookups 5000] [--catalog 2000] [--latency-ms 2]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.services import spotify_service
+from app.services.spotify_service import SpotifyService
+from app.services.track_cache import TrackMetadataCache
+
+
+class StubClient:
+    """Answers track lookups after a fixed delay, counting calls"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def track(self, track_id):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {'id': track_id, 'name': f'track {track_id}', 'artists': [{'name': 'artist'}],
+                'album': {'name': 'album', 'images': [{'url': f'https://img/{track_id}'}]}}
+
+
+class UncachedTracks:
+    """Stands in for the track cache when measuring the uncached path"""
+
+    def get(self, track_id):
+        return None
+
+    def set(self, track_id, track):
+        pass
+
+
+def lookup_stream(n_lookups: int, catalog: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.3, size=n_lookups), catalog) - 1
+    return [f'id{rank}' for rank in ranks]
+
+
+def replay(cache, ids, latency: float):
+    spotify_service.track_cache = cache
+    service = SpotifyService()
+    client = StubClient(latency)
+    service._get_client = lambda: client
+    start = time.perf_counter()
+    for track_id in ids:
+        service.get_track(track_id)
+    return client.calls, time.perf_counter() - start
+
+
+def run(n_lookups: int, catalog: int, latency_ms: float):
+    ids = lookup_stream(n_lookups, catalog)
+    latency = latency_ms / 1000
+    path = os.path.join(tempfile.mkdtemp(), 'tracks.sqlite')
+
+    rows = [('no cache', UncachedTracks()),
+            ('memory', TrackMetadataCache()),
+            ('sqlite, cold', TrackMetadataCache(path=path)),
+            ('sqlite, restarted', None)]
+    print(f"{n_lookups} lookups over {len(set(ids))} distinct tracks, {latency_ms}ms per upstream call")
+    print(f"{'cache':<18} {'upstream calls':>15} {'hit rate':>9} {'seconds':>8}")
+    for name, cache in rows:
+        if cache is None:
+            # A new process on the same file: memory is empty, SQLite is warm
+            cache = TrackMetadataCache(path=path)
+        calls, seconds = replay(cache, ids, latency)
+        hit_rate = cache.stats()['hit_rate'] if isinstance(cache, TrackMetadataCache) else 0.0
+        print(f"{name:<18} {calls:>15} {hit_rate:>9.1%} {seconds:>8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--catalog', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=2.0)
+    args = parser.parse_args()
+    run(args.lookups, args.catalog, args.latency_ms)
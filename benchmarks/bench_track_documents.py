@@ -0,0 +1,77 @@
+"""
+Benchmark track text featurization: string concatenation vs the document cache
+
+Usage: python -m benchmarks.bench_track_documents [--tracks 500000] [--memory]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.models.documents import TermAnalyzer, TrackDocumentCache
+from benchmarks.bench_incremental_update import synthetic_catalog
+
+
+def legacy_text(track):
+    """The original per-call document building by string concatenation"""
+    track_text = f"{track.get('name', '')} "
+    for artist in track.get('artists', []):
+        track_text += f"{artist.get('name', '') if isinstance(artist, dict) else artist} "
+    album = track.get('album', {})
+    track_text += f"{album.get('name', '') if isinstance(album, dict) else album} "
+    for artist in track.get('artists', []):
+        if isinstance(artist, dict) and 'genres' in artist:
+            track_text += f"{' '.join(artist['genres'])} "
+    return track_text.strip()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(n_tracks: int, measure_memory: bool):
+    catalog = synthetic_catalog(n_tracks)
+    text_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english', ngram_range=(1, 2))
+    cache = TrackDocumentCache(TermAnalyzer(stop_words='english', ngram_range=(1, 2)))
+    term_vectorizer = TfidfVectorizer(max_features=1000, analyzer=cache.analyzer)
+
+    texts, text_build = timed(lambda: [legacy_text(track) for track in catalog])
+    _, text_fit = timed(lambda: text_vectorizer.fit(texts))
+    _, text_encode = timed(lambda: text_vectorizer.transform([legacy_text(track) for track in catalog]))
+
+    if measure_memory:
+        tracemalloc.start()
+    documents, cold_build = timed(lambda: cache.documents(catalog))
+    cache_mib = tracemalloc.get_traced_memory()[0] / 2 ** 20 if measure_memory else float('nan')
+    tracemalloc.stop()
+    _, warm_build = timed(lambda: cache.documents(catalog))
+    _, term_fit = timed(lambda: term_vectorizer.fit(documents))
+    _, term_encode = timed(lambda: term_vectorizer.transform(cache.documents(catalog)))
+
+    # Seed queries of five tracks each
+    seeds = [catalog[i:i + 5] for i in range(0, min(n_tracks, 50_000), 5)]
+    _, text_query = timed(lambda: text_vectorizer.transform(
+        [' '.join(f"{t['name']} " + ''.join(f"{a['name']} " for a in t['artists']) for t in group)
+         for group in seeds]))
+    _, term_query = timed(lambda: term_vectorizer.transform([cache.query_terms(group) for group in seeds]))
+
+    print(f"{n_tracks} tracks, cache holds {len(cache)} entries (~{cache_mib:.0f} MiB)")
+    print(f"{'step':<30} {'text s':>9} {'cache s':>9}")
+    for name, text_seconds, cache_seconds in (
+            ('build documents (cold)', text_build, cold_build),
+            ('build documents (warm)', text_build, warm_build),
+            ('fit vectorizer', text_fit, term_fit),
+            ('encode catalog (warm)', text_encode, term_encode),
+            (f'encode {len(seeds)} seed queries', text_query, term_query)):
+        print(f"{name:<30} {text_seconds:>9.2f} {cache_seconds:>9.2f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tracks', type=int, default=500_000)
+    parser.add_argument('--memory', action='store_true', help='trace cache memory (slows the cold build)')
+    args = parser.parse_args()
+    run(args.tracks, args.memory)
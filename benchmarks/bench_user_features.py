@@ -0,0 +1,91 @@
+"""
+Benchmark per-user dict features vs the vectorized training dataset
+
+Usage: python -m benchmarks.bench_user_features [--users 100000] [--tracks-per-user 30]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.models.data_processor import SpotifyDataProcessor
+
+GENRES = ['pop', 'rock', 'indie rock', 'hip hop', 'jazz', 'edm', 'classical', 'folk', 'soul', 'metal']
+AUDIO_KEYS = ['danceability', 'energy', 'valence', 'acousticness', 'instrumentalness', 'tempo']
+
+
+def synthetic_users(n_users: int, tracks_per_user: int, n_tracks: int = 50000, seed: int = 11):
+    """Raw user exports over a shared catalog; some tracks lack audio features"""
+    rng = np.random.default_rng(seed)
+    artists = [{
+        'id': f'artist{i}',
+        'name': f'artist {i}',
+        'popularity': int(rng.integers(0, 100)),
+        'followers': {'total': int(rng.integers(0, 10 ** 6))},
+        'genres': list(rng.choice(GENRES, int(rng.integers(0, 4)), replace=False)),
+    } for i in range(n_tracks // 10)]
+    audio = rng.random((n_tracks, len(AUDIO_KEYS))).round(3).tolist()
+    catalog = []
+    for i in range(n_tracks):
+        track = {
+            'id': f'track{i}',
+            'name': f'track {i}',
+            'popularity': int(rng.integers(0, 100)),
+            'duration_ms': int(rng.integers(120000, 300000)),
+            'explicit': bool(rng.random() < 0.2),
+            'artists': [artists[i % len(artists)]],
+            'album': {'name': f'album {i // 10}'},
+        }
+        if i % 4:
+            track['audio_features'] = dict(zip(AUDIO_KEYS, audio[i]))
+        catalog.append(track)
+
+    picks = rng.integers(0, n_tracks, size=(n_users, tracks_per_user))
+    return [(f'user{u}', {'tracks': [catalog[t] for t in picks[u]],
+                          'artists': [artists[t % len(artists)] for t in picks[u][:10]]})
+            for u in range(n_users)]
+
+
+def legacy_dataset(processor: SpotifyDataProcessor, users_data) -> pd.DataFrame:
+    """The per-user path: processed dicts, per-feature np.mean/np.std, list of dicts"""
+    dataset = []
+    for user_id, user_data in users_data:
+        processed = processor.process_user_data(user_data.get('tracks', []), user_data.get('artists', []))
+        features = processor._create_user_features(processed)
+        features['user_id'] = user_id
+        dataset.append(features)
+    return pd.DataFrame(dataset)
+
+
+def run(n_users: int, tracks_per_user: int):
+    users_data = synthetic_users(n_users, tracks_per_user)
+    processor = SpotifyDataProcessor()
+
+    start = time.perf_counter()
+    legacy = legacy_dataset(processor, users_data)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = processor.create_training_dataset(users_data)
+    vectorized_time = time.perf_counter() - start
+
+    same_columns = list(legacy.columns) == list(vectorized.columns)
+    numeric = legacy.columns.drop('user_id')
+    same_values = same_columns and np.allclose(legacy[numeric].to_numpy(float), vectorized[numeric].to_numpy(float),
+                                               equal_nan=True)
+
+    print(f"{n_users} users x {tracks_per_user} tracks, {len(vectorized.columns)} columns")
+    print(f"{'path':<12} {'seconds':>9} {'users/s':>10}")
+    print(f"{'per-user':<12} {legacy_time:>9.2f} {n_users / legacy_time:>10.0f}")
+    print(f"{'vectorized':<12} {vectorized_time:>9.2f} {n_users / vectorized_time:>10.0f}")
+    print(f"speedup {legacy_time / vectorized_time:.1f}x, same columns: {same_columns}, same values: {same_values}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--tracks-per-user', type=int, default=30)
+    args = parser.parse_args()
+    run(args.users, args.tracks_per_user)
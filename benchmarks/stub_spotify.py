@@ -0,0 +1,127 @@
+"""
+Local stub of the Spotify Web API for benchmarks
+
+Serves synthetic tracks, artists, top tracks, searches and user endpoints
+after a fixed delay per request, and counts requests per endpoint. Ids
+starting with 'missing' are unknown (null in batch responses, 404 alone).
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def stub_track(track_id: str) -> dict:
+    return {'id': track_id, 'name': f'track {track_id}', 'popularity': 50, 'duration_ms': 200000,
+            'artists': [{'id': f'artist-{track_id}', 'name': f'artist {track_id}'}],
+            'album': {'name': f'album {track_id}', 'images': [{'url': f'http://img/{track_id}'}]}}
+
+
+def stub_artist(artist_id: str) -> dict:
+    return {'id': artist_id, 'name': f'artist {artist_id}', 'popularity': 50,
+            'genres': [f'genre {sum(map(ord, artist_id)) % 7}', 'pop']}
+
+
+def _items(prefix: str, n: int) -> list:
+    return [stub_track(f'{prefix}{i}') for i in range(n)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'StubSpotifyServer'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part][1:]  # drop 'v1'
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        label = parts[:1] + ['{id}'] + parts[2:] if len(parts) > 1 and parts[0] in ('tracks', 'artists') else parts
+        self.server.record('/'.join(label))
+        time.sleep(self.server.latency)
+
+        ids = query.get('ids', '').split(',') if query.get('ids') else []
+        limit = int(query.get('limit', 20))
+        if parts == ['tracks']:
+            return self._send(200, {'tracks': [None if i.startswith('missing') else stub_track(i) for i in ids]})
+        if parts == ['artists']:
+            return self._send(200, {'artists': [None if i.startswith('missing') else stub_artist(i) for i in ids]})
+        if len(parts) == 2 and parts[1].startswith('missing'):
+            return self._send(404, {'error': {'status': 404, 'message': 'non existing id'}})
+        if len(parts) == 2 and parts[0] == 'tracks':
+            return self._send(200, stub_track(parts[1]))
+        if len(parts) == 2 and parts[0] == 'artists':
+            return self._send(200, stub_artist(parts[1]))
+        if len(parts) == 3 and parts[2] == 'top-tracks':
+            return self._send(200, {'tracks': _items(f'{parts[1]}-top', 10)})
+        if parts == ['search']:
+            kind = query.get('type', 'track')
+            # Ids derived from the query (alphanumeric, like real ids)
+            tag = ''.join(c for c in query.get('q', '') if c.isalnum())
+            items = _items(f'search{tag}', limit) if kind == 'track' else \
+                [stub_artist(f'search{tag}{i}') for i in range(limit)]
+            return self._send(200, {f'{kind}s': {'items': items}})
+        if parts == ['me']:
+            return self._send(200, {'id': 'stub-user', 'display_name': 'Stub User'})
+        if parts == ['me', 'top', 'tracks']:
+            return self._send(200, {'items': _items('top', limit)})
+        if parts == ['me', 'top', 'artists']:
+            return self._send(200, {'items': [stub_artist(f'top{i}') for i in range(limit)]})
+        if parts == ['me', 'player', 'recently-played']:
+            return self._send(200, {'items': [{'track': track} for track in _items('recent', limit)]})
+        if parts == ['me', 'playlists']:
+            return self._send(200, {'items': []})
+        return self._send(404, {'error': {'status': 404, 'message': 'unknown endpoint'}})
+
+
+class StubSpotifyServer(ThreadingHTTPServer):
+    """Stub API on 127.0.0.1 with ``latency`` seconds of delay per request.
+
+    Use as a context manager; ``prefix`` is the base URL to give a spotipy
+    client (``client.prefix = server.prefix``).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.02):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.latency = latency
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def prefix(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/v1/'
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def record(self, endpoint: str):
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -43,8 +43,29 @@ class Config:
     DEFAULT_TIME_RANGE = DEFAULT_TIME_RANGE
     
     # Cache settings
-    CACHE_TYPE = 'simple'
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple')  # 'redis' shares Spotify responses between workers
     CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))  # in-process LRU bound
+    CACHE_LOCAL_TTL = 30  # seconds a worker keeps its own copy of a shared entry
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Concurrent Spotify requests per service (thread pool fan-out and async connection pool)
+    SPOTIFY_MAX_CONCURRENCY = int(os.environ.get('SPOTIFY_MAX_CONCURRENCY', 8))
+    
+    # Track metadata shared by every user (set TRACK_CACHE_PATH to persist it in SQLite)
+    TRACK_CACHE_MAX_ENTRIES = int(os.environ.get('TRACK_CACHE_MAX_ENTRIES', 50000))
+    TRACK_CACHE_TTL = int(os.environ.get('TRACK_CACHE_TTL', 7 * 24 * 3600))  # 1 week
+    TRACK_CACHE_PATH = os.environ.get('TRACK_CACHE_PATH')
+    
+    # /analyze results per user and time range: fresh for TTL, then served stale while refreshing
+    ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 300))
+    ANALYSIS_CACHE_STALE_TTL = int(os.environ.get('ANALYSIS_CACHE_STALE_TTL', 3600))
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 10000))
+    
+    # Model training (0 means one worker per CPU)
+    TRAINING_WORKERS = int(os.environ.get('TRAINING_WORKERS', 0)) or os.cpu_count() or 1
+    TRAINING_CHUNK_SIZE = int(os.environ.get('TRAINING_CHUNK_SIZE', 256))
+    TRAINING_BATCH_SIZE = int(os.environ.get('TRAINING_BATCH_SIZE', 5000))  # users held at once when streaming
     
     # Session settings
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour